@@ -0,0 +1,74 @@
+"""
+This module contains the controller (endpoints) for the BulkJobs entity.
+It handles all API/HTTP related issues.
+It uses the service layer to perform the business logic.
+"""
+
+from typing import List
+
+from readyapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.bulk_jobs.repository import AsyncBulkJobRepository
+from app.api.v1.bulk_jobs.service import AsyncBulkJobService
+from app.api.v1.bulk_jobs.types import BulkJobKind, BulkJobResponse
+from app.api.v1.bulk_jobs.worker import bulk_job_worker
+from app.api.v1.entity_tags.types import (
+    EntityTagDeleteRequest,
+    ResetEntityTagsByNameRequest,
+    ResetMode,
+)
+from app.common.constants import MAX_SEARCH_RESULTS
+from app.common.database import get_async_db
+from app.common.metrics import observe_bulk_request
+
+router = APIRouter()
+
+
+async def get_async_bulk_job_service(
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncBulkJobService:
+    # the primary: a job polled right after its submission must be found
+    repository = AsyncBulkJobRepository(db)
+    return AsyncBulkJobService(repository)
+
+
+@router.post(
+    "/bulk_jobs/entity_tags/reset", response_model=BulkJobResponse, status_code=202
+)
+async def submit_reset(
+    reset_requests: List[ResetEntityTagsByNameRequest],
+    mode: ResetMode = ResetMode.REPLACE,
+    bulk_job_service: AsyncBulkJobService = Depends(get_async_bulk_job_service),
+):
+    observe_bulk_request("bulk_jobs_reset", len(reset_requests))
+    job = await bulk_job_service.submit(BulkJobKind.RESET, reset_requests, mode)
+    bulk_job_worker.notify()
+    return job
+
+
+@router.post(
+    "/bulk_jobs/entity_tags/delete", response_model=BulkJobResponse, status_code=202
+)
+async def submit_delete(
+    delete_requests: List[EntityTagDeleteRequest],
+    bulk_job_service: AsyncBulkJobService = Depends(get_async_bulk_job_service),
+):
+    observe_bulk_request("bulk_jobs_delete", len(delete_requests))
+    job = await bulk_job_service.submit(BulkJobKind.DELETE, delete_requests)
+    bulk_job_worker.notify()
+    return job
+
+
+@router.get("/bulk_jobs/{job_id}", response_model=BulkJobResponse)
+async def get_job(
+    job_id: int,
+    offset: int = 0,
+    limit: int = MAX_SEARCH_RESULTS,
+    bulk_job_service: AsyncBulkJobService = Depends(get_async_bulk_job_service),
+):
+    """The job status, and the outcome of its processed items from offset on"""
+    job = await bulk_job_service.get_job(job_id, offset, min(limit, MAX_SEARCH_RESULTS))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return job
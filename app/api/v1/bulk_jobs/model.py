@@ -0,0 +1,81 @@
+"""
+This module contains the ORM models of the bulk jobs: a bulk job, and the
+requests (items) it processes.
+"""
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.common.database import Base
+
+
+class BulkJob(Base):
+    """A bulk reset or bulk delete of entity tags, processed in the background"""
+
+    __tablename__ = "bulk_jobs"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # BulkJobKind
+    kind = Column(String, nullable=False)
+    # ResetMode of the reset jobs
+    mode = Column(String)
+    # BulkJobStatus
+    status = Column(String, nullable=False)
+    total = Column(Integer, nullable=False)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    # the failed attempts at the current chunk, the job fails after
+    # BULK_JOB_MAX_ATTEMPTS of them
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String)
+    # the next attempt after a failed one, None to process the job right away
+    retry_at = Column(DateTime(timezone=True))
+    # pylint: disable=not-callable
+    created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # the workers look for the oldest unfinished job
+        Index(
+            "ix_bulk_jobs_unfinished",
+            "id",
+            postgresql_where=text("status NOT IN ('completed', 'failed')"),
+        ),
+    )
+
+
+class BulkJobItem(Base):
+    """A single request of a bulk job, and its outcome once processed"""
+
+    __tablename__ = "bulk_job_items"
+
+    job_id = Column(
+        BigInteger, ForeignKey("bulk_jobs.id", ondelete="CASCADE"), primary_key=True
+    )
+    position = Column(Integer, primary_key=True)
+    request = Column(JSONB, nullable=False)
+    # BulkJobItemStatus
+    status = Column(String, nullable=False)
+    response = Column(JSONB)
+    errors = Column(JSONB)
+
+    __table_args__ = (
+        # the workers read the pending items of a job in order
+        Index(
+            "ix_bulk_job_items_pending",
+            "job_id",
+            "position",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
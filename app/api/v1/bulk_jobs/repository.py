@@ -0,0 +1,101 @@
+"""
+This module contains the repository layer (database operations)
+for the BulkJobs entity.
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.v1.bulk_jobs.model import BulkJob, BulkJobItem
+from app.api.v1.bulk_jobs.types import BulkJobItemStatus, BulkJobStatus
+from app.common.base_entity.async_repository import AsyncBaseRepository
+from app.common.base_entity.repository import BaseRepository
+
+
+class BulkJobRepository(BaseRepository[BulkJob]):
+    """
+    Provides methods to perform CRUD operations
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(db, BulkJob)
+
+    def create_job(self, job: BulkJob, requests: List[dict]) -> BulkJob:
+        """Creates the job and its items, one per request, in a few statements"""
+        self.create(job)
+        if requests:
+            self.db.execute(
+                insert(BulkJobItem),
+                [
+                    {
+                        "job_id": job.id,
+                        "position": position,
+                        "request": request,
+                        "status": BulkJobItemStatus.PENDING.value,
+                    }
+                    for position, request in enumerate(requests)
+                ],
+            )
+        return job
+
+    def claim_job(self) -> Optional[BulkJob]:
+        """
+        Locks the oldest unfinished job until the end of the transaction. The jobs
+        locked by the other workers are skipped, so a job is processed by a single
+        worker at a time, and its items in order. So are the jobs waiting for their
+        next attempt, the later jobs are processed meanwhile.
+        """
+        return self.db.scalars(
+            select(BulkJob)
+            .where(
+                BulkJob.status.not_in(
+                    [BulkJobStatus.COMPLETED.value, BulkJobStatus.FAILED.value]
+                ),
+                # pylint: disable=not-callable
+                or_(BulkJob.retry_at.is_(None), BulkJob.retry_at <= func.now()),
+            )
+            .order_by(BulkJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+
+    def pending_items(self, job_id: int, limit: int) -> List[BulkJobItem]:
+        return list(
+            self.db.scalars(
+                select(BulkJobItem)
+                .where(
+                    BulkJobItem.job_id == job_id,
+                    BulkJobItem.status == BulkJobItemStatus.PENDING.value,
+                )
+                .order_by(BulkJobItem.position)
+                .limit(limit)
+            )
+        )
+
+    def processed_items(
+        self, job_id: int, offset: int, limit: int
+    ) -> List[BulkJobItem]:
+        return list(
+            self.db.scalars(
+                select(BulkJobItem)
+                .where(
+                    BulkJobItem.job_id == job_id,
+                    BulkJobItem.status != BulkJobItemStatus.PENDING.value,
+                )
+                .order_by(BulkJobItem.position)
+                .offset(offset)
+                .limit(limit)
+            )
+        )
+
+
+class AsyncBulkJobRepository(AsyncBaseRepository[BulkJob]):
+    """
+    asyncio variant of BulkJobRepository
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, BulkJob)
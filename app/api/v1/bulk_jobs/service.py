@@ -0,0 +1,308 @@
+"""
+This module contains the service layer (business logic) for the BulkJobs entity.
+It uses the repository layer to interact with the database.
+
+A job is processed in chunks of items, each chunk in its own transaction: the
+entity tags of the chunk and the outcome of its items are committed together,
+so a job interrupted by a restart resumes with its first pending item.
+"""
+
+from datetime import timedelta
+from typing import List, Optional, Sequence
+
+from pydantic import BaseModel
+from sqlalchemy import func
+
+from app.api.v1.bulk_jobs.model import BulkJob, BulkJobItem
+from app.api.v1.bulk_jobs.repository import (
+    AsyncBulkJobRepository,
+    BulkJobRepository,
+)
+from app.api.v1.bulk_jobs.types import (
+    BulkJobItemStatus,
+    BulkJobKind,
+    BulkJobResponse,
+    BulkJobStatus,
+)
+from app.api.v1.entity_tags.repository import EntityTagRepository
+from app.api.v1.entity_tags.service import EntityTagService
+from app.api.v1.entity_tags.types import (
+    EntityTagDeleteRequest,
+    ResetEntityTagsByNameRequest,
+    ResetEntityTagsByNameResponse,
+    ResetMode,
+)
+from app.api.v1.tag_groups.repository import TagGroupRepository
+from app.api.v1.tag_groups.service import TagGroupService
+from app.api.v1.tags.repository import TagRepository
+from app.api.v1.tags.service import TagService
+from app.common.base_entity.async_service import AsyncBaseService
+from app.common.base_entity.model import (
+    BulkResponse,
+    DeleteResponse,
+    ErrorItem,
+    SuccessItem,
+)
+from app.common.base_entity.unit_of_work import UnitOfWork
+from app.common.metrics import count_bulk_items
+from app.common.utils.logging_utils import get_logger
+
+logger = get_logger()
+
+_REQUEST_MODELS = {
+    BulkJobKind.RESET: ResetEntityTagsByNameRequest,
+    BulkJobKind.DELETE: EntityTagDeleteRequest,
+}
+_RESPONSE_MODELS = {
+    BulkJobKind.RESET: ResetEntityTagsByNameResponse,
+    BulkJobKind.DELETE: DeleteResponse,
+}
+
+
+def _succeed(item: BulkJobItem, response: BaseModel) -> None:
+    item.status = BulkJobItemStatus.SUCCEEDED.value
+    item.response = response.model_dump(mode="json")
+
+
+def _fail(item: BulkJobItem, errors: List[str]) -> None:
+    item.status = BulkJobItemStatus.FAILED.value
+    item.errors = errors
+
+
+class BulkJobService:
+    """
+    Business logic of the bulk jobs
+    """
+
+    def __init__(self, repository: BulkJobRepository):
+        self.repository = repository
+
+    def submit(
+        self,
+        kind: BulkJobKind,
+        requests: Sequence[BaseModel],
+        mode: Optional[ResetMode] = None,
+    ) -> BulkJobResponse:
+        job = BulkJob(
+            kind=kind.value,
+            mode=mode.value if mode else None,
+            status=BulkJobStatus.QUEUED.value,
+            total=len(requests),
+            processed=0,
+            failed=0,
+        )
+        with self.repository.unit_of_work():
+            self.repository.create_job(
+                job, [request.model_dump(mode="json") for request in requests]
+            )
+        logger.info(f"Submitted {kind.value} job {job.id} of {len(requests)} items")
+        return self.to_response(job)
+
+    def get_job(
+        self, job_id: int, offset: int, limit: int
+    ) -> Optional[BulkJobResponse]:
+        """The job, and the outcome of its processed items in [offset, offset + limit)"""
+        job = self.repository.get(job_id)
+        if job is None:
+            return None
+        return self.to_response(
+            job, self.repository.processed_items(job_id, offset, limit)
+        )
+
+    @staticmethod
+    def to_response(
+        job: BulkJob, items: Optional[List[BulkJobItem]] = None
+    ) -> BulkJobResponse:
+        kind = BulkJobKind(job.kind)
+        response = BulkJobResponse.model_validate(job, from_attributes=True)
+        if items is None:
+            return response
+
+        request_model, response_model = _REQUEST_MODELS[kind], _RESPONSE_MODELS[kind]
+        response.result = BulkResponse(success=[], errors=[])
+        for item in items:
+            request = request_model.model_validate(item.request)
+            if item.status == BulkJobItemStatus.SUCCEEDED.value:
+                response.result.success.append(
+                    SuccessItem(
+                        req=request, res=response_model.model_validate(item.response)
+                    )
+                )
+            else:
+                response.result.errors.append(
+                    ErrorItem(req=request, errors=item.errors)
+                )
+        return response
+
+    def process_chunk(
+        self, chunk_size: int, max_attempts: int, retry_backoff_seconds: float
+    ) -> bool:
+        """
+        Processes the next chunk of pending items of the oldest unfinished job.
+        Returns False when there is no job to process.
+
+        When the chunk fails as a whole, its changes are rolled back and the job is
+        retried after retry_backoff_seconds, doubled at each attempt, until it fails
+        max_attempts times in a row: the job is then FAILED, and never claimed again.
+        """
+        with self.repository.unit_of_work() as unit_of_work:
+            job = self.repository.claim_job()
+            if job is None:
+                return False
+
+            try:
+                # the job stays locked when the chunk is rolled back
+                with unit_of_work.savepoint():
+                    items = self._process_items(unit_of_work, job, chunk_size)
+            # pylint: disable=broad-except
+            except Exception as e:
+                self._fail_attempt(job, e, max_attempts, retry_backoff_seconds)
+                return True
+
+            failed = sum(
+                item.status == BulkJobItemStatus.FAILED.value for item in items
+            )
+            job.processed += len(items)
+            job.failed += failed
+            job.attempts = 0
+            job.retry_at = None
+            # pylint: disable=not-callable
+            job.updated_at = func.now()
+            if len(items) < chunk_size:
+                job.status = BulkJobStatus.COMPLETED.value
+                job.finished_at = func.now()
+                logger.info(
+                    f"Completed {job.kind} job {job.id}: {job.processed} items, "
+                    f"{job.failed} failed"
+                )
+            else:
+                job.status = BulkJobStatus.RUNNING.value
+        # once committed
+        count_bulk_items(f"bulk_jobs_{job.kind}", len(items) - failed, failed)
+        return True
+
+    def _process_items(
+        self, unit_of_work: UnitOfWork, job: BulkJob, chunk_size: int
+    ) -> List[BulkJobItem]:
+        items = self.repository.pending_items(job.id, chunk_size)
+        if items:
+            logger.debug(f"Processing {len(items)} items of job {job.id}")
+            if job.kind == BulkJobKind.RESET.value:
+                self._reset(unit_of_work, ResetMode(job.mode), items)
+            else:
+                self._delete(unit_of_work, items)
+        return items
+
+    @staticmethod
+    def _fail_attempt(
+        job: BulkJob, error: Exception, max_attempts: int, retry_backoff_seconds: float
+    ) -> None:
+        job.attempts += 1
+        job.last_error = str(error)
+        # pylint: disable=not-callable
+        job.updated_at = func.now()
+        if job.attempts >= max_attempts:
+            job.status = BulkJobStatus.FAILED.value
+            job.finished_at = func.now()
+            logger.error(
+                f"Failed {job.kind} job {job.id} after {job.attempts} attempts "
+                f"- {error}"
+            )
+            return
+        backoff_seconds = retry_backoff_seconds * 2 ** (job.attempts - 1)
+        job.retry_at = func.now() + timedelta(seconds=backoff_seconds)
+        logger.warning(
+            f"Attempt {job.attempts} of {job.kind} job {job.id} failed, retrying in "
+            f"{backoff_seconds}s - {error}"
+        )
+
+    def _entity_tag_service(self) -> EntityTagService:
+        return EntityTagService(EntityTagRepository(self.repository.db))
+
+    def _reset(
+        self, unit_of_work: UnitOfWork, mode: ResetMode, items: List[BulkJobItem]
+    ) -> None:
+        """Resets the entities of the items at once, one by one when that fails"""
+        db = self.repository.db
+        entity_tag_service = self._entity_tag_service()
+        tag_service = TagService(TagRepository(db))
+        tag_group_service = TagGroupService(TagGroupRepository(db))
+        requests = [
+            ResetEntityTagsByNameRequest.model_validate(item.request) for item in items
+        ]
+        try:
+            with unit_of_work.savepoint():
+                responses = entity_tag_service.reset_entity_tags_by_name_bulk(
+                    requests, tag_service, tag_group_service, mode
+                )
+            for item, response in zip(items, responses):
+                _succeed(item, response)
+            return
+        # pylint: disable=broad-except
+        except Exception as e:
+            logger.warning(f"Bulk reset failed, falling back to per entity reset - {e}")
+
+        for item, request in zip(items, requests):
+            try:
+                with unit_of_work.savepoint():
+                    if mode == ResetMode.DIFF:
+                        [response] = entity_tag_service.reset_entity_tags_by_name_bulk(
+                            [request], tag_service, tag_group_service, mode
+                        )
+                    else:
+                        response = entity_tag_service.reset_entity_tags_by_name(
+                            request, tag_service, tag_group_service
+                        )
+                _succeed(item, response)
+            # pylint: disable=broad-except
+            except Exception as e:
+                _fail(item, [str(e)])
+
+    def _delete(self, unit_of_work: UnitOfWork, items: List[BulkJobItem]) -> None:
+        """Deletes the entity tags of each item in a savepoint"""
+        entity_tag_service = self._entity_tag_service()
+        for item in items:
+            try:
+                with unit_of_work.savepoint():
+                    deleted_count = entity_tag_service.delete(
+                        EntityTagDeleteRequest.model_validate(item.request)
+                    )
+                if deleted_count == 0:
+                    _fail(item, ["No Tags found for entity"])
+                else:
+                    _succeed(item, DeleteResponse(count=deleted_count))
+            # pylint: disable=broad-except
+            except Exception as e:
+                _fail(item, [str(e)])
+
+
+class AsyncBulkJobService(AsyncBaseService[BulkJobService]):
+    """
+    asyncio variant of BulkJobService
+    """
+
+    def __init__(self, repository: AsyncBulkJobRepository):
+        super().__init__(repository, lambda db: BulkJobService(BulkJobRepository(db)))
+
+    async def submit(
+        self,
+        kind: BulkJobKind,
+        requests: Sequence[BaseModel],
+        mode: Optional[ResetMode] = None,
+    ) -> BulkJobResponse:
+        return await self.run_sync(BulkJobService.submit, kind, requests, mode)
+
+    async def get_job(
+        self, job_id: int, offset: int, limit: int
+    ) -> Optional[BulkJobResponse]:
+        return await self.run_sync(BulkJobService.get_job, job_id, offset, limit)
+
+    async def process_chunk(
+        self, chunk_size: int, max_attempts: int, retry_backoff_seconds: float
+    ) -> bool:
+        return await self.run_sync(
+            BulkJobService.process_chunk,
+            chunk_size,
+            max_attempts,
+            retry_backoff_seconds,
+        )
@@ -0,0 +1,59 @@
+"""
+This file contains the pydantic models of the bulk jobs API
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Optional, Union
+
+from pydantic import BaseModel
+
+from app.api.v1.entity_tags.types import (
+    EntityTagDeleteRequest,
+    ResetEntityTagsByNameRequest,
+    ResetEntityTagsByNameResponse,
+    ResetMode,
+)
+from app.common.base_entity.model import BulkResponse, DeleteResponse
+
+
+class BulkJobKind(str, Enum):
+    RESET = "reset"
+    DELETE = "delete"
+
+
+class BulkJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    # a chunk of the job failed BULK_JOB_MAX_ATTEMPTS times
+    FAILED = "failed"
+
+
+class BulkJobItemStatus(str, Enum):
+    PENDING = "pending"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+BulkJobRequest = Union[ResetEntityTagsByNameRequest, EntityTagDeleteRequest]
+BulkJobResult = Union[ResetEntityTagsByNameResponse, DeleteResponse]
+
+
+class BulkJobResponse(BaseModel):
+    """The status of a bulk job, and the outcome of (a page of) its items"""
+
+    id: int
+    kind: BulkJobKind
+    mode: Optional[ResetMode] = None
+    status: BulkJobStatus
+    total: int
+    processed: int
+    failed: int
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    # the processed items, in the requested range of positions
+    result: Optional[BulkResponse[BulkJobRequest, BulkJobResult]] = None
@@ -0,0 +1,121 @@
+"""
+Background processing of the bulk jobs.
+
+BULK_JOB_WORKERS workers process the pending items of the jobs, in chunks of
+BULK_JOB_CHUNK_SIZE items, each chunk in its own transaction. A worker locks the
+job it processes (SKIP LOCKED), so the other workers (of this or of another
+instance of the service) move on to the next job, and the items of a job are
+processed in order. The workers are woken up when a job is submitted, and look
+for unfinished jobs every BULK_JOB_POLL_INTERVAL_SECONDS, so the jobs submitted
+to another instance, or interrupted by a restart, are processed too.
+
+A chunk that fails as a whole is rolled back and retried after
+BULK_JOB_RETRY_BACKOFF_SECONDS, doubled at each attempt, the later jobs being
+processed meanwhile. After BULK_JOB_MAX_ATTEMPTS failed attempts in a row, the
+job is FAILED with the last error.
+"""
+
+import asyncio
+from typing import List
+
+from app.api.v1.bulk_jobs.repository import AsyncBulkJobRepository
+from app.api.v1.bulk_jobs.service import AsyncBulkJobService
+from app.common.config import settings
+from app.common.constants import (
+    DEFAULT_BULK_JOB_CHUNK_SIZE,
+    DEFAULT_BULK_JOB_MAX_ATTEMPTS,
+    DEFAULT_BULK_JOB_POLL_INTERVAL_SECONDS,
+    DEFAULT_BULK_JOB_RETRY_BACKOFF_SECONDS,
+    DEFAULT_BULK_JOB_WORKERS,
+)
+from app.common.database import AsyncSessionLocal, get_async_engine
+from app.common.utils.logging_utils import get_logger
+
+logger = get_logger()
+
+
+class BulkJobWorker:
+    """Processes the bulk jobs in the background, until stop()"""
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        workers: int,
+        chunk_size: int,
+        poll_interval_seconds: float,
+        max_attempts: int,
+        retry_backoff_seconds: float,
+    ):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wake_up = asyncio.Event()
+
+    def start(self) -> None:
+        self._wake_up = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._work(worker)) for worker in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} bulk job workers")
+
+    def notify(self) -> None:
+        """Wakes up the workers, a job was submitted"""
+        self._wake_up.set()
+
+    async def process_chunk(self) -> bool:
+        """Processes a chunk of the oldest unfinished job, False when there is none"""
+        async with AsyncSessionLocal(bind=get_async_engine()) as db:
+            service = AsyncBulkJobService(AsyncBulkJobRepository(db))
+            return await service.process_chunk(
+                self.chunk_size, self.max_attempts, self.retry_backoff_seconds
+            )
+
+    async def _work(self, worker: int) -> None:
+        while True:
+            # cleared before looking for jobs, a job submitted meanwhile is not missed
+            self._wake_up.clear()
+            try:
+                while await self.process_chunk():
+                    pass
+            # pylint: disable=broad-except
+            except Exception as e:
+                logger.error(f"Bulk job worker {worker} failed - {e}")
+            try:
+                await asyncio.wait_for(
+                    self._wake_up.wait(), timeout=self.poll_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        """Cancels the workers, the chunks they process are rolled back"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+
+bulk_job_worker = BulkJobWorker(
+    workers=int(settings.get("BULK_JOB_WORKERS", DEFAULT_BULK_JOB_WORKERS)),
+    chunk_size=int(settings.get("BULK_JOB_CHUNK_SIZE", DEFAULT_BULK_JOB_CHUNK_SIZE)),
+    poll_interval_seconds=float(
+        settings.get(
+            "BULK_JOB_POLL_INTERVAL_SECONDS", DEFAULT_BULK_JOB_POLL_INTERVAL_SECONDS
+        )
+    ),
+    max_attempts=int(
+        settings.get("BULK_JOB_MAX_ATTEMPTS", DEFAULT_BULK_JOB_MAX_ATTEMPTS)
+    ),
+    retry_backoff_seconds=float(
+        settings.get(
+            "BULK_JOB_RETRY_BACKOFF_SECONDS", DEFAULT_BULK_JOB_RETRY_BACKOFF_SECONDS
+        )
+    ),
+)
@@ -6,16 +6,22 @@ It uses the service layer to perform the business logic.
 
 from typing import List
 from readyapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
-from app.api.v1.entity_tags.repository import EntityTagRepository
-from app.api.v1.entity_tags.service import EntityTagService
-from app.api.v1.tag_groups.controller import get_tag_group_service
-from app.api.v1.tag_groups.service import TagGroupService
-from app.api.v1.tags.controller import get_tag_service
-from app.api.v1.tags.service import TagService
+from app.api.v1.entity_tags.repository import (
+    AsyncEntityTagRepository,
+    EntityTagRepository,
+)
+from app.api.v1.entity_tags.reset_workers import reset_workers
+from app.api.v1.entity_tags.service import (
+    AsyncEntityTagService,
+    EntityTagExistsError,
+    EntityTagService,
+)
 from app.common.base_entity.model import (
+    AdvancedSearchExplainResponse,
     AdvancedSearchRequest,
     AdvancedSearchResponse,
     DeleteResponse,
@@ -23,7 +29,8 @@ from app.common.base_entity.model import (
     ErrorItem,
     SuccessItem,
 )
-from app.common.database import get_db
+from app.common.database import get_async_db, get_async_read_db, get_db
+from app.common.metrics import count_bulk_items, observe_bulk_request
 from app.api.v1.entity_tags.types import (
     EntityTagResponse,
     EntityTagCreateRequest,
@@ -31,6 +38,7 @@ from app.api.v1.entity_tags.types import (
     EntityTagDeleteRequest,
     ResetEntityTagsByNameResponse,
     ResetEntityTagsByNameRequest,
+    ResetMode,
 )
 
 from app.common.utils.logging_utils import get_logger
@@ -45,35 +53,47 @@ def get_entity_tag_service(db: Session = Depends(get_db)) -> EntityTagService:
     return EntityTagService(repository)
 
 
-def convert_advanced_search_response(
+async def get_async_entity_tag_service(
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncEntityTagService:
+    repository = AsyncEntityTagRepository(db)
+    return AsyncEntityTagService(repository)
+
+
+async def get_async_read_entity_tag_service(
+    db: AsyncSession = Depends(get_async_read_db),
+) -> AsyncEntityTagService:
+    """AsyncEntityTagService of read only requests, served by the read replicas"""
+    repository = AsyncEntityTagRepository(db)
+    return AsyncEntityTagService(repository)
+
+
+async def convert_advanced_search_response(
     response: AdvancedSearchResponse[EntityTag],
-    tag_service=Depends(get_tag_service),
-    tag_group_service=Depends(get_tag_group_service),
+    entity_tag_service: AsyncEntityTagService,
 ) -> AdvancedSearchResponse[EntityTagResponse]:
-    entity_tag_responses = [
-        EntityTagResponse.from_entity_tag(entity_tag, tag_service, tag_group_service)
-        for entity_tag in response.results
-    ]
+    entity_tag_responses = await entity_tag_service.to_responses(response.results)
     return AdvancedSearchResponse[EntityTagResponse](
         results=entity_tag_responses,
         count=response.count,
         offset=response.offset,
         count_total=response.count_total,
+        has_more=response.has_more,
+        next_cursor=response.next_cursor,
     )
 
 
 @router.post("/entity_tags", response_model=EntityTagResponse)
-def create_entity_tag(
+async def create_entity_tag(
     create_request: EntityTagCreateRequest,
-    tag_service: TagService = Depends(get_tag_service),
-    tag_group_service: TagGroupService = Depends(get_tag_group_service),
-    entity_tag_service: EntityTagService = Depends(get_entity_tag_service),
+    entity_tag_service: AsyncEntityTagService = Depends(get_async_entity_tag_service),
 ):
     try:
-        created: EntityTag = entity_tag_service.create(create_request)
-        return EntityTagResponse.from_entity_tag(
-            created, tag_service, tag_group_service
-        )
+        created: EntityTag = await entity_tag_service.create(create_request)
+        [response] = await entity_tag_service.to_responses([created])
+        return response
+    except EntityTagExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
     # todo: remove error handling when global error is working
@@ -83,29 +103,48 @@ def create_entity_tag(
     "/entity_tags/advanced_search",
     response_model=AdvancedSearchResponse[EntityTagResponse],
 )
-def advanced_search(
+async def advanced_search(
     search_request: AdvancedSearchRequest,
-    tag_service: TagService = Depends(get_tag_service),
-    tag_group_service: TagGroupService = Depends(get_tag_group_service),
-    entity_tag_service: EntityTagService = Depends(get_entity_tag_service),
+    entity_tag_service: AsyncEntityTagService = Depends(
+        get_async_read_entity_tag_service
+    ),
 ):
     try:
-        advanced_search_response = entity_tag_service.advanced_search(search_request)
-        converted = convert_advanced_search_response(
-            advanced_search_response, tag_service, tag_group_service
+        advanced_search_response = await entity_tag_service.advanced_search(
+            search_request
+        )
+        converted = await convert_advanced_search_response(
+            advanced_search_response, entity_tag_service
         )
         return converted
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
+@router.post(
+    "/entity_tags/advanced_search/explain",
+    response_model=AdvancedSearchExplainResponse,
+)
+async def explain_advanced_search(
+    search_request: AdvancedSearchRequest,
+    entity_tag_service: AsyncEntityTagService = Depends(
+        get_async_read_entity_tag_service
+    ),
+):
+    """The SQL and the plan of the advanced search, which is not run"""
+    try:
+        return await entity_tag_service.explain_search(search_request)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
 @router.post("/entity_tags/delete", response_model=DeleteResponse)
-def delete(
+async def delete(
     delete_request: EntityTagDeleteRequest,
-    entity_tag_service: EntityTagService = Depends(get_entity_tag_service),
+    entity_tag_service: AsyncEntityTagService = Depends(get_async_entity_tag_service),
 ):
     try:
-        deleted_count = entity_tag_service.delete(delete_request)
+        deleted_count = await entity_tag_service.delete(delete_request)
 
         if deleted_count == 0:
             raise HTTPException(status_code=404, detail="No Tags found for entity")
@@ -120,33 +159,47 @@ def delete(
     "/entity_tags/delete/bulk",
     response_model=BulkResponse[EntityTagDeleteRequest, DeleteResponse],
 )
-def delete_bulk(
+async def delete_bulk(
     delete_requests: List[EntityTagDeleteRequest],
     response: Response,
-    entity_tag_service: EntityTagService = Depends(get_entity_tag_service),
+    entity_tag_service: AsyncEntityTagService = Depends(get_async_entity_tag_service),
 ):
+    observe_bulk_request("entity_tags_delete_bulk", len(delete_requests))
     bulk_response = BulkResponse(
         success=[],
         errors=[],
     )
 
-    for delete_request in delete_requests:
-        try:
-            deleted_count = entity_tag_service.delete(delete_request)
+    # a single commit for the whole batch, a failing delete only rolls back itself
+    async with entity_tag_service.unit_of_work() as unit_of_work:
+        for delete_request in delete_requests:
+            try:
+                async with unit_of_work.savepoint():
+                    deleted_count = await entity_tag_service.delete(delete_request)
 
-            if deleted_count == 0:
-                bulk_response.errors.append(
-                    ErrorItem(req=delete_request, errors=["No Tags found for entity"])
-                )
-            else:
-                bulk_response.success.append(
-                    SuccessItem(
-                        req=delete_request, res=DeleteResponse(count=deleted_count)
+                if deleted_count == 0:
+                    bulk_response.errors.append(
+                        ErrorItem(
+                            req=delete_request, errors=["No Tags found for entity"]
+                        )
                     )
+                else:
+                    bulk_response.success.append(
+                        SuccessItem(
+                            req=delete_request, res=DeleteResponse(count=deleted_count)
+                        )
+                    )
+            # pylint: disable=broad-except
+            except Exception as e:
+                bulk_response.errors.append(
+                    ErrorItem(req=delete_request, errors=[str(e)])
                 )
-        # pylint: disable=broad-except
-        except Exception as e:
-            bulk_response.errors.append(ErrorItem(req=delete_request, errors=[str(e)]))
+
+    count_bulk_items(
+        "entity_tags_delete_bulk",
+        len(bulk_response.success),
+        len(bulk_response.errors),
+    )
 
     if bulk_response.success and not bulk_response.errors:
         response.status_code = status.HTTP_200_OK
@@ -159,25 +212,52 @@ def delete_bulk(
 
 
 @router.post("/entity_tags/reset", response_model=List[ResetEntityTagsByNameResponse])
-def reset(
+async def reset(
     reset_requests: list[ResetEntityTagsByNameRequest],
-    entity_tag_service: EntityTagService = Depends(get_entity_tag_service),
-    tag_service: TagService = Depends(get_tag_service),
-    tag_group_service: TagGroupService = Depends(get_tag_group_service),
+    mode: ResetMode = ResetMode.REPLACE,
+    entity_tag_service: AsyncEntityTagService = Depends(get_async_entity_tag_service),
 ):
-    results = []
-    for reset_request in reset_requests:
-        try:
-            reset_entity_response = entity_tag_service.reset_entity_tags_by_name(
-                reset_request, tag_service, tag_group_service
-            )
-
-            results.append(reset_entity_response)
-        # pylint: disable=broad-except
-        except Exception as e:
-            logger.debug(
-                f"Error resetting tags by name for entity {reset_request.entity_id} \
-                - {e}"
-            )
-
-    return results
+    observe_bulk_request("entity_tags_reset", len(reset_requests))
+    responses = await reset_workers.reset(reset_requests, mode)
+    failed = [index for index, response in enumerate(responses) if response is None]
+    if not failed:
+        count_bulk_items("entity_tags_reset", len(responses), 0)
+        return responses
+    logger.warning(
+        f"Bulk reset of {len(failed)} entities failed, "
+        f"falling back to per entity reset"
+    )
+
+    # each entity is reset in a savepoint, all of them are committed at once
+    async with entity_tag_service.unit_of_work() as unit_of_work:
+        await entity_tag_service.lock_entities(
+            reset_requests[index].entity_id for index in failed
+        )
+        for index in failed:
+            reset_request = reset_requests[index]
+            try:
+                async with unit_of_work.savepoint():
+                    if mode == ResetMode.DIFF:
+                        [responses[index]] = (
+                            await entity_tag_service.reset_entity_tags_by_name_bulk(
+                                [reset_request], mode
+                            )
+                        )
+                    else:
+                        responses[index] = (
+                            await entity_tag_service.reset_entity_tags_by_name(
+                                reset_request
+                            )
+                        )
+            # pylint: disable=broad-except
+            except Exception as e:
+                logger.debug(
+                    f"Error resetting tags by name for entity "
+                    f"{reset_request.entity_id} - {e}"
+                )
+
+    responses = [response for response in responses if response is not None]
+    count_bulk_items(
+        "entity_tags_reset", len(responses), len(reset_requests) - len(responses)
+    )
+    return responses
@@ -1,29 +1,87 @@
 """
 This module contains the ORM model for EntityTag entity
+
+entity_tags stores integer keys only: the (long) entity ids are stored once in
+the entities table, and the entity types once in the entity_types table.
+entity_tags is partitioned by list on entity_type_id, see partitions.py.
 """
 
 from sqlalchemy import (
+    BigInteger,
     Column,
     Integer,
+    SmallInteger,
     String,
     ForeignKey,
+    Index,
     PrimaryKeyConstraint,
+    select,
 )
+from sqlalchemy.orm import column_property
 
 
 from app.common.database import Base
 
 
+class Entity(Base):
+    """An entity id, stored once and referenced by its integer key"""
+
+    __tablename__ = "entities"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    entity_id = Column(String, nullable=False, unique=True)
+
+
+class EntityType(Base):
+    """Lookup of the entity types"""
+
+    __tablename__ = "entity_types"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False, unique=True)
+
+
 class EntityTag(Base):
     """Describes the structure of the EntityTag entity in the database"""
 
     __tablename__ = "entity_tags"
 
-    entity_id = Column(String, nullable=False)
-    entity_type = Column(String, nullable=False)
+    entity_key = Column(
+        BigInteger, ForeignKey("entities.id", ondelete="RESTRICT"), nullable=False
+    )
+    entity_type_id = Column(
+        SmallInteger, ForeignKey("entity_types.id", ondelete="RESTRICT"), nullable=False
+    )
     tag_id = Column(Integer, ForeignKey("tags.id", ondelete="RESTRICT"), nullable=False)
     # create_date = Column(DateTime, nullable=False, default=func.now())
 
+    # the decoded entity id and type, read only. Deferred: loaded on first access
+    # (or again once expired) with a primary key lookup, the searches undefer
+    # them. The lookups never correlate the dictionary tables, which the searches
+    # join to filter and sort on them
+    entity_id = column_property(
+        select(Entity.entity_id)
+        .where(Entity.id == entity_key)
+        .correlate_except(Entity)
+        .scalar_subquery(),
+        deferred=True,
+    )
+    entity_type = column_property(
+        select(EntityType.name)
+        .where(EntityType.id == entity_type_id)
+        .correlate_except(EntityType)
+        .scalar_subquery(),
+        deferred=True,
+    )
+
     __table_args__ = (
-        PrimaryKeyConstraint("entity_id", "tag_id", name="pk_entity_tags"),
+        # a partitioned table's primary key includes the partition key
+        PrimaryKeyConstraint(
+            "entity_key", "tag_id", "entity_type_id", name="pk_entity_tags"
+        ),
+        Index("ix_entity_tags_tag_id", "tag_id"),
+        Index(
+            "ix_entity_tags_entity_type_id_entity_key", "entity_type_id", "entity_key"
+        ),
+        {"postgresql_partition_by": "LIST (entity_type_id)"},
     )
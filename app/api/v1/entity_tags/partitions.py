@@ -0,0 +1,168 @@
+"""
+Partitions of entity_tags.
+
+entity_tags is partitioned by list on entity_type_id. The entity types without a
+partition of their own are stored in the default partition, entity_tags_default.
+A (large) entity type with its own partition keeps its writes, its bloat and its
+vacuums away from the other types, and the queries filtering on its type skip
+the other partitions.
+
+    python -m app.api.v1.entity_tags.partitions [entity_type ...]
+
+creates the partitions of the given entity types, and lists the partitions.
+Creating the partition of a type moves its rows out of the default partition,
+and blocks the writes to the default partition meanwhile: give a type its own
+partition before it grows large. The attach itself also blocks the reads of
+the default partition, until the end of the transaction.
+"""
+
+import sys
+from typing import List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Connection, text
+
+from app.common.database import get_engine
+from app.common.utils.logging_utils import get_logger
+
+logger = get_logger()
+
+DEFAULT_PARTITION = "entity_tags_default"
+
+_COLUMNS = "entity_key, tag_id, entity_type_id"
+
+_PARTITIONS_QUERY = text(
+    """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT', t.name,
+           greatest(c.reltuples, 0)::bigint
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    LEFT JOIN entity_types t ON c.relname = 'entity_tags_type_' || t.id
+    WHERE i.inhparent = 'entity_tags'::regclass
+    ORDER BY c.relname
+    """
+)
+
+
+class EntityTagsPartition(BaseModel):
+    partition: str
+    default: bool
+    # None for the default partition
+    entity_type: Optional[str]
+    # estimated, as of the last analyze
+    rows: int
+
+
+def partition_name(entity_type_id: int) -> str:
+    return f"entity_tags_type_{entity_type_id}"
+
+
+def entity_tags_partitions(connection: Connection) -> List[EntityTagsPartition]:
+    return [
+        EntityTagsPartition(
+            partition=partition, default=default, entity_type=entity_type, rows=rows
+        )
+        for partition, default, entity_type, rows in connection.execute(
+            _PARTITIONS_QUERY
+        )
+    ]
+
+
+def create_entity_type_partition(connection: Connection, entity_type: str) -> int:
+    """
+    Creates the partition of an entity type, in a single transaction, and moves
+    the rows of the type from the default partition to it.
+    Returns the number of rows moved, 0 when the partition exists already.
+    """
+    with connection.begin():
+        connection.execute(
+            text(
+                "INSERT INTO entity_types (name) VALUES (:name) "
+                "ON CONFLICT (name) DO NOTHING"
+            ),
+            {"name": entity_type},
+        )
+        entity_type_id = connection.execute(
+            text("SELECT id FROM entity_types WHERE name = :name"),
+            {"name": entity_type},
+        ).scalar_one()
+        partition = partition_name(entity_type_id)
+        if connection.execute(
+            text("SELECT to_regclass(:partition)"), {"partition": partition}
+        ).scalar():
+            return 0
+
+        # the rows of the type must not be written to the default partition until
+        # the partition is attached. The reads go on until the attach
+        connection.execute(
+            text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE")
+        )
+        connection.execute(
+            text(f"CREATE TABLE {partition} (LIKE entity_tags INCLUDING DEFAULTS)")
+        )
+        moved = connection.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                f"WHERE entity_type_id = :entity_type_id RETURNING {_COLUMNS}) "
+                f"INSERT INTO {partition} ({_COLUMNS}) SELECT {_COLUMNS} FROM moved"
+            ),
+            {"entity_type_id": entity_type_id},
+        ).rowcount
+        # spare the attach a scan of the partition, and of the default partition:
+        # the attach takes an ACCESS EXCLUSIVE lock on the default partition, and
+        # would scan it for rows of the type under that lock. The default
+        # partition is validated beforehand, under the lock that lets reads go on
+        connection.execute(
+            text(
+                f"ALTER TABLE {partition} ADD CONSTRAINT {partition}_check "
+                f"CHECK (entity_type_id = {int(entity_type_id)})"
+            )
+        )
+        default_check = f"{DEFAULT_PARTITION}_not_{int(entity_type_id)}"
+        connection.execute(
+            text(
+                f"ALTER TABLE {DEFAULT_PARTITION} ADD CONSTRAINT {default_check} "
+                f"CHECK (entity_type_id <> {int(entity_type_id)}) NOT VALID"
+            )
+        )
+        connection.execute(
+            text(f"ALTER TABLE {DEFAULT_PARTITION} VALIDATE CONSTRAINT {default_check}")
+        )
+        connection.execute(
+            text(
+                f"ALTER TABLE entity_tags ATTACH PARTITION {partition} "
+                f"FOR VALUES IN ({int(entity_type_id)})"
+            )
+        )
+        # implied by the partition bounds from now on
+        connection.execute(
+            text(f"ALTER TABLE {partition} DROP CONSTRAINT {partition}_check")
+        )
+        connection.execute(
+            text(f"ALTER TABLE {DEFAULT_PARTITION} DROP CONSTRAINT {default_check}")
+        )
+
+    # out of the transaction, which released the lock of the default partition
+    with connection.begin():
+        connection.execute(text(f"ANALYZE {partition}"))
+
+    logger.info(
+        f"Created the partition {partition} of the entity type {entity_type}, "
+        f"moved {moved} entity tags to it"
+    )
+    return moved
+
+
+def main(entity_types: List[str]) -> None:
+    with get_engine().connect() as connection:
+        for entity_type in entity_types:
+            create_entity_type_partition(connection, entity_type)
+        partitions = entity_tags_partitions(connection)
+
+    for partition in partitions:
+        entity_type = "default" if partition.default else partition.entity_type
+        print(f"{partition.partition} ({entity_type}): ~{partition.rows} rows")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -3,32 +3,285 @@ This module contains the repository layer (database operations)
 for the EntityTags entity.
 """
 
-from sqlalchemy.orm import Session
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from app.api.v1.entity_tags.model import EntityTag
+from sqlalchemy import (
+    Integer,
+    Select,
+    TextClause,
+    bindparam,
+    delete,
+    exists,
+    insert,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.api.v1.entity_tags.model import Entity, EntityTag, EntityType
+from app.common.base_entity.async_repository import AsyncBaseRepository
+from app.common.base_entity.model import Filter, FilterType
 from app.common.base_entity.repository import BaseRepository
+from app.common.base_entity.statements import BaseStatements
+
+# the decoded fields of EntityTag, and the columns they are decoded from
+_DECODED_COLUMNS = {"entity_id": Entity.entity_id, "entity_type": EntityType.name}
+
+# first key of the entities advisory locks, the second one is entity_lock_key
+_ENTITY_LOCK_NAMESPACE = 0x656E7479
 
 
-class EntityTagRepository(BaseRepository[EntityTag]):
+def entity_lock_key(entity_id: str) -> int:
+    """The advisory lock key of an entity id, a stable 32 bits hash"""
+    digest = hashlib.blake2b(entity_id.encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class EntityTagStatements(BaseStatements[EntityTag]):
     """
-    Provides methods to perform CRUD operations
+    The entity tags are read joined with their entity and entity type, so the
+    searches filter and sort on the indexed entities.entity_id column.
+    The filters on the entity type filter on the partition key, entity_type_id.
+    """
+
+    def _select(self) -> Select:
+        return (
+            select(EntityTag)
+            .join(Entity, Entity.id == EntityTag.entity_key)
+            .join(EntityType, EntityType.id == EntityTag.entity_type_id)
+            .options(undefer(EntityTag.entity_id), undefer(EntityTag.entity_type))
+        )
+
+    def _column(self, field: str):
+        if field in _DECODED_COLUMNS:
+            return _DECODED_COLUMNS[field]
+        return super()._column(field)
+
+    @staticmethod
+    def _lock_entities_statement(entity_ids: Iterable[str]) -> Optional[TextClause]:
+        """
+        Takes the advisory locks of the entities until the end of the transaction.
+        The locks are taken in the order of their keys, so two transactions
+        locking some of the same entities never wait for each other in a cycle.
+        """
+        keys = sorted({entity_lock_key(entity_id) for entity_id in entity_ids})
+        if not keys:
+            return None
+        return text(
+            "SELECT pg_advisory_xact_lock(:namespace, key) FROM unnest(:keys) AS key"
+        ).bindparams(
+            bindparam("namespace", _ENTITY_LOCK_NAMESPACE),
+            bindparam("keys", keys, type_=ARRAY(Integer)),
+        )
+
+    def _filter_clause(self, f: Filter):
+        if f.field != "entity_type" or f.filter_type != FilterType.EQUALS:
+            return super()._filter_clause(f)
+        # a scalar subquery per type runs before the scan of entity_tags, so
+        # Postgres skips the partitions of the other types when it executes
+        return or_(
+            *(
+                EntityTag.entity_type_id
+                == select(EntityType.id)
+                .where(EntityType.name == value.lower())
+                .scalar_subquery()
+                for value in f.values
+            )
+        )
+
+
+class EntityTagRepository(EntityTagStatements, BaseRepository[EntityTag]):
+    """
+    Provides methods to perform CRUD operations.
+    Entity ids and types are encoded to their keys here, the missing ones are
+    created on write.
     """
 
     def __init__(self, db: Session):
         super().__init__(db, EntityTag)
+        self.entities = BaseRepository(db, Entity)
+        self.entity_types = BaseRepository(db, EntityType)
+
+    def entity_keys(self, entity_ids: Iterable[str]) -> Dict[str, int]:
+        """The keys of the entity ids, the missing entities are created"""
+        rows = [{"entity_id": entity_id} for entity_id in set(entity_ids)]
+        if not rows:
+            return {}
+        return {
+            entity.entity_id: entity.id
+            for entity in self.entities.find_or_create_many("entity_id", rows)
+        }
+
+    def entity_type_ids(self, entity_types: Iterable[str]) -> Dict[str, int]:
+        """The ids of the entity types, the missing types are created"""
+        rows = [{"name": entity_type} for entity_type in set(entity_types)]
+        if not rows:
+            return {}
+        return {
+            entity_type.name: entity_type.id
+            for entity_type in self.entity_types.find_or_create_many("name", rows)
+        }
+
+    def lock_entities(self, entity_ids: Iterable[str]) -> None:
+        """Serializes the transactions writing the tags of the same entities"""
+        statement = self._lock_entities_statement(entity_ids)
+        if statement is not None:
+            self.db.execute(statement)
+
+    @staticmethod
+    def _keys_of(entity_ids: Iterable[str]) -> Select:
+        return select(Entity.id).where(Entity.entity_id.in_(list(entity_ids)))
+
+    def entity_tag_exists(self, entity_id: str, tag_id: int) -> bool:
+        """Whether the tag is assigned to the entity, with any entity type"""
+        return self.db.scalar(
+            select(
+                exists().where(
+                    self.model.entity_key.in_(self._keys_of([entity_id])),
+                    self.model.tag_id == tag_id,
+                )
+            )
+        )
+
+    def create_entity_tag(
+        self, entity_id: str, entity_type: str, tag_id: int
+    ) -> EntityTag:
+        entity_tag = EntityTag(
+            entity_key=self.entity_keys([entity_id])[entity_id],
+            entity_type_id=self.entity_type_ids([entity_type])[entity_type],
+            tag_id=tag_id,
+        )
+        self.create(entity_tag)
+        # the decoded fields are known, there is no need to read them back
+        set_committed_value(entity_tag, "entity_id", entity_id)
+        set_committed_value(entity_tag, "entity_type", entity_type)
+        return entity_tag
 
     def clear_entity_tags(self, entity_id: str) -> int:
-        rows_deleted = (
-            self.db.query(self.model).filter(self.model.entity_id == entity_id).delete()
+        return (
+            self.db.query(self.model)
+            .filter(self.model.entity_key.in_(self._keys_of([entity_id])))
+            .delete()
         )
-        self.db.commit()
-        return rows_deleted
 
     def delete_entity_tag(self, entity_id: str, tag_id: int) -> int:
-        rows_deleted = (
+        return (
             self.db.query(self.model)
-            .filter(self.model.entity_id == entity_id, self.model.tag_id == tag_id)
+            .filter(
+                self.model.entity_key.in_(self._keys_of([entity_id])),
+                self.model.tag_id == tag_id,
+            )
             .delete()
         )
-        self.db.commit()
-        return rows_deleted
+
+    def clear_entities_tags(self, entity_ids: List[str]) -> int:
+        """Deletes the tags of all the given entities"""
+        if not entity_ids:
+            return 0
+        result = self.db.execute(
+            delete(self.model)
+            .where(self.model.entity_key.in_(self._keys_of(entity_ids)))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def insert_entity_tags(self, rows: List[dict]) -> int:
+        """
+        Inserts all the rows (entity_id, entity_type, tag_id) with multi-row
+        INSERT statements
+        """
+        if not rows:
+            return 0
+        entity_keys = self.entity_keys(row["entity_id"] for row in rows)
+        entity_type_ids = self.entity_type_ids(row["entity_type"] for row in rows)
+        self.db.execute(
+            insert(self.model),
+            [
+                {
+                    "entity_key": entity_keys[row["entity_id"]],
+                    "entity_type_id": entity_type_ids[row["entity_type"]],
+                    "tag_id": row["tag_id"],
+                }
+                for row in rows
+            ],
+        )
+        return len(rows)
+
+    def delete_entity_tags(self, entity_tag_ids: List[Tuple[str, int, str]]) -> int:
+        """
+        Deletes the given (entity_id, tag_id, entity_type) rows, from the
+        partitions of their entity types only
+        """
+        if not entity_tag_ids:
+            return 0
+        entity_keys = {
+            entity.entity_id: entity.id
+            for entity in self.entities.find_by_field_values(
+                "entity_id", {entity_id for entity_id, _, _ in entity_tag_ids}
+            )
+        }
+        entity_type_ids = self.entity_type_ids(
+            entity_type for _, _, entity_type in entity_tag_ids
+        )
+        keys = [
+            (entity_keys[entity_id], tag_id, entity_type_ids[entity_type])
+            for entity_id, tag_id, entity_type in entity_tag_ids
+            if entity_id in entity_keys
+        ]
+        if not keys:
+            return 0
+        result = self.db.execute(
+            delete(self.model)
+            .where(
+                tuple_(
+                    self.model.entity_key,
+                    self.model.tag_id,
+                    self.model.entity_type_id,
+                ).in_(keys)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def update_entity_type(
+        self, entity_ids: List[str], entity_type: str, from_entity_types: Iterable[str]
+    ) -> int:
+        """
+        Sets the entity type of all the tags of the given entities, which moves
+        them from the partitions of their previous types (from_entity_types)
+        """
+        if not entity_ids:
+            return 0
+        entity_type_ids = self.entity_type_ids([entity_type, *from_entity_types])
+        entity_type_id = entity_type_ids.pop(entity_type)
+        result = self.db.execute(
+            update(self.model)
+            .where(
+                self.model.entity_key.in_(self._keys_of(entity_ids)),
+                self.model.entity_type_id.in_(list(entity_type_ids.values())),
+            )
+            .values(entity_type_id=entity_type_id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+class AsyncEntityTagRepository(EntityTagStatements, AsyncBaseRepository[EntityTag]):
+    """
+    asyncio variant of EntityTagRepository
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, EntityTag)
+
+    async def lock_entities(self, entity_ids: Iterable[str]) -> None:
+        statement = self._lock_entities_statement(entity_ids)
+        if statement is not None:
+            await self.db.execute(statement)
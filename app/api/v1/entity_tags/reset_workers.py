@@ -0,0 +1,143 @@
+"""
+Parallel resets: the entities of a reset are split in shards of RESET_SHARD_SIZE
+entities, and up to RESET_WORKERS shards are reset concurrently, each in its own
+session and transaction. The requests of an entity all go to the same shard.
+
+Each shard takes the advisory locks of its entities first, so concurrent resets
+of an entity run one after the other. A shard failing on a serialization failure
+or a deadlock is retried, at most RESET_MAX_ATTEMPTS times.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import DBAPIError
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from app.api.v1.entity_tags.repository import AsyncEntityTagRepository
+from app.api.v1.entity_tags.service import AsyncEntityTagService
+from app.api.v1.entity_tags.types import (
+    ResetEntityTagsByNameRequest,
+    ResetEntityTagsByNameResponse,
+    ResetMode,
+)
+from app.common.config import settings
+from app.common.constants import (
+    DEFAULT_RESET_MAX_ATTEMPTS,
+    DEFAULT_RESET_SHARD_SIZE,
+    DEFAULT_RESET_WORKERS,
+    RESET_RETRY_BACKOFF_MAX,
+    RESET_RETRY_BACKOFF_MULTIPLIER,
+)
+from app.common.database import AsyncSessionLocal, get_async_engine
+from app.common.utils.logging_utils import get_logger
+
+logger = get_logger()
+
+# serialization_failure, deadlock_detected
+_RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+def is_retryable(error: BaseException) -> bool:
+    return (
+        isinstance(error, DBAPIError)
+        and getattr(error.orig, "pgcode", None) in _RETRYABLE_SQLSTATES
+    )
+
+
+def shard_requests(
+    requests: List[ResetEntityTagsByNameRequest], shard_size: int
+) -> List[List[int]]:
+    """
+    Splits the requests in shards of at most shard_size entities, as lists of
+    request indexes. The requests of an entity keep their order in its shard.
+    """
+    entity_shards: Dict[str, int] = {}
+    shards: List[List[int]] = []
+    for index, request in enumerate(requests):
+        shard = entity_shards.get(request.entity_id)
+        if shard is None:
+            shard = len(entity_shards) // shard_size
+            entity_shards[request.entity_id] = shard
+            if shard == len(shards):
+                shards.append([])
+        shards[shard].append(index)
+    return shards
+
+
+class ResetWorkers:
+    """Resets the shards of a reset concurrently, with a bounded number of workers"""
+
+    def __init__(self, workers: int, shard_size: int, max_attempts: int):
+        self.workers = workers
+        self.shard_size = shard_size
+        self.max_attempts = max_attempts
+
+    async def reset(
+        self,
+        requests: List[ResetEntityTagsByNameRequest],
+        mode: ResetMode = ResetMode.REPLACE,
+    ) -> List[Optional[ResetEntityTagsByNameResponse]]:
+        """
+        The responses, in the order of the requests. The responses of the
+        requests of a failed shard are None.
+        """
+        shards = shard_requests(requests, self.shard_size)
+        responses: List[Optional[ResetEntityTagsByNameResponse]] = [None] * len(
+            requests
+        )
+        workers = asyncio.Semaphore(self.workers)
+
+        async def reset_shard(shard: List[int]) -> None:
+            async with workers:
+                try:
+                    shard_responses = await self._reset_shard(
+                        [requests[index] for index in shard], mode
+                    )
+                # pylint: disable=broad-except
+                except Exception as e:
+                    logger.warning(f"Reset of {len(shard)} entities failed - {e}")
+                    return
+            for index, response in zip(shard, shard_responses):
+                responses[index] = response
+
+        logger.debug(
+            f"Resetting {len(requests)} entities in {len(shards)} shards, "
+            f"with {self.workers} workers"
+        )
+        await asyncio.gather(*(reset_shard(shard) for shard in shards))
+        return responses
+
+    async def _reset_shard(
+        self, requests: List[ResetEntityTagsByNameRequest], mode: ResetMode
+    ) -> List[ResetEntityTagsByNameResponse]:
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_exponential(
+                multiplier=RESET_RETRY_BACKOFF_MULTIPLIER, max=RESET_RETRY_BACKOFF_MAX
+            ),
+            retry=retry_if_exception(is_retryable),
+            reraise=True,
+        ):
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    logger.info(
+                        f"Retrying the reset of {len(requests)} entities, "
+                        f"attempt {attempt.retry_state.attempt_number}"
+                    )
+                async with AsyncSessionLocal(bind=get_async_engine()) as db:
+                    service = AsyncEntityTagService(AsyncEntityTagRepository(db))
+                    return await service.reset_entity_tags_by_name_bulk(requests, mode)
+        raise AssertionError("unreachable")
+
+
+reset_workers = ResetWorkers(
+    workers=int(settings.get("RESET_WORKERS", DEFAULT_RESET_WORKERS)),
+    shard_size=int(settings.get("RESET_SHARD_SIZE", DEFAULT_RESET_SHARD_SIZE)),
+    max_attempts=int(settings.get("RESET_MAX_ATTEMPTS", DEFAULT_RESET_MAX_ATTEMPTS)),
+)
@@ -3,19 +3,29 @@ This module contains the service layer (business logic) for the EntityTags entit
 It uses the repository layer to interact with the database.
 """
 
-from typing import List
+from typing import Iterable, List, Tuple
 from app.api.v1.entity_tags.types import (
     EntityTag,
     EntityTagCreateRequest,
     EntityTagDeleteRequest,
+    EntityTagResponse,
     ResetEntityTagsByNameRequest,
     ResetEntityTagsByNameResponse,
+    ResetMode,
 )
-from app.api.v1.entity_tags.repository import EntityTagRepository
+from app.api.v1.entity_tags.repository import (
+    AsyncEntityTagRepository,
+    EntityTagRepository,
+)
+from app.api.v1.tag_groups.model import TagGroup, TagGroupResponse
+from app.api.v1.tag_groups.repository import TagGroupRepository
 from app.api.v1.tag_groups.service import TagGroupService
 from app.api.v1.tags.model import Tag, TagResponse
+from app.api.v1.tags.repository import TagRepository
 from app.api.v1.tags.service import TagService
+from app.common.base_entity.async_service import AsyncBaseService
 from app.common.base_entity.model import (
+    AdvancedSearchExplainResponse,
     AdvancedSearchResponse,
     AdvancedSearchRequest,
 )
@@ -24,6 +34,10 @@ from app.common.utils.logging_utils import get_logger
 logger = get_logger()
 
 
+class EntityTagExistsError(ValueError):
+    """The tag is already assigned to the entity, with any entity type"""
+
+
 class EntityTagService:
     """
     Business logic to Entity Tag operations
@@ -33,19 +47,36 @@ class EntityTagService:
         self.repository = repository
 
     def create(self, create_request: EntityTagCreateRequest) -> EntityTag:
-        # Convert the schema to a model instance
-        partial_model = EntityTag(**create_request.model_dump())
-        return self.repository.create(partial_model)
+        """
+        Assigns the tag to the entity. The primary key of the partitioned table
+        includes the entity type, so it does not make (entity_id, tag_id) unique:
+        the assignment is checked under the lock of the entity instead.
+        """
+        with self.repository.unit_of_work():
+            self.repository.lock_entities([create_request.entity_id])
+            if self.repository.entity_tag_exists(
+                create_request.entity_id, create_request.tag_id
+            ):
+                raise EntityTagExistsError(
+                    f"Tag {create_request.tag_id} is already assigned to "
+                    f"{create_request.entity_id}"
+                )
+            return self.repository.create_entity_tag(**create_request.model_dump())
 
     def advanced_search(
         self, search_req: AdvancedSearchRequest
     ) -> AdvancedSearchResponse[EntityTag]:
         return self.repository.advanced_search(search_req)
 
+    def explain_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchExplainResponse:
+        return self.repository.explain_search(search_req)
+
     def delete(self, delete_request: EntityTagDeleteRequest) -> int:
-        if not delete_request.tag_id:
-            return self.repository.clear_entity_tags(delete_request.entity_id)
-        else:
+        with self.repository.unit_of_work():
+            if not delete_request.tag_id:
+                return self.repository.clear_entity_tags(delete_request.entity_id)
             return self.repository.delete_entity_tag(
                 delete_request.entity_id, delete_request.tag_id
             )
@@ -56,57 +87,334 @@ class EntityTagService:
         tag_service: TagService,
         tag_group_service: TagGroupService,
     ) -> ResetEntityTagsByNameResponse:
+        """
+        Replaces the tags of a single entity, in a single transaction.
+        Each tag group and each tag is written in a savepoint, so a failing one is
+        reported in the errors without undoing the others.
+        Concurrent resets of the entity wait for each other.
+        """
         tags_created: List[Tag] = []
         errors: List[str] = []
 
         logger.debug(f"Resetting tags for entity {request.entity_id}")
 
-        logger.debug(f"Deleting existing tags for entity: {request.entity_id}")
-        deleted = self.delete(EntityTagDeleteRequest(entity_id=request.entity_id))
-        logger.debug(f"Deleted {deleted} tags for entity: {request.entity_id}")
+        with self.repository.unit_of_work() as unit_of_work:
+            self.repository.lock_entities([request.entity_id])
+            logger.debug(f"Deleting existing tags for entity: {request.entity_id}")
+            deleted = self.delete(EntityTagDeleteRequest(entity_id=request.entity_id))
+            logger.debug(f"Deleted {deleted} tags for entity: {request.entity_id}")
 
-        for tag_group_req in request.tag_groups:
-            try:
-                logger.debug(f"Looking for tag group: {tag_group_req.tag_group_name}")
-                tag_group = tag_group_service.find_by_name_or_create(
-                    name=tag_group_req.tag_group_name
-                )
-                logger.debug(f"Found tag group: {tag_group.name}")
-                for tag_name in tag_group_req.tag_names:
-                    try:
-                        logger.debug(f"Looking for tag: {tag_name}")
-                        tag = tag_service.find_by_name_or_create(
-                            name=tag_name, tag_group=tag_group
+            for tag_group_req in request.tag_groups:
+                tag_group_name = tag_group_req.tag_group_name
+                try:
+                    with unit_of_work.savepoint():
+                        logger.debug(f"Looking for tag group: {tag_group_name}")
+                        tag_group = tag_group_service.find_by_name_or_create(
+                            name=tag_group_name
                         )
-                        logger.debug(f"Found tag: {tag.name}")
-                        logger.debug(
-                            f"Creating entity tag for: {request.entity_id} / {tag.name}"
-                        )
-                        entity_tag = self.create(
-                            EntityTagCreateRequest(
-                                entity_id=request.entity_id,
-                                entity_type=request.entity_type,
-                                tag_id=tag.id,
-                            )
+                        logger.debug(f"Found tag group: {tag_group.name}")
+                        for tag_name in tag_group_req.tag_names:
+                            try:
+                                with unit_of_work.savepoint():
+                                    tag = self._assign_tag(
+                                        request, tag_name, tag_group, tag_service
+                                    )
+                                tags_created.append(tag)
+                                logger.debug(f"Tags created: {tags_created}")
+                            # pylint: disable=broad-except
+                            except Exception as e:
+                                err = f"Error creating tag: {tag_name} - {e}"
+                                logger.error(err)
+                                errors.append(err)
+                # pylint: disable=broad-except
+                except Exception as e:
+                    err = f"Error creating tag group: {tag_group_name} - {e}"
+                    logger.error(err)
+                    errors.append(err)
+
+        return ResetEntityTagsByNameResponse(
+            entity_id=request.entity_id,
+            entity_type=request.entity_type,
+            tags=TagResponse.from_tags(tags_created, tag_group_service),
+            errors=errors,
+        )
+
+    def _assign_tag(
+        self,
+        request: ResetEntityTagsByNameRequest,
+        tag_name: str,
+        tag_group: TagGroup,
+        tag_service: TagService,
+    ) -> Tag:
+        """Finds (or creates) the tag, and assigns it to the entity"""
+        logger.debug(f"Looking for tag: {tag_name}")
+        tag = tag_service.find_by_name_or_create(name=tag_name, tag_group=tag_group)
+        logger.debug(f"Found tag: {tag.name}")
+        logger.debug(f"Creating entity tag for: {request.entity_id} / {tag.name}")
+        # the caller locked the entity and cleared its tags: a tag listed twice
+        # fails on the primary key, in the savepoint of the tag
+        entity_tag = self.repository.create_entity_tag(
+            request.entity_id, request.entity_type, tag.id
+        )
+        logger.debug(f"Created entity tag: {entity_tag}")
+        return tag
+
+    def reset_entity_tags_by_name_bulk(
+        self,
+        requests: List[ResetEntityTagsByNameRequest],
+        tag_service: TagService,
+        tag_group_service: TagGroupService,
+        mode: ResetMode = ResetMode.REPLACE,
+    ) -> List[ResetEntityTagsByNameResponse]:
+        """
+        Set based variant of reset_entity_tags_by_name for a whole batch of entities.
+        All the tag groups and tags are resolved (and created) with a few set queries,
+        and the entity tags of all the entities are replaced in a single transaction.
+        Errors are reported per entity, the same way reset_entity_tags_by_name does.
+        In DIFF mode only the added and removed entity tags are written.
+        Concurrent resets of the same entities wait for each other.
+        """
+        logger.debug(f"Resetting tags for {len(requests)} entities")
+
+        with self.repository.unit_of_work():
+            self.repository.lock_entities(request.entity_id for request in requests)
+            tag_groups = tag_group_service.find_by_names_or_create(
+                tag_group_req.tag_group_name
+                for request in requests
+                for tag_group_req in request.tag_groups
+            )
+
+            # a new tag is created in the first group it is requested in
+            requested_tag_groups: dict[str, TagGroup] = {}
+            for request in requests:
+                for tag_group_req in request.tag_groups:
+                    for tag_name in tag_group_req.tag_names:
+                        requested_tag_groups.setdefault(
+                            tag_name, tag_groups[tag_group_req.tag_group_name]
                         )
-                        logger.debug(f"Created entity tag: {entity_tag}")
-                        if entity_tag:
-                            tags_created.append(tag)
-                        logger.debug(f"Tags created: {tags_created}")
-                    # pylint: disable=broad-except
-                    except Exception as e:
-                        err = f"Error creating tag: {tag_name} - {e}"
-                        logger.error(err)
-                        errors.append(err)
-            # pylint: disable=broad-except
-            except Exception as e:
-                err = f"Error creating tag group: {tag_group_req.tag_group_name} - {e}"
-                logger.error(err)
-                errors.append(err)
+            tags = tag_service.find_by_names_or_create(requested_tag_groups)
+
+            responses = [
+                self._resolve_reset_request(request, tag_groups, tags)
+                for request in requests
+            ]
+
+            if mode == ResetMode.DIFF:
+                deleted, inserted = self._apply_reset_diff(requests, responses)
+            else:
+                deleted, inserted = self._apply_reset_replace(requests, responses)
+
+        logger.debug(
+            f"Reset ({mode.value}) {len(requests)} entities: "
+            f"deleted {deleted} entity tags, inserted {inserted} entity tags"
+        )
+        return responses
+
+    def _apply_reset_replace(
+        self,
+        requests: List[ResetEntityTagsByNameRequest],
+        responses: List[ResetEntityTagsByNameResponse],
+    ) -> Tuple[int, int]:
+        """Deletes all the tags of the entities and inserts the requested ones"""
+        # when an entity is reset more than once, the last reset wins
+        entity_tag_rows: dict[str, List[dict]] = {}
+        for request, response in zip(requests, responses):
+            entity_tag_rows[request.entity_id] = [
+                {
+                    "entity_id": request.entity_id,
+                    "entity_type": request.entity_type,
+                    "tag_id": tag.id,
+                }
+                for tag in response.tags
+            ]
+
+        deleted = self.repository.clear_entities_tags(list(entity_tag_rows))
+        inserted = self.repository.insert_entity_tags(
+            [row for rows in entity_tag_rows.values() for row in rows]
+        )
+        return deleted, inserted
+
+    def _apply_reset_diff(
+        self,
+        requests: List[ResetEntityTagsByNameRequest],
+        responses: List[ResetEntityTagsByNameResponse],
+    ) -> Tuple[int, int]:
+        """
+        Compares the requested tags with the stored tags, and writes only the
+        difference. Entities whose tags and type did not change are not written at all.
+        Sets the added / removed / unchanged counts of the responses.
+        """
+        stored: dict[str, dict[int, str]] = {}
+        for entity_tag in self.repository.find_by_field_values(
+            "entity_id", {request.entity_id for request in requests}
+        ):
+            stored.setdefault(entity_tag.entity_id, {})[
+                entity_tag.tag_id
+            ] = entity_tag.entity_type
+
+        # counts are relative to the previous reset of the same entity in the batch
+        current: dict[str, dict[int, str]] = dict(stored)
+        for request, response in zip(requests, responses):
+            before = current.get(request.entity_id, {})
+            after = {tag.id: request.entity_type for tag in response.tags}
+            response.added = len(after.keys() - before.keys())
+            response.removed = len(before.keys() - after.keys())
+            response.unchanged = len(after.keys() & before.keys())
+            current[request.entity_id] = after
+
+        removed: List[Tuple[str, int, str]] = []
+        added: List[dict] = []
+        # new entity type -> entity id -> previous entity types
+        retyped: dict[str, dict[str, set[str]]] = {}
+        skipped = 0
+        for entity_id, after in current.items():
+            before = stored.get(entity_id, {})
+            if before == after:
+                skipped += 1
+                continue
+
+            removed.extend(
+                (entity_id, tag_id, before[tag_id])
+                for tag_id in before.keys() - after.keys()
+            )
+            added.extend(
+                {"entity_id": entity_id, "entity_type": entity_type, "tag_id": tag_id}
+                for tag_id, entity_type in after.items()
+                if tag_id not in before
+            )
+            previous_types = {
+                before[tag_id]
+                for tag_id in before.keys() & after.keys()
+                if before[tag_id] != after[tag_id]
+            }
+            if previous_types:
+                entity_type = next(iter(after.values()))
+                retyped.setdefault(entity_type, {})[entity_id] = previous_types
+
+        logger.debug(f"Skipped {skipped} entities with unchanged tags")
+        deleted = self.repository.delete_entity_tags(removed)
+        inserted = self.repository.insert_entity_tags(added)
+        for entity_type, previous_types in retyped.items():
+            self.repository.update_entity_type(
+                list(previous_types), entity_type, set().union(*previous_types.values())
+            )
+        return deleted, inserted
+
+    @staticmethod
+    def _resolve_reset_request(
+        request: ResetEntityTagsByNameRequest,
+        tag_groups: dict[str, TagGroup],
+        tags: dict[str, Tag],
+    ) -> ResetEntityTagsByNameResponse:
+        """Matches the requested tags of a single entity against the resolved tags"""
+        tag_responses: List[TagResponse] = []
+        tag_ids = set()
+        errors: List[str] = []
+
+        for tag_group_req in request.tag_groups:
+            tag_group = tag_groups[tag_group_req.tag_group_name]
+            for tag_name in tag_group_req.tag_names:
+                tag = tags[tag_name]
+                err = None
+                if tag.tag_group_id != tag_group.id:
+                    err = (
+                        f"Error creating tag: {tag_name} - "
+                        f"Tag {tag_name} already exists in another group"
+                    )
+                elif tag.id in tag_ids:
+                    err = (
+                        f"Error creating tag: {tag_name} - "
+                        f"Tag {tag_name} is already assigned to {request.entity_id}"
+                    )
+
+                if err:
+                    logger.error(err)
+                    errors.append(err)
+                    continue
+
+                tag_ids.add(tag.id)
+                tag_responses.append(
+                    TagResponse(
+                        id=tag.id,
+                        name=tag.name,
+                        tag_group_id=tag.tag_group_id,
+                        tag_group=TagGroupResponse.from_tag_group(tag_group),
+                    )
+                )
 
         return ResetEntityTagsByNameResponse(
             entity_id=request.entity_id,
             entity_type=request.entity_type,
-            tags=[TagResponse.from_tag(tag, tag_group_service) for tag in tags_created],
+            tags=tag_responses,
             errors=errors,
         )
+
+
+class AsyncEntityTagService(AsyncBaseService[EntityTagService]):
+    """
+    asyncio variant of EntityTagService.
+    The tag and tag group services it needs are built on the same session.
+    """
+
+    def __init__(self, repository: AsyncEntityTagRepository):
+        super().__init__(
+            repository, lambda db: EntityTagService(EntityTagRepository(db))
+        )
+
+    @staticmethod
+    def _tag_services(service: EntityTagService) -> Tuple[TagService, TagGroupService]:
+        db = service.repository.db
+        return TagService(TagRepository(db)), TagGroupService(TagGroupRepository(db))
+
+    async def create(self, create_request: EntityTagCreateRequest) -> EntityTag:
+        return await self.run_sync(EntityTagService.create, create_request)
+
+    async def advanced_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchResponse[EntityTag]:
+        return await self.repository.advanced_search(search_req)
+
+    async def explain_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchExplainResponse:
+        return await self.repository.explain_search(search_req)
+
+    async def delete(self, delete_request: EntityTagDeleteRequest) -> int:
+        return await self.run_sync(EntityTagService.delete, delete_request)
+
+    async def lock_entities(self, entity_ids: Iterable[str]) -> None:
+        await self.repository.lock_entities(entity_ids)
+
+    async def reset_entity_tags_by_name(
+        self, request: ResetEntityTagsByNameRequest
+    ) -> ResetEntityTagsByNameResponse:
+        def reset(service: EntityTagService) -> ResetEntityTagsByNameResponse:
+            return service.reset_entity_tags_by_name(
+                request, *self._tag_services(service)
+            )
+
+        return await self.run_sync(reset)
+
+    async def reset_entity_tags_by_name_bulk(
+        self,
+        requests: List[ResetEntityTagsByNameRequest],
+        mode: ResetMode = ResetMode.REPLACE,
+    ) -> List[ResetEntityTagsByNameResponse]:
+        def reset(service: EntityTagService) -> List[ResetEntityTagsByNameResponse]:
+            return service.reset_entity_tags_by_name_bulk(
+                requests, *self._tag_services(service), mode
+            )
+
+        return await self.run_sync(reset)
+
+    async def to_responses(
+        self, entity_tags: List[EntityTag]
+    ) -> List[EntityTagResponse]:
+        """EntityTagResponse.from_entity_tags, with the tags read on the same session"""
+
+        def to_responses(service: EntityTagService) -> List[EntityTagResponse]:
+            return EntityTagResponse.from_entity_tags(
+                entity_tags, *self._tag_services(service)
+            )
+
+        return await self.run_sync(to_responses)
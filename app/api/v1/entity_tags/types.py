@@ -2,13 +2,15 @@
 This module contains DTO models related to the EntityTag entity
 """
 
+from enum import Enum
+
 from pydantic import BaseModel
 
 from app.api.v1.entity_tags.model import EntityTag
 from app.api.v1.tag_groups.service import TagGroupService
 from app.api.v1.tags.model import TagResponse
 from app.api.v1.tags.service import TagService
-from typing import Optional
+from typing import List, Optional
 
 
 class EntityTagCreateRequest(BaseModel):
@@ -33,11 +35,22 @@ class ResetEntityTagsByNameRequest(BaseModel):
     tag_groups: list[TagGroupTagsByNameRequest]
 
 
+class ResetMode(str, Enum):
+    # delete all the entity tags and insert the requested ones
+    REPLACE = "replace"
+    # delete only the removed tags and insert only the added ones
+    DIFF = "diff"
+
+
 class ResetEntityTagsByNameResponse(BaseModel):
     entity_id: str
     entity_type: str
     tags: list[TagResponse]
     errors: list[str] = []
+    # tag counts compared to the stored tags, reported in diff mode only
+    added: Optional[int] = None
+    removed: Optional[int] = None
+    unchanged: Optional[int] = None
 
 
 class EntityTagResponse(BaseModel):
@@ -64,3 +77,32 @@ class EntityTagResponse(BaseModel):
             tag=TagResponse.from_tag(tag, tag_group_service),
             # create_date=entity_tag.create_date,
         )
+
+    @classmethod
+    def from_entity_tags(
+        cls,
+        entity_tags: List[EntityTag],
+        tag_service: TagService,
+        tag_group_service: TagGroupService,
+    ) -> List["EntityTagResponse"]:
+        """
+        Batched from_entity_tag: fetches the tags, and then their tag groups,
+        with one query each, whatever the number of entity tags is.
+        """
+        tags = tag_service.get_many(entity_tag.tag_id for entity_tag in entity_tags)
+        tag_responses = {
+            tag_response.id: tag_response
+            for tag_response in TagResponse.from_tags(
+                list(tags.values()), tag_group_service
+            )
+        }
+
+        return [
+            cls(
+                entity_id=entity_tag.entity_id,
+                entity_type=entity_tag.entity_type,
+                tag_id=entity_tag.tag_id,
+                tag=tag_responses[entity_tag.tag_id],
+            )
+            for entity_tag in entity_tags
+        ]
@@ -3,18 +3,50 @@ This module contains the general controller for the service.
 It handles all http requests that are not entity specific.
 """
 
-from readyapi import APIRouter
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from readyapi import APIRouter, Response
+from sqlalchemy import inspect
 
-from app.api.v1.general.types import HealthCheckResponse, VersionResponse
+from app.api.v1.general.types import (
+    CacheStatsResponse,
+    HealthCheckResponse,
+    PoolStatsResponse,
+    VersionResponse,
+)
+from app.api.v1.tag_groups.service import tag_group_cache
+from app.api.v1.tags.service import tag_cache
 from app.common.config import settings
-from app.common.database import inspector
+from app.common.constants import DEFAULT_INDEX_ADVISOR_MIN_ROWS
+from app.common.database import get_async_engine, get_engine, get_replica_router
+from app.common.index_advisor import IndexReport, index_report
+from app.common.metrics import StatsCollector
 
 router = APIRouter()
 
+REGISTRY.register(
+    StatsCollector(
+        pools=lambda: {
+            "engine": get_engine().pool.stats(),
+            "async_engine": get_async_engine().pool.stats(),
+        }
+        | {
+            f"replica_{index}": replica.pool
+            for index, replica in enumerate(get_replica_router().stats())
+        },
+        caches=lambda: {
+            "tags": tag_cache.stats(),
+            "tag_groups": tag_group_cache.stats(),
+        },
+    )
+)
+
 
 @router.get("/health", response_model=HealthCheckResponse, status_code=200)
 async def health_check():
-    tables = inspector.get_table_names()
+    async with get_async_engine().connect() as connection:
+        tables = await connection.run_sync(
+            lambda sync_connection: inspect(sync_connection).get_table_names()
+        )
     # get value of env variable ENV_FOR_DYNACONF
     # if it is not set, default to "development"
 
@@ -42,3 +74,32 @@ async def health_check():
 async def version():
     app_version = settings.get("APP_VERSION", "-----")
     return VersionResponse(version=app_version)
+
+
+@router.get("/cache_stats", response_model=CacheStatsResponse, status_code=200)
+async def cache_stats():
+    return CacheStatsResponse(
+        tags=tag_cache.stats(), tag_groups=tag_group_cache.stats()
+    )
+
+
+@router.get("/pool_stats", response_model=PoolStatsResponse, status_code=200)
+async def pool_stats():
+    return PoolStatsResponse(
+        engine=get_engine().pool.stats(),
+        async_engine=get_async_engine().pool.stats(),
+        replicas=get_replica_router().stats(),
+    )
+
+
+@router.get("/index_report", response_model=IndexReport, status_code=200)
+async def get_index_report(min_rows: int = DEFAULT_INDEX_ADVISOR_MIN_ROWS):
+    """Sequential scan heavy tables and unused indexes, see app.common.index_advisor"""
+    async with get_async_engine().connect() as connection:
+        return await connection.run_sync(index_report, min_rows)
+
+
+@router.get("/metrics", response_class=Response, status_code=200)
+async def metrics():
+    """Prometheus metrics, see app.common.metrics"""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
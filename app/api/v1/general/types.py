@@ -5,6 +5,10 @@ This file contains the pydantic models for the general API
 from typing import Optional, List
 from pydantic import BaseModel, Field
 
+from app.common.cache import CacheStats
+from app.common.db_pool import PoolStats
+from app.common.replicas import ReplicaStats
+
 
 class Settings(BaseModel):
     ENV_FOR_DYNACONF: str = Field(default="-----")
@@ -27,3 +31,14 @@ class HealthCheckResponse(BaseModel):
 
 class VersionResponse(BaseModel):
     version: str = Field(default="-----")
+
+
+class CacheStatsResponse(BaseModel):
+    tags: CacheStats
+    tag_groups: CacheStats
+
+
+class PoolStatsResponse(BaseModel):
+    engine: PoolStats
+    async_engine: PoolStats
+    replicas: List[ReplicaStats] = []
@@ -5,16 +5,21 @@ It uses the TagGroupService to perform the business logic.
 """
 
 from readyapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.api.v1.tag_groups.model import (
     TagGroupResponse,
     TagGroupCreateRequest,
     TagGroup,
 )
-from app.api.v1.tag_groups.repository import TagGroupRepository
-from app.api.v1.tag_groups.service import TagGroupService
-from app.common.database import get_db
+from app.api.v1.tag_groups.repository import (
+    AsyncTagGroupRepository,
+    TagGroupRepository,
+)
+from app.api.v1.tag_groups.service import AsyncTagGroupService, TagGroupService
+from app.common.database import get_async_db, get_async_read_db, get_db
 from app.common.base_entity.model import (
+    AdvancedSearchExplainResponse,
     AdvancedSearchRequest,
     AdvancedSearchResponse,
     DeleteResponse,
@@ -29,6 +34,21 @@ def get_tag_group_service(db: Session = Depends(get_db)) -> TagGroupService:
     return TagGroupService(repository)
 
 
+async def get_async_tag_group_service(
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncTagGroupService:
+    repository = AsyncTagGroupRepository(db)
+    return AsyncTagGroupService(repository)
+
+
+async def get_async_read_tag_group_service(
+    db: AsyncSession = Depends(get_async_read_db),
+) -> AsyncTagGroupService:
+    """AsyncTagGroupService of read only requests, served by the read replicas"""
+    repository = AsyncTagGroupRepository(db)
+    return AsyncTagGroupService(repository)
+
+
 def convert_advanced_search_response(
     response: AdvancedSearchResponse[TagGroup],
 ) -> AdvancedSearchResponse[TagGroupResponse]:
@@ -40,39 +60,42 @@ def convert_advanced_search_response(
         count=response.count,
         offset=response.offset,
         count_total=response.count_total,
+        has_more=response.has_more,
+        next_cursor=response.next_cursor,
     )
 
 
 @router.post("/tag_groups", response_model=TagGroupResponse)
-def create_tag_group(
+async def create_tag_group(
     create_request: TagGroupCreateRequest,
-    service: TagGroupService = Depends(get_tag_group_service),
+    service: AsyncTagGroupService = Depends(get_async_tag_group_service),
 ):
     try:
-        created: TagGroup = service.create(create_request)
+        created: TagGroup = await service.create(create_request)
         return TagGroupResponse.from_tag_group(created)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
 @router.get("/tag_groups/{tag_group_id}", response_model=TagGroupResponse)
-def get_tag_group(
-    tag_group_id: int, service: TagGroupService = Depends(get_tag_group_service)
+async def get_tag_group(
+    tag_group_id: int,
+    service: AsyncTagGroupService = Depends(get_async_read_tag_group_service),
 ):
-    tag_group = service.get(tag_group_id)
+    tag_group = await service.get(tag_group_id)
     if tag_group is None:
         raise HTTPException(status_code=404, detail="Tag group not found")
     return TagGroupResponse.from_tag_group(tag_group)
 
 
 @router.put("/tag_groups/{tag_group_id}", response_model=TagGroupResponse)
-def update_tag_group(
+async def update_tag_group(
     tag_group_id: int,
     tag_group: TagGroupCreateRequest,
-    service: TagGroupService = Depends(get_tag_group_service),
+    service: AsyncTagGroupService = Depends(get_async_tag_group_service),
 ):
     try:
-        updated: TagGroup = service.update(tag_group_id, tag_group)
+        updated: TagGroup = await service.update(tag_group_id, tag_group)
         return TagGroupResponse.from_tag_group(updated)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
@@ -82,22 +105,38 @@ def update_tag_group(
     "/tag_groups/advanced_search",
     response_model=AdvancedSearchResponse[TagGroupResponse],
 )
-def advanced_search(
+async def advanced_search(
     search_req: AdvancedSearchRequest,
-    service: TagGroupService = Depends(get_tag_group_service),
+    service: AsyncTagGroupService = Depends(get_async_read_tag_group_service),
 ) -> AdvancedSearchResponse[TagGroupResponse]:
     try:
-        advanced_search_response = service.advanced_search(search_req)
+        advanced_search_response = await service.advanced_search(search_req)
         return convert_advanced_search_response(advanced_search_response)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
+@router.post(
+    "/tag_groups/advanced_search/explain",
+    response_model=AdvancedSearchExplainResponse,
+)
+async def explain_advanced_search(
+    search_req: AdvancedSearchRequest,
+    service: AsyncTagGroupService = Depends(get_async_read_tag_group_service),
+):
+    """The SQL and the plan of the advanced search, which is not run"""
+    try:
+        return await service.explain_search(search_req)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
 @router.delete("/tag_groups/{tag_group_id}")
-def delete_tag_group(
-    tag_group_id: int, service: TagGroupService = Depends(get_tag_group_service)
+async def delete_tag_group(
+    tag_group_id: int,
+    service: AsyncTagGroupService = Depends(get_async_tag_group_service),
 ):
-    deleted_count = service.delete(tag_group_id)
+    deleted_count = await service.delete(tag_group_id)
 
     if deleted_count == 0:
         raise HTTPException(status_code=404, detail="Tag group not found")
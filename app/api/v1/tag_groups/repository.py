@@ -3,12 +3,20 @@ This module contains the repository layer (database operations)
 for the TagGroups entity.
 """
 
+from typing import List, Optional
+
+from sqlalchemy import column, delete, exists, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.common.base_entity.async_repository import AsyncBaseRepository
 from app.common.base_entity.repository import BaseRepository
 from app.api.v1.tag_groups.model import (
     TagGroup,
 )
 
+# the tags table, without importing the Tag model (which depends on tag groups)
+_tags = table("tags", column("tag_group_id"))
+
 
 class TagGroupRepository(BaseRepository[TagGroup]):
     """
@@ -19,8 +27,39 @@ class TagGroupRepository(BaseRepository[TagGroup]):
         super().__init__(db, TagGroup)
 
     def delete_by_id(self, tag_group_id: int) -> int:
-        deleted_rows = (
-            self.db.query(self.model).filter(self.model.id == tag_group_id).delete()
+        return self.db.query(self.model).filter(self.model.id == tag_group_id).delete()
+
+    def delete_tag_groups_with_no_tags(
+        self, batch_size: int, tag_group_ids: Optional[List[int]] = None
+    ) -> int:
+        """
+        Deletes at most batch_size tag groups without tags (among tag_group_ids,
+        when given), the same way TagRepository.delete_tags_with_no_entities
+        deletes the ghost tags
+        """
+        empty_tag_groups = select(TagGroup.id).where(
+            ~exists().where(_tags.c.tag_group_id == TagGroup.id)
         )
-        self.db.commit()
-        return deleted_rows
+        if tag_group_ids is not None:
+            empty_tag_groups = empty_tag_groups.where(TagGroup.id.in_(tag_group_ids))
+        empty_tag_groups = (
+            empty_tag_groups.order_by(TagGroup.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .cte("empty_tag_groups")
+        )
+        result = self.db.execute(
+            delete(TagGroup)
+            .where(TagGroup.id == empty_tag_groups.c.id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+class AsyncTagGroupRepository(AsyncBaseRepository[TagGroup]):
+    """
+    asyncio variant of TagGroupRepository
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, TagGroup)
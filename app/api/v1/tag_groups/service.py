@@ -3,21 +3,42 @@ This module contains the service layer (business logic) for the TagGroups entity
 It uses the repository layer to interact with the database.
 """
 
-from typing import Optional
+from typing import Iterable, List, Optional
 from app.api.v1.tag_groups.model import (
     TagGroup,
     TagGroupCreateRequest,
 )
-from app.api.v1.tag_groups.repository import TagGroupRepository
+from app.api.v1.tag_groups.repository import (
+    AsyncTagGroupRepository,
+    TagGroupRepository,
+)
+from app.common.base_entity.async_service import AsyncBaseService
 from app.common.base_entity.model import (
     FilterType,
+    AdvancedSearchExplainResponse,
     AdvancedSearchRequest,
     AdvancedSearchResponse,
 )
+from app.common.cache import EntityCache
+from app.common.config import settings
+from app.common.constants import (
+    DEFAULT_CACHE_MAX_SIZE,
+    DEFAULT_CACHE_VERSION_CHECK_INTERVAL,
+)
 from app.common.utils.logging_utils import get_logger
 
 logger = get_logger()
 
+tag_group_cache: EntityCache[TagGroup] = EntityCache(
+    TagGroup,
+    max_size=int(settings.get("CACHE_MAX_SIZE", DEFAULT_CACHE_MAX_SIZE)),
+    version_check_interval=float(
+        settings.get(
+            "CACHE_VERSION_CHECK_INTERVAL", DEFAULT_CACHE_VERSION_CHECK_INTERVAL
+        )
+    ),
+)
+
 
 class TagGroupService:
     """TagGroupService"""
@@ -28,16 +49,38 @@ class TagGroupService:
     def create(self, tag_group_create: TagGroupCreateRequest) -> TagGroup:
         # Convert the schema to a model instance
         tag_group = TagGroup(**tag_group_create.model_dump())
-        return self.repository.create(tag_group)
+        with self.repository.unit_of_work():
+            return self.repository.create(tag_group)
 
     def get(self, tag_group_id: int) -> Optional[TagGroup]:
-        return self.repository.get(tag_group_id)
+        return self.get_many([tag_group_id]).get(tag_group_id)
+
+    def get_many(self, tag_group_ids: Iterable[int]) -> dict[int, TagGroup]:
+        """
+        Returns the TagGroups of all the ids, keyed by id.
+        Served from the cache, the missing ones are fetched with a single query.
+        """
+        db = self.repository.db
+        tag_group_ids = set(tag_group_ids)
+        tag_groups = tag_group_cache.get_many(db, tag_group_ids)
+
+        missing = tag_group_ids - tag_groups.keys()
+        if missing:
+            fetched = self.repository.get_many(missing)
+            tag_group_cache.put(db, fetched)
+            tag_groups.update({tag_group.id: tag_group for tag_group in fetched})
+        return tag_groups
 
     def advanced_search(
         self, search_req: AdvancedSearchRequest
     ) -> AdvancedSearchResponse[TagGroup]:
         return self.repository.advanced_search(search_req)
 
+    def explain_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchExplainResponse:
+        return self.repository.explain_search(search_req)
+
     def search(
         self,
         field: str,
@@ -50,27 +93,124 @@ class TagGroupService:
     def update(
         self, tag_group_id: int, tag_group_update: TagGroupCreateRequest
     ) -> Optional[TagGroup]:
-        tag_group = self.repository.get(tag_group_id)
-        if tag_group is None:
-            return None
+        with self.repository.unit_of_work():
+            tag_group = self.repository.get(tag_group_id)
+            if tag_group is None:
+                return None
 
-        for key, value in tag_group_update.model_dump().items():
-            setattr(tag_group, key, value)
+            for key, value in tag_group_update.model_dump().items():
+                setattr(tag_group, key, value)
 
-        return self.repository.create(tag_group)
+            updated = self.repository.create(tag_group)
+        tag_group_cache.invalidate()
+        return updated
 
     def delete(self, tag_group_id: int) -> int:
-        return self.repository.delete_by_id(tag_group_id)
+        with self.repository.unit_of_work():
+            deleted = self.repository.delete_by_id(tag_group_id)
+        tag_group_cache.invalidate()
+        return deleted
+
+    def delete_tag_groups_with_no_tags_batch(
+        self, batch_size: int, tag_group_ids: Optional[List[int]] = None
+    ) -> int:
+        """Deletes a batch of tag groups without tags, in its own transaction"""
+        with self.repository.unit_of_work():
+            deleted = self.repository.delete_tag_groups_with_no_tags(
+                batch_size, tag_group_ids
+            )
+        if deleted:
+            tag_group_cache.invalidate()
+        return deleted
 
     def find_by_unique_fields(self, field: str, value: str) -> Optional[TagGroup]:
-        return self.repository.find_by_unique_field(field, value)
+        if field == "name":
+            tag_group = tag_group_cache.get_by_name(self.repository.db, value)
+            if tag_group is not None:
+                return tag_group
+
+        tag_group = self.repository.find_by_unique_field(field, value)
+        tag_group_cache.put(self.repository.db, [tag_group])
+        return tag_group
 
     def find_by_name_or_create(self, name: str) -> TagGroup:
         tag_group = self.find_by_unique_fields("name", name)
 
         if not tag_group:
             logger.debug(f"TagGroup {name} does not exist. Creating new tag group")
-            tag_group = self.create(
-                TagGroupCreateRequest(name=name, description=f"{name} description")
-            )
+            with self.repository.unit_of_work():
+                [tag_group] = self.repository.find_or_create_many(
+                    "name", [{"name": name, "description": f"{name} description"}]
+                )
         return tag_group
+
+    def find_by_names_or_create(self, names: Iterable[str]) -> dict[str, TagGroup]:
+        """
+        Set based variant of find_by_name_or_create: looks up all the names with a
+        single query and inserts the missing ones with a single multi-row insert.
+        Safe to run concurrently with other callers creating the same names.
+        Does not commit, the caller owns the transaction.
+        """
+        names = list(dict.fromkeys(names))
+        tag_groups = tag_group_cache.get_many_by_name(self.repository.db, names)
+
+        missing = [name for name in names if name not in tag_groups]
+        if missing:
+            created = self.repository.find_or_create_many(
+                "name",
+                [
+                    {"name": name, "description": f"{name} description"}
+                    for name in missing
+                ],
+            )
+            tag_group_cache.put(self.repository.db, created)
+            tag_groups.update({tag_group.name: tag_group for tag_group in created})
+        return tag_groups
+
+
+class AsyncTagGroupService(AsyncBaseService[TagGroupService]):
+    """asyncio variant of TagGroupService"""
+
+    def __init__(self, repository: AsyncTagGroupRepository):
+        super().__init__(repository, lambda db: TagGroupService(TagGroupRepository(db)))
+
+    async def create(self, tag_group_create: TagGroupCreateRequest) -> TagGroup:
+        return await self.run_sync(TagGroupService.create, tag_group_create)
+
+    async def get(self, tag_group_id: int) -> Optional[TagGroup]:
+        return await self.run_sync(TagGroupService.get, tag_group_id)
+
+    async def get_many(self, tag_group_ids: Iterable[int]) -> dict[int, TagGroup]:
+        return await self.run_sync(TagGroupService.get_many, list(tag_group_ids))
+
+    async def advanced_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchResponse[TagGroup]:
+        return await self.repository.advanced_search(search_req)
+
+    async def explain_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchExplainResponse:
+        return await self.repository.explain_search(search_req)
+
+    async def update(
+        self, tag_group_id: int, tag_group_update: TagGroupCreateRequest
+    ) -> Optional[TagGroup]:
+        return await self.run_sync(
+            TagGroupService.update, tag_group_id, tag_group_update
+        )
+
+    async def delete(self, tag_group_id: int) -> int:
+        return await self.run_sync(TagGroupService.delete, tag_group_id)
+
+    async def find_by_unique_fields(self, field: str, value: str) -> Optional[TagGroup]:
+        return await self.run_sync(TagGroupService.find_by_unique_fields, field, value)
+
+    async def delete_tag_groups_with_no_tags_batch(
+        self, batch_size: int, tag_group_ids: Optional[List[int]] = None
+    ) -> int:
+        return await self.run_sync(
+            TagGroupService.delete_tag_groups_with_no_tags_batch,
+            batch_size,
+            tag_group_ids,
+        )
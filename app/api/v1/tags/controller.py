@@ -6,11 +6,22 @@ It uses the service layer to perform the business logic.
 
 import traceback
 
-from readyapi import APIRouter, Depends, HTTPException
-from app.api.v1.tag_groups.controller import get_tag_group_service
+from typing import List, Optional
+
+from readyapi import APIRouter, Depends, HTTPException, Query
+from app.api.v1.tags.ghost_tags import (
+    GhostTagsGCStatus,
+    ghost_tags_collector,
+    ghost_tags_delete_max_batches,
+)
 from app.api.v1.tags.model import TagResponse, TagCreateRequest, Tag
-from app.api.v1.tags.service import TagService, get_tag_service
+from app.api.v1.tags.service import (
+    AsyncTagService,
+    get_async_read_tag_service,
+    get_async_tag_service,
+)
 from app.common.base_entity.model import (
+    AdvancedSearchExplainResponse,
     AdvancedSearchResponse,
     AdvancedSearchRequest,
     DeleteResponse,
@@ -22,62 +33,59 @@ logger = get_logger()
 router = APIRouter()
 
 
-# Dependency function to provide TagGroupService
-
-
-def convert_advanced_search_response(
+async def convert_advanced_search_response(
     response: AdvancedSearchResponse[Tag],
-    tag_group_service=Depends(get_tag_group_service),
+    tag_service: AsyncTagService,
 ) -> AdvancedSearchResponse[TagResponse]:
-    tag_responses = [
-        TagResponse.from_tag(tag, tag_group_service) for tag in response.results
-    ]
+    tag_responses = await tag_service.to_responses(response.results)
     return AdvancedSearchResponse[TagResponse](
         results=tag_responses,
         count=response.count,
         offset=response.offset,
         count_total=response.count_total,
+        has_more=response.has_more,
+        next_cursor=response.next_cursor,
     )
 
 
 @router.post("/tags", response_model=TagResponse)
-def create_tag(
+async def create_tag(
     tag: TagCreateRequest,
-    tag_service: TagService = Depends(get_tag_service),
-    tag_group_service=Depends(get_tag_group_service),
+    tag_service: AsyncTagService = Depends(get_async_tag_service),
 ):
     try:
-        created = tag_service.create(tag)
-        return TagResponse.from_tag(created, tag_group_service)
+        created = await tag_service.create(tag)
+        [response] = await tag_service.to_responses([created])
+        return response
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
     # todo: remove error handling when global error is working
 
 
 @router.get("/tags/{tag_id}", response_model=TagResponse)
-def get_tag(
+async def get_tag(
     tag_id: int,
-    tag_service: TagService = Depends(get_tag_service),
-    tag_group_service=Depends(get_tag_group_service),
+    tag_service: AsyncTagService = Depends(get_async_read_tag_service),
 ):
-    tag = tag_service.get(tag_id)
+    tag = await tag_service.get(tag_id)
 
     if tag is None:
         raise HTTPException(status_code=404, detail="Tag not found")
 
-    return TagResponse.from_tag(tag, tag_group_service)
+    [response] = await tag_service.to_responses([tag])
+    return response
 
 
 @router.put("/tags/{tag_id}", response_model=TagResponse)
-def update_tag(
+async def update_tag(
     tag_id: int,
     tag: TagCreateRequest,
-    tag_service: TagService = Depends(get_tag_service),
-    tag_group_service=Depends(get_tag_group_service),
+    tag_service: AsyncTagService = Depends(get_async_tag_service),
 ):
     try:
-        updated_tag = tag_service.update(tag_id, tag)
-        return TagResponse.from_tag(updated_tag, tag_group_service)
+        updated_tag = await tag_service.update(tag_id, tag)
+        [response] = await tag_service.to_responses([updated_tag])
+        return response
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
@@ -85,11 +93,11 @@ def update_tag(
 
 
 @router.delete("/tags/{tag_id}", response_model=DeleteResponse)
-def delete_tag(
+async def delete_tag(
     tag_id: int,
-    tag_service: TagService = Depends(get_tag_service),
+    tag_service: AsyncTagService = Depends(get_async_tag_service),
 ):
-    deleted_count = tag_service.delete(tag_id)
+    deleted_count = await tag_service.delete(tag_id)
 
     if deleted_count is None:
         raise HTTPException(status_code=404, detail="Tag not found")
@@ -101,27 +109,70 @@ def delete_tag(
     "/tags/advanced_search",
     response_model=AdvancedSearchResponse[TagResponse],
 )
-def advanced_search(
+async def advanced_search(
     search_req: AdvancedSearchRequest,
-    service: TagService = Depends(get_tag_service),
-    tag_group_service=Depends(get_tag_group_service),
+    service: AsyncTagService = Depends(get_async_read_tag_service),
 ) -> AdvancedSearchResponse[TagResponse]:
     try:
-        advanced_search_response = service.advanced_search(search_req)
-        return convert_advanced_search_response(
-            advanced_search_response, tag_group_service
-        )
+        advanced_search_response = await service.advanced_search(search_req)
+        return await convert_advanced_search_response(advanced_search_response, service)
     except Exception as e:
         logger.error(f"Exception occurred: {e}\n{traceback.format_exc()}")
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
+@router.post(
+    "/tags/advanced_search/explain", response_model=AdvancedSearchExplainResponse
+)
+async def explain_advanced_search(
+    search_req: AdvancedSearchRequest,
+    service: AsyncTagService = Depends(get_async_read_tag_service),
+):
+    """The SQL and the plan of the advanced search, which is not run"""
+    try:
+        return await service.explain_search(search_req)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
 @router.post("/tags/delete_tags_with_no_entities", response_model=DeleteResponse)
-def delete_tags_with_no_entities(
-    tag_service: TagService = Depends(get_tag_service),
+async def delete_tags_with_no_entities(
+    tag_service: AsyncTagService = Depends(get_async_tag_service),
 ):
+    """
+    Deletes the tags with no entities, at most GHOST_TAGS_DELETE_MAX_BATCHES
+    batches in the request. When tags may be left, the background cleanup
+    deletes them (see /tags/ghost_tags_gc/status).
+    """
+    batch_size = ghost_tags_collector.batch_size
+    max_batches = ghost_tags_delete_max_batches()
     try:
-        deleted_count = tag_service.delete_tags_with_no_entities()
-        return DeleteResponse(count=deleted_count)
+        deleted_count = await tag_service.delete_tags_with_no_entities(
+            batch_size, max_batches
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
+
+    # every batch was full
+    if deleted_count == batch_size * max_batches:
+        ghost_tags_collector.start(include_tag_groups=False)
+    return DeleteResponse(count=deleted_count)
+
+
+@router.post("/tags/ghost_tags_gc", response_model=GhostTagsGCStatus, status_code=202)
+async def start_ghost_tags_gc(
+    include_tag_groups: Optional[bool] = None,
+    tag_group_ids: Optional[List[int]] = Query(None),
+):
+    """
+    Starts deleting the tags with no entities in the background (and the tag
+    groups without tags, when include_tag_groups), unless a run is in progress.
+    tag_group_ids limits the run to these tag groups and their tags.
+    """
+    ghost_tags_collector.start(include_tag_groups, tag_group_ids)
+    return ghost_tags_collector.status
+
+
+@router.get("/tags/ghost_tags_gc/status", response_model=GhostTagsGCStatus)
+async def ghost_tags_gc_status():
+    return ghost_tags_collector.status
@@ -0,0 +1,202 @@
+"""
+Background garbage collection of the ghost tags (tags no entity uses) and,
+optionally, of the empty tag groups (tag groups without tags).
+
+Rows are deleted in batches of GHOST_TAGS_GC_BATCH_SIZE, each batch in its own
+short transaction, with a pause of GHOST_TAGS_GC_BATCH_PAUSE_SECONDS between
+batches, so a large cleanup never holds locks for long nor hogs the database.
+A run can be started on demand, or every GHOST_TAGS_GC_INTERVAL_SECONDS
+(0 disables the periodic runs). The status reports the progress of the last run.
+An on demand run can be limited to some tag groups.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from pydantic import BaseModel
+
+from app.api.v1.tag_groups.repository import AsyncTagGroupRepository
+from app.api.v1.tag_groups.service import AsyncTagGroupService
+from app.api.v1.tags.repository import AsyncTagRepository
+from app.api.v1.tags.service import AsyncTagService
+from app.common.config import settings
+from app.common.constants import (
+    DEFAULT_GHOST_TAGS_DELETE_MAX_BATCHES,
+    DEFAULT_GHOST_TAGS_GC_BATCH_PAUSE_SECONDS,
+    DEFAULT_GHOST_TAGS_GC_BATCH_SIZE,
+    DEFAULT_GHOST_TAGS_GC_INTERVAL_SECONDS,
+    DEFAULT_GHOST_TAGS_GC_TAG_GROUPS,
+)
+from app.common.database import AsyncSessionLocal, get_async_engine
+from app.common.utils.logging_utils import get_logger
+
+logger = get_logger()
+
+
+class GhostTagsGCStatus(BaseModel):
+    running: bool = False
+    runs: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # progress of the current (or last) run
+    batches: int = 0
+    tags_deleted: int = 0
+    tag_groups_deleted: int = 0
+    error: Optional[str] = None
+
+
+class GhostTagsCollector:
+    """Runs the ghost tags cleanup in the background, one run at a time"""
+
+    def __init__(
+        self,
+        batch_size: int,
+        batch_pause_seconds: float,
+        include_tag_groups: bool,
+    ):
+        self.batch_size = batch_size
+        self.batch_pause_seconds = batch_pause_seconds
+        self.include_tag_groups = include_tag_groups
+        self.status = GhostTagsGCStatus()
+        self._run_task: Optional[asyncio.Task] = None
+        self._periodic_task: Optional[asyncio.Task] = None
+
+    def start(
+        self,
+        include_tag_groups: Optional[bool] = None,
+        tag_group_ids: Optional[List[int]] = None,
+    ) -> bool:
+        """
+        Starts a run in the background, unless one is running already.
+        tag_group_ids limits the run to these tag groups and their tags.
+        """
+        if self.status.running:
+            return False
+        if include_tag_groups is None:
+            include_tag_groups = self.include_tag_groups
+        # set before the task starts, so a second call does not start another run
+        self.status.running = True
+        self._run_task = asyncio.create_task(
+            self.run(include_tag_groups, tag_group_ids)
+        )
+        return True
+
+    async def wait(self) -> GhostTagsGCStatus:
+        """Waits for the end of the current run"""
+        if self._run_task is not None:
+            await asyncio.shield(self._run_task)
+        return self.status
+
+    async def run(
+        self, include_tag_groups: bool, tag_group_ids: Optional[List[int]] = None
+    ) -> GhostTagsGCStatus:
+        runs = self.status.runs + 1
+        self.status = GhostTagsGCStatus(
+            running=True, runs=runs, started_at=datetime.now(timezone.utc)
+        )
+        logger.info(f"Ghost tags cleanup #{runs} started")
+        try:
+            async with AsyncSessionLocal(bind=get_async_engine()) as db:
+                tag_service = AsyncTagService(AsyncTagRepository(db))
+                self.status.tags_deleted = await self._delete_batches(
+                    "tags",
+                    tag_service.delete_tags_with_no_entities_batch,
+                    tag_group_ids,
+                )
+                if include_tag_groups:
+                    tag_group_service = AsyncTagGroupService(
+                        AsyncTagGroupRepository(db)
+                    )
+                    self.status.tag_groups_deleted = await self._delete_batches(
+                        "tag groups",
+                        tag_group_service.delete_tag_groups_with_no_tags_batch,
+                        tag_group_ids,
+                    )
+        # pylint: disable=broad-except
+        except Exception as e:
+            logger.error(f"Ghost tags cleanup #{runs} failed - {e}")
+            self.status.error = str(e)
+        finally:
+            self.status.running = False
+            self.status.finished_at = datetime.now(timezone.utc)
+
+        logger.info(
+            f"Ghost tags cleanup #{runs} finished: deleted {self.status.tags_deleted} "
+            f"tags and {self.status.tag_groups_deleted} tag groups "
+            f"in {self.status.batches} batches"
+        )
+        return self.status
+
+    async def _delete_batches(
+        self,
+        name: str,
+        delete_batch: Callable[[int, Optional[List[int]]], Awaitable[int]],
+        tag_group_ids: Optional[List[int]],
+    ) -> int:
+        deleted = 0
+        while True:
+            batch_deleted = await delete_batch(self.batch_size, tag_group_ids)
+            deleted += batch_deleted
+            self.status.batches += 1
+            logger.debug(f"Ghost tags cleanup: deleted {deleted} {name} so far")
+            if batch_deleted < self.batch_size:
+                return deleted
+            await asyncio.sleep(self.batch_pause_seconds)
+
+    def start_periodic(self, interval_seconds: float) -> None:
+        """Starts a run every interval_seconds, until stop()"""
+
+        async def periodic() -> None:
+            while True:
+                await asyncio.sleep(interval_seconds)
+                if self.start():
+                    await self.wait()
+
+        self._periodic_task = asyncio.create_task(periodic())
+        logger.info(f"Ghost tags cleanup scheduled every {interval_seconds}s")
+
+    async def stop(self) -> None:
+        """Cancels the periodic runs and the current run"""
+        for task in (self._periodic_task, self._run_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._periodic_task = self._run_task = None
+        self.status.running = False
+
+
+ghost_tags_collector = GhostTagsCollector(
+    batch_size=int(
+        settings.get("GHOST_TAGS_GC_BATCH_SIZE", DEFAULT_GHOST_TAGS_GC_BATCH_SIZE)
+    ),
+    batch_pause_seconds=float(
+        settings.get(
+            "GHOST_TAGS_GC_BATCH_PAUSE_SECONDS",
+            DEFAULT_GHOST_TAGS_GC_BATCH_PAUSE_SECONDS,
+        )
+    ),
+    include_tag_groups=settings.get_bool(
+        "GHOST_TAGS_GC_TAG_GROUPS", DEFAULT_GHOST_TAGS_GC_TAG_GROUPS
+    ),
+)
+
+
+def ghost_tags_gc_interval_seconds() -> float:
+    return float(
+        settings.get(
+            "GHOST_TAGS_GC_INTERVAL_SECONDS", DEFAULT_GHOST_TAGS_GC_INTERVAL_SECONDS
+        )
+    )
+
+
+def ghost_tags_delete_max_batches() -> int:
+    """The batches POST /tags/delete_tags_with_no_entities runs in the request"""
+    return int(
+        settings.get(
+            "GHOST_TAGS_DELETE_MAX_BATCHES", DEFAULT_GHOST_TAGS_DELETE_MAX_BATCHES
+        )
+    )
@@ -2,7 +2,7 @@
 This module contains the ORM model and DTO models related to the Tags entity
 """
 
-from typing import Optional
+from typing import List, Optional
 from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
 from pydantic import ConfigDict, BaseModel
 from app.api.v1.tag_groups.model import TagGroupResponse
@@ -70,3 +70,20 @@ class TagResponse(BaseModel):
             tag_group_id=tag.tag_group_id,
             tag_group=TagGroupResponse.from_tag_group(tag_group),
         )
+
+    @classmethod
+    def from_tags(
+        cls, tags: List[Tag], tag_group_service: TagGroupService
+    ) -> List["TagResponse"]:
+        """Batched from_tag: fetches the tag groups of all the tags with one query"""
+        tag_groups = tag_group_service.get_many(tag.tag_group_id for tag in tags)
+
+        return [
+            cls(
+                id=tag.id,
+                name=tag.name,
+                tag_group_id=tag.tag_group_id,
+                tag_group=TagGroupResponse.from_tag_group(tag_groups[tag.tag_group_id]),
+            )
+            for tag in tags
+        ]
@@ -2,10 +2,15 @@
 This module contains the repository layer (database operations) for the Tags entity.
 """
 
+from typing import List, Optional
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api.v1.entity_tags.model import EntityTag
 from app.api.v1.tags.model import Tag
+from app.common.base_entity.async_repository import AsyncBaseRepository
 from app.common.base_entity.repository import BaseRepository
 from app.common.utils.logging_utils import get_logger
 
@@ -20,23 +25,39 @@ class TagRepository(BaseRepository[Tag]):
     def __init__(self, db: Session):
         super().__init__(db, Tag)
 
-    def delete_tags_with_no_entities(self) -> int:
+    def delete_tags_with_no_entities(
+        self, batch_size: int, tag_group_ids: Optional[List[int]] = None
+    ) -> int:
+        """
+        Deletes at most batch_size tags that no entity uses, with a single
+        DELETE ... WHERE NOT EXISTS. Tags locked by concurrent transactions
+        (e.g. being assigned to an entity) are skipped, never waited for.
+        tag_group_ids limits the cleanup to the tags of these tag groups.
+        """
+        # a locking CTE is evaluated once, whereas an IN (subquery) with a LIMIT
+        # may be scanned again for every row, deleting more than batch_size rows
+        ghost_tags = select(Tag.id).where(~exists().where(EntityTag.tag_id == Tag.id))
+        if tag_group_ids is not None:
+            ghost_tags = ghost_tags.where(Tag.tag_group_id.in_(tag_group_ids))
         ghost_tags = (
-            self.db.query(Tag)
-            .outerjoin(EntityTag, Tag.id == EntityTag.tag_id)
-            # pylint: disable=singleton-comparison
-            .filter(EntityTag.entity_id == None)  # noqa: E711
-            .all()
+            ghost_tags.order_by(Tag.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .cte("ghost_tags")
         )
-
-        ghost_tag_ids = [tag.id for tag in ghost_tags]
-        logger.debug(
-            f"Deleting {len(ghost_tags)} tags with no entities: {ghost_tag_ids}"
+        result = self.db.execute(
+            delete(Tag)
+            .where(Tag.id == ghost_tags.c.id)
+            .execution_options(synchronize_session=False)
         )
+        logger.debug(f"Deleted {result.rowcount} tags with no entities")
+        return result.rowcount
 
-        count = len(ghost_tags)
-        for tag in ghost_tags:
-            logger.debug(f"Deleting tag {tag}")
-            self.db.delete(tag)
-        self.db.commit()
-        return count
+
+class AsyncTagRepository(AsyncBaseRepository[Tag]):
+    """
+    asyncio variant of TagRepository
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Tag)
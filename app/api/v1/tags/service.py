@@ -3,20 +3,45 @@ This module contains the service layer (business logic) for the Tags entity.
 It uses the repository layer to interact with the database.
 """
 
-from typing import Optional
+from typing import Iterable, List, Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api.v1.tag_groups.model import TagGroup
-from app.api.v1.tags.model import Tag, TagCreateRequest
-from app.api.v1.tags.repository import TagRepository
-from app.common.base_entity.model import AdvancedSearchRequest, AdvancedSearchResponse
-from app.common.database import get_db
+from app.api.v1.tag_groups.repository import TagGroupRepository
+from app.api.v1.tag_groups.service import TagGroupService
+from app.api.v1.tags.model import Tag, TagCreateRequest, TagResponse
+from app.api.v1.tags.repository import AsyncTagRepository, TagRepository
+from app.common.base_entity.async_service import AsyncBaseService
+from app.common.base_entity.model import (
+    AdvancedSearchExplainResponse,
+    AdvancedSearchRequest,
+    AdvancedSearchResponse,
+)
+from app.common.cache import EntityCache
+from app.common.config import settings
+from app.common.constants import (
+    DEFAULT_CACHE_MAX_SIZE,
+    DEFAULT_CACHE_VERSION_CHECK_INTERVAL,
+    DEFAULT_GHOST_TAGS_GC_BATCH_SIZE,
+)
+from app.common.database import get_async_db, get_async_read_db, get_db
 from app.common.utils.logging_utils import get_logger
 from readyapi import Depends
 
 logger = get_logger()
 
+tag_cache: EntityCache[Tag] = EntityCache(
+    Tag,
+    max_size=int(settings.get("CACHE_MAX_SIZE", DEFAULT_CACHE_MAX_SIZE)),
+    version_check_interval=float(
+        settings.get(
+            "CACHE_VERSION_CHECK_INTERVAL", DEFAULT_CACHE_VERSION_CHECK_INTERVAL
+        )
+    ),
+)
+
 
 class TagService:
     """TagService"""
@@ -27,48 +52,226 @@ class TagService:
     def create(self, tag_create: TagCreateRequest) -> Tag:
         # Convert the schema to a model instance
         tag = Tag(**tag_create.model_dump())
-        return self.repository.create(tag)
+        with self.repository.unit_of_work():
+            return self.repository.create(tag)
 
     def get(self, tag_id: int) -> Optional[Tag]:
-        return self.repository.get(tag_id)
+        return self.get_many([tag_id]).get(tag_id)
+
+    def get_many(self, tag_ids: Iterable[int]) -> dict[int, Tag]:
+        """
+        Returns the Tags of all the ids, keyed by id.
+        Served from the cache, the missing ones are fetched with a single query.
+        """
+        db = self.repository.db
+        tag_ids = set(tag_ids)
+        tags = tag_cache.get_many(db, tag_ids)
+
+        missing = tag_ids - tags.keys()
+        if missing:
+            fetched = self.repository.get_many(missing)
+            tag_cache.put(db, fetched)
+            tags.update({tag.id: tag for tag in fetched})
+        return tags
 
     def update(self, tag_id: int, tag_update: TagCreateRequest) -> Optional[Tag]:
-        tag = self.repository.get(tag_id)
-        if tag is None:
-            return None
-        #  what if I have fields I dont want to update (createdOn vs updatedOn)?
-        #  why is there no update in the repository
-        for key, value in tag_update.model_dump().items():
-            setattr(tag, key, value)
+        with self.repository.unit_of_work():
+            tag = self.repository.get(tag_id)
+            if tag is None:
+                return None
+            #  what if I have fields I dont want to update (createdOn vs updatedOn)?
+            #  why is there no update in the repository
+            for key, value in tag_update.model_dump().items():
+                setattr(tag, key, value)
 
-        return self.repository.create(tag)
+            updated = self.repository.create(tag)
+        tag_cache.invalidate()
+        return updated
 
     def delete(self, tag_id: int) -> int:
-        return self.repository.delete_by_id(tag_id)
+        with self.repository.unit_of_work():
+            deleted = self.repository.delete_by_id(tag_id)
+        tag_cache.invalidate()
+        return deleted
 
     def advanced_search(
         self, search_req: AdvancedSearchRequest
     ) -> AdvancedSearchResponse[Tag]:
         return self.repository.advanced_search(search_req)
 
+    def explain_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchExplainResponse:
+        return self.repository.explain_search(search_req)
+
     def find_by_unique_fields(self, field: str, value: str) -> Optional[Tag]:
-        return self.repository.find_by_unique_field(field, value)
+        if field == "name":
+            tag = tag_cache.get_by_name(self.repository.db, value)
+            if tag is not None:
+                return tag
+
+        tag = self.repository.find_by_unique_field(field, value)
+        tag_cache.put(self.repository.db, [tag])
+        return tag
 
     def find_by_name_or_create(self, name: str, tag_group: TagGroup) -> Tag:
         tag = self.find_by_unique_fields("name", name)
 
         if not tag:
             logger.debug(f"Tag {name} does not exist. Creating new tag")
-            tag = self.create(TagCreateRequest(name=name, tag_group_id=tag_group.id))
-        elif tag.tag_group_id != tag_group.id:
+            with self.repository.unit_of_work():
+                [tag] = self.repository.find_or_create_many(
+                    "name", [{"name": name, "tag_group_id": tag_group.id}]
+                )
+
+        if tag.tag_group_id != tag_group.id:
             raise ValueError(f"Tag {name} already exists in another group")
 
         return tag
 
-    def delete_tags_with_no_entities(self) -> int:
-        return self.repository.delete_tags_with_no_entities()
+    def find_by_names_or_create(
+        self, tag_groups: dict[str, TagGroup]
+    ) -> dict[str, Tag]:
+        """
+        Set based variant of find_by_name_or_create.
+        tag_groups maps each tag name to the group it should be created in.
+        Existing tags are returned as they are, even if they belong to another group,
+        it is up to the caller to report the mismatch.
+        Safe to run concurrently with other callers creating the same names.
+        Does not commit, the caller owns the transaction.
+        """
+        tags = tag_cache.get_many_by_name(self.repository.db, tag_groups.keys())
+
+        missing = [name for name in tag_groups if name not in tags]
+        if missing:
+            created = self.repository.find_or_create_many(
+                "name",
+                [
+                    {"name": name, "tag_group_id": tag_groups[name].id}
+                    for name in missing
+                ],
+            )
+            tag_cache.put(self.repository.db, created)
+            tags.update({tag.name: tag for tag in created})
+        return tags
+
+    def delete_tags_with_no_entities_batch(
+        self, batch_size: int, tag_group_ids: Optional[List[int]] = None
+    ) -> int:
+        """Deletes a batch of tags no entity uses, in its own transaction"""
+        with self.repository.unit_of_work():
+            deleted = self.repository.delete_tags_with_no_entities(
+                batch_size, tag_group_ids
+            )
+        if deleted:
+            tag_cache.invalidate()
+        return deleted
+
+    def delete_tags_with_no_entities(
+        self,
+        batch_size: int = DEFAULT_GHOST_TAGS_GC_BATCH_SIZE,
+        max_batches: Optional[int] = None,
+        tag_group_ids: Optional[List[int]] = None,
+    ) -> int:
+        """
+        Deletes the tags no entity uses, batch after batch, until none is left
+        or max_batches batches ran. Each batch is a short transaction, so no
+        tag is locked for the whole cleanup.
+        """
+        deleted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            batch_deleted = self.delete_tags_with_no_entities_batch(
+                batch_size, tag_group_ids
+            )
+            deleted += batch_deleted
+            batches += 1
+            if batch_deleted < batch_size:
+                break
+        return deleted
 
 
 def get_tag_service(db: Session = Depends(get_db)) -> TagService:
     repository = TagRepository(db)
     return TagService(repository)
+
+
+class AsyncTagService(AsyncBaseService[TagService]):
+    """asyncio variant of TagService"""
+
+    def __init__(self, repository: AsyncTagRepository):
+        super().__init__(repository, lambda db: TagService(TagRepository(db)))
+
+    async def create(self, tag_create: TagCreateRequest) -> Tag:
+        return await self.run_sync(TagService.create, tag_create)
+
+    async def get(self, tag_id: int) -> Optional[Tag]:
+        return await self.run_sync(TagService.get, tag_id)
+
+    async def get_many(self, tag_ids: Iterable[int]) -> dict[int, Tag]:
+        return await self.run_sync(TagService.get_many, list(tag_ids))
+
+    async def update(self, tag_id: int, tag_update: TagCreateRequest) -> Optional[Tag]:
+        return await self.run_sync(TagService.update, tag_id, tag_update)
+
+    async def delete(self, tag_id: int) -> int:
+        return await self.run_sync(TagService.delete, tag_id)
+
+    async def advanced_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchResponse[Tag]:
+        return await self.repository.advanced_search(search_req)
+
+    async def explain_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchExplainResponse:
+        return await self.repository.explain_search(search_req)
+
+    async def find_by_unique_fields(self, field: str, value: str) -> Optional[Tag]:
+        return await self.run_sync(TagService.find_by_unique_fields, field, value)
+
+    async def delete_tags_with_no_entities_batch(
+        self, batch_size: int, tag_group_ids: Optional[List[int]] = None
+    ) -> int:
+        return await self.run_sync(
+            TagService.delete_tags_with_no_entities_batch, batch_size, tag_group_ids
+        )
+
+    async def delete_tags_with_no_entities(
+        self,
+        batch_size: int = DEFAULT_GHOST_TAGS_GC_BATCH_SIZE,
+        max_batches: Optional[int] = None,
+        tag_group_ids: Optional[List[int]] = None,
+    ) -> int:
+        return await self.run_sync(
+            TagService.delete_tags_with_no_entities,
+            batch_size,
+            max_batches,
+            tag_group_ids,
+        )
+
+    async def to_responses(self, tags: List[Tag]) -> List[TagResponse]:
+        """TagResponse.from_tags, with the tag groups read on the same session"""
+
+        def to_responses(service: TagService) -> List[TagResponse]:
+            tag_group_service = TagGroupService(
+                TagGroupRepository(service.repository.db)
+            )
+            return TagResponse.from_tags(tags, tag_group_service)
+
+        return await self.run_sync(to_responses)
+
+
+async def get_async_tag_service(
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncTagService:
+    repository = AsyncTagRepository(db)
+    return AsyncTagService(repository)
+
+
+async def get_async_read_tag_service(
+    db: AsyncSession = Depends(get_async_read_db),
+) -> AsyncTagService:
+    """AsyncTagService of read only requests, served by the read replicas"""
+    repository = AsyncTagRepository(db)
+    return AsyncTagService(repository)
@@ -0,0 +1,168 @@
+"""AsyncBaseRepository"""
+
+from typing import Iterable, List, Optional, Type, TypeVar
+
+from sqlalchemy import Select, delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import MultipleResultsFound
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.common.base_entity.explain import (
+    estimate_row_count,
+    estimate_table_row_count,
+    explain_search_statement,
+)
+from app.common.base_entity.model import (
+    AdvancedSearchExplainResponse,
+    AdvancedSearchRequest,
+    AdvancedSearchResponse,
+    CountMode,
+)
+from app.common.base_entity.statements import BaseStatements
+from app.common.base_entity.unit_of_work import AsyncUnitOfWork
+from app.common.slow_statements import search_request_context
+
+T = TypeVar("T")
+
+
+class AsyncBaseRepository(BaseStatements[T]):
+    """
+    asyncio variant of BaseRepository, on an AsyncSession.
+    Builds the same statements as BaseRepository.
+    """
+
+    def __init__(self, db: AsyncSession, model: Type[T]):
+        self.db = db
+        self.model = model
+
+    def unit_of_work(self) -> AsyncUnitOfWork:
+        return AsyncUnitOfWork(self.db)
+
+    async def create(self, entity: T) -> T:
+        """See BaseRepository.create, flushed, not committed"""
+        self.db.add(entity)
+        await self.db.flush([entity])
+        return entity
+
+    async def find_or_create_many(self, field: str, rows: List[dict]) -> List[T]:
+        """
+        Concurrency safe get-or-create of many rows by a unique field,
+        see BaseRepository.find_or_create_many. Does not commit.
+        """
+        if not self._is_unique_field(field):
+            raise ValueError(f"The field '{field}' is not unique.")
+
+        # a deterministic insert order avoids deadlocks between concurrent callers
+        rows = sorted(rows, key=lambda row: row[field])
+        found = {
+            getattr(entity, field): entity
+            for entity in await self.find_by_field_values(
+                field, [row[field] for row in rows]
+            )
+        }
+
+        missing = [row for row in rows if row[field] not in found]
+        if missing:
+            stmt = (
+                pg_insert(self.model)
+                .on_conflict_do_nothing(index_elements=[field])
+                .returning(self.model)
+            )
+            for entity in await self.db.scalars(stmt, missing):
+                found[getattr(entity, field)] = entity
+
+            conflicted = [row[field] for row in missing if row[field] not in found]
+            for entity in await self.find_by_field_values(field, conflicted):
+                found[getattr(entity, field)] = entity
+
+        return list(found.values())
+
+    async def get(self, entity_id: int) -> Optional[T]:
+        return await self.db.get(self.model, entity_id)
+
+    async def get_many(self, entity_ids: Iterable[int]) -> List[T]:
+        return await self.find_by_field_values("id", set(entity_ids))
+
+    async def find_by_field_values(self, field: str, values: Iterable) -> List[T]:
+        """Returns all the rows whose field value is one of values (single IN query)"""
+        values = list(values)
+        if not values:
+            return []
+
+        if not hasattr(self.model, field):
+            raise ValueError(f"Invalid field: {field}")
+
+        column = self._column(field)
+        return list(await self.db.scalars(self._select().where(column.in_(values))))
+
+    async def commit(self) -> None:
+        await self.db.commit()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
+
+    async def delete(self, entity: T) -> T:
+        await self.db.delete(entity)
+        await self.db.flush([entity])
+        return entity
+
+    async def delete_by_id(self, row_id: int) -> int:
+        result = await self.db.execute(
+            delete(self.model).where(self.model.id == row_id)
+        )
+        return result.rowcount
+
+    async def find_by_unique_field(self, field: str, value: str) -> Optional[T]:
+        if not self._is_unique_field(field):
+            raise ValueError(f"The field '{field}' is not unique.")
+
+        try:
+            result = await self.db.scalars(
+                select(self.model).where(getattr(self.model, field) == value)
+            )
+            return result.one_or_none()
+        except MultipleResultsFound as e:
+            raise ValueError(
+                f"Multiple records found for field '{field}' with value '{value}'"
+            ) from e
+
+    async def advanced_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchResponse[T]:
+        statement = self.search_statement(search_req)
+        order_keys = self._order_keys(search_req)
+
+        with search_request_context(search_req):
+            total_count = await self._count(statement, search_req)
+            results = list(
+                await self.db.scalars(
+                    self._page_statement(statement, search_req, order_keys)
+                )
+            )
+        return self._page_response(results, search_req, order_keys, total_count)
+
+    async def explain_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchExplainResponse:
+        statement = self._page_statement(
+            self.search_statement(search_req), search_req, self._order_keys(search_req)
+        )
+        return await self.db.run_sync(explain_search_statement, statement)
+
+    async def _count(
+        self, statement: Select, search_req: AdvancedSearchRequest
+    ) -> Optional[int]:
+        if search_req.count_mode == CountMode.NONE:
+            return None
+
+        if search_req.count_mode == CountMode.ESTIMATED:
+            # the EXPLAIN helpers run on the sync session of the AsyncSession
+            if not search_req.filters:
+                estimate = await self.db.run_sync(
+                    estimate_table_row_count, self.model.__tablename__
+                )
+                if estimate >= 0:
+                    return estimate
+            return await self.db.run_sync(estimate_row_count, statement.order_by(None))
+
+        return await self.db.scalar(self._count_statement(statement))
@@ -0,0 +1,44 @@
+"""AsyncBaseService"""
+
+from typing import Any, Callable, Generic, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.common.base_entity.async_repository import AsyncBaseRepository
+from app.common.base_entity.unit_of_work import AsyncUnitOfWork
+
+S = TypeVar("S")
+R = TypeVar("R")
+
+
+class AsyncBaseService(Generic[S]):
+    """
+    asyncio variant of a sync service.
+    Simple reads go through the async repository. The business logic stays in the
+    sync service, which runs on the sync session of the AsyncSession
+    (AsyncSession.run_sync): its statements are still awaited on the event loop,
+    so no worker thread is held while waiting for the database.
+    """
+
+    def __init__(
+        self,
+        repository: AsyncBaseRepository,
+        service_factory: Callable[[Session], S],
+    ):
+        self.repository = repository
+        self.service_factory = service_factory
+
+    def unit_of_work(self) -> AsyncUnitOfWork:
+        """
+        Groups several calls in a single transaction: the sync services called
+        inside it flush their changes, the unit of work commits them once.
+        """
+        return self.repository.unit_of_work()
+
+    async def run_sync(self, method: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        """Calls method(sync_service, *args, **kwargs) on the sync session"""
+
+        def run(db: Session) -> R:
+            return method(self.service_factory(db), *args, **kwargs)
+
+        return await self.repository.db.run_sync(run)
@@ -0,0 +1,106 @@
+"""
+Helpers to get the Postgres plan of a SQLAlchemy statement
+"""
+
+import json
+from typing import Any, Iterator
+
+from sqlalchemy import Select, text
+from sqlalchemy.engine import Compiled
+from sqlalchemy.orm import Session
+
+from app.common.base_entity.model import AdvancedSearchExplainResponse
+
+
+def _compile(db: Session, statement: Select) -> Compiled:
+    return statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True}
+    )
+
+
+def _explain_compiled(db: Session, compiled: Compiled) -> dict[str, Any]:
+    params = compiled.params
+    if compiled.positiontup:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    [plan] = (
+        db.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+        .scalar()
+    )
+    return plan["Plan"]
+
+
+def explain_statement(db: Session, statement: Select) -> dict[str, Any]:
+    """Returns the JSON plan of the statement (the "Plan" node), without running it"""
+    return _explain_compiled(db, _compile(db, statement))
+
+
+def _plan_nodes(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def explain_search_statement(
+    db: Session, statement: Select
+) -> AdvancedSearchExplainResponse:
+    """The SQL, the plan and the index usage of an advanced search statement"""
+    compiled = _compile(db, statement)
+    plan = _explain_compiled(db, compiled)
+    nodes = list(_plan_nodes(plan))
+    indexes = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+    return AdvancedSearchExplainResponse(
+        sql=str(compiled),
+        parameters=compiled.params,
+        plan=plan,
+        estimated_rows=int(plan["Plan Rows"]),
+        startup_cost=plan["Startup Cost"],
+        total_cost=plan["Total Cost"],
+        uses_indexes=bool(indexes),
+        indexes=indexes,
+        sequential_scans=sorted(
+            {node["Relation Name"] for node in nodes if node["Node Type"] == "Seq Scan"}
+        ),
+    )
+
+
+def explain_analyze_sql(dbapi_connection, statement: str, parameters: Any) -> Any:
+    """
+    Runs the driver level statement again under EXPLAIN (ANALYZE, BUFFERS), on
+    a cursor of its own, in a savepoint, and returns its JSON plan
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT explain_analyze")
+        try:
+            cursor.execute(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+            )
+            [plan] = cursor.fetchone()
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT explain_analyze")
+            cursor.execute("RELEASE SAVEPOINT explain_analyze")
+    finally:
+        cursor.close()
+    # asyncpg returns the json column as a string
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def estimate_row_count(db: Session, statement: Select) -> int:
+    """The number of rows the planner expects the statement to return"""
+    return int(explain_statement(db, statement)["Plan Rows"])
+
+
+def estimate_table_row_count(db: Session, table_name: str) -> int:
+    """
+    The number of rows of the table according to the last ANALYZE / VACUUM
+    (pg_class.reltuples), or -1 if the table was never analyzed.
+    """
+    reltuples = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table_name},
+    ).scalar()
+    return int(reltuples) if reltuples is not None else -1
@@ -3,7 +3,7 @@ This module contains models that are used across multiple entities.
 """
 
 from enum import Enum
-from typing import Optional, TypeVar, Generic, List
+from typing import Any, Optional, TypeVar, Generic, List
 from pydantic import ConfigDict, BaseModel
 
 from app.common.constants import MAX_SEARCH_RESULTS
@@ -41,6 +41,15 @@ class Filter(BaseModel):
     # values operator is "or"
 
 
+class CountMode(str, Enum):
+    # count(*) of all the matching rows
+    EXACT = "exact"
+    # the planner estimate, cheap but approximate
+    ESTIMATED = "estimated"
+    # no count at all, use has_more to know if there is a next page
+    NONE = "none"
+
+
 class LogicOperator(str, Enum):
     AND = "and"
     OR = "or"
@@ -55,6 +64,9 @@ class AdvancedSearchRequest(BaseModel):
     sorts: Optional[list[Sort]] = []
     limit: Optional[int] = MAX_SEARCH_RESULTS
     offset: Optional[int] = 0
+    # next_cursor of the previous page, for keyset pagination (replaces offset)
+    cursor: Optional[str] = None
+    count_mode: Optional[CountMode] = CountMode.EXACT
 
 
 # Define a generic type variable
@@ -65,10 +77,30 @@ class AdvancedSearchResponse(BaseModel, Generic[T]):
     results: List[T]
     count: int
     offset: int
-    count_total: int
+    # None when the request count_mode is "none"
+    count_total: Optional[int] = None
+    has_more: Optional[bool] = None
+    # pass as the cursor of the next request to get the next page
+    next_cursor: Optional[str] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
+class AdvancedSearchExplainResponse(BaseModel):
+    """The SQL and the Postgres plan of an advanced search page, which is not run"""
+
+    sql: str
+    parameters: dict[str, Any]
+    # the "Plan" node of EXPLAIN (FORMAT JSON)
+    plan: dict[str, Any]
+    estimated_rows: int
+    startup_cost: float
+    total_cost: float
+    # the indexes the plan scans, and the tables it reads sequentially
+    uses_indexes: bool
+    indexes: List[str]
+    sequential_scans: List[str]
+
+
 class DeleteResponse(BaseModel):
     count: int
 
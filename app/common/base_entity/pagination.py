@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination helpers for advanced_search.
+
+A cursor holds the sort keys of the last row of a page. The next page starts
+right after that row, so its cost does not depend on how deep it is, unlike
+offset pagination that scans and discards all the skipped rows.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List, Tuple
+
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.common.base_entity.model import SortType
+
+# (column, sort direction) pairs, in ORDER BY order
+OrderKeys = List[Tuple[InstrumentedAttribute, SortType]]
+
+
+def encode_cursor(order_keys: OrderKeys, row: Any) -> str:
+    payload = {
+        "keys": [[column.key, sort_type.value] for column, sort_type in order_keys],
+        "values": [getattr(row, column.key) for column, _ in order_keys],
+    }
+    return base64.urlsafe_b64encode(
+        json.dumps(payload, default=str).encode("utf-8")
+    ).decode("ascii")
+
+
+def decode_cursor(order_keys: OrderKeys, cursor: str) -> List[Any]:
+    """Returns the sort key values of the cursor, validated against the order keys"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        keys, values = payload["keys"], payload["values"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if keys != [[column.key, sort_type.value] for column, sort_type in order_keys]:
+        raise ValueError("The cursor does not match the sorts of the request")
+
+    return values
+
+
+def keyset_clause(order_keys: OrderKeys, values: List[Any]):
+    """
+    Builds the predicate of the rows that come after values in the order keys order.
+    When all the keys have the same direction it is a single row comparison
+    (e.g. (entity_id, tag_id) > (:v1, :v2)) that Postgres can match with an index.
+    """
+    for column, _ in order_keys:
+        if column.nullable:
+            raise ValueError(
+                f"Cursor pagination is not supported when sorting by '{column.key}'"
+            )
+
+    columns = [column for column, _ in order_keys]
+    sort_types = {sort_type for _, sort_type in order_keys}
+    if len(sort_types) == 1:
+        if sort_types.pop() == SortType.ASC:
+            return tuple_(*columns) > tuple_(*values)
+        return tuple_(*columns) < tuple_(*values)
+
+    # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+    clauses = []
+    for i, (column, sort_type) in enumerate(order_keys):
+        after = column > values[i] if sort_type == SortType.ASC else column < values[i]
+        clauses.append(and_(*(columns[j] == values[j] for j in range(i)), after))
+    return or_(*clauses)
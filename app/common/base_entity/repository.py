@@ -1,37 +1,110 @@
 """BaseRepository"""
 
-from sqlalchemy import asc, desc, and_, or_, inspect, true
+from sqlalchemy import Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import MultipleResultsFound, NoResultFound
 from sqlalchemy.orm import Session
-from typing import Type, TypeVar, Generic, List
+from typing import Type, TypeVar, List, Iterable, Optional
 
 from app.common.base_entity.model import (
+    AdvancedSearchExplainResponse,
     FilterType,
-    SortType,
     AdvancedSearchResponse,
     AdvancedSearchRequest,
-    LogicOperator,
+    CountMode,
 )
+from app.common.base_entity.explain import (
+    estimate_row_count,
+    estimate_table_row_count,
+    explain_search_statement,
+)
+from app.common.base_entity.statements import BaseStatements
+from app.common.base_entity.unit_of_work import UnitOfWork
+from app.common.slow_statements import search_request_context
 
 T = TypeVar("T")
 
 
-class BaseRepository(Generic[T]):
-    """Provides methods to perform CRUD operations"""
+class BaseRepository(BaseStatements[T]):
+    """
+    Provides methods to perform CRUD operations.
+    The writes are flushed, not committed: the unit of work commits them.
+    """
 
     def __init__(self, db: Session, model: Type[T]):
         self.db = db
         self.model = model
 
+    def unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(self.db)
+
     def create(self, entity: T) -> T:
+        """
+        Inserts (or updates) the entity. The generated columns come back with the
+        INSERT ... RETURNING of the flush, no SELECT is needed.
+        """
         self.db.add(entity)
-        self.db.commit()
-        self.db.refresh(entity)
+        self.db.flush([entity])
         return entity
 
+    def find_or_create_many(self, field: str, rows: List[dict]) -> List[T]:
+        """
+        Concurrency safe get-or-create of many rows by a unique field.
+        The existing rows are selected, the missing ones are inserted with a single
+        INSERT ... ON CONFLICT DO NOTHING RETURNING, and the rows that were inserted
+        meanwhile by a concurrent transaction are selected again.
+        Does not commit, so it can take part in a larger transaction.
+        """
+        if not self._is_unique_field(field):
+            raise ValueError(f"The field '{field}' is not unique.")
+
+        # a deterministic insert order avoids deadlocks between concurrent callers
+        rows = sorted(rows, key=lambda row: row[field])
+        found = {
+            getattr(entity, field): entity
+            for entity in self.find_by_field_values(field, [row[field] for row in rows])
+        }
+
+        missing = [row for row in rows if row[field] not in found]
+        if missing:
+            stmt = (
+                pg_insert(self.model)
+                .on_conflict_do_nothing(index_elements=[field])
+                .returning(self.model)
+            )
+            for entity in self.db.scalars(stmt, missing):
+                found[getattr(entity, field)] = entity
+
+            conflicted = [row[field] for row in missing if row[field] not in found]
+            for entity in self.find_by_field_values(field, conflicted):
+                found[getattr(entity, field)] = entity
+
+        return list(found.values())
+
     def get(self, entity_id: int) -> T:
         return self.db.query(self.model).filter(self.model.id == entity_id).first()
 
+    def get_many(self, entity_ids: Iterable[int]) -> List[T]:
+        return self.find_by_field_values("id", set(entity_ids))
+
+    def find_by_field_values(self, field: str, values: Iterable) -> List[T]:
+        """Returns all the rows whose field value is one of values (single IN query)"""
+        values = list(values)
+        if not values:
+            return []
+
+        if not hasattr(self.model, field):
+            raise ValueError(f"Invalid field: {field}")
+
+        column = self._column(field)
+        return list(self.db.scalars(self._select().where(column.in_(values))))
+
+    def commit(self) -> None:
+        self.db.commit()
+
+    def rollback(self) -> None:
+        self.db.rollback()
+
     # what if id is not integer?
     def search(
         self,
@@ -44,35 +117,35 @@ class BaseRepository(Generic[T]):
             value = value.lower()
 
         if field is None:
-            return self.db.query(self.model).all()
+            return list(self.db.scalars(self._select()))
 
         if not hasattr(self.model, field):
             raise ValueError(f"Invalid field: {field}")
 
-        column = getattr(self.model, field)
+        column = self._column(field)
 
-        if filter_type == FilterType.EQUALS:
-            return self.db.query(self.model).filter(column == value).all()
-        elif filter_type == FilterType.STARTS_WITH:
-            return self.db.query(self.model).filter(column.ilike(f"{value}%")).all()
-        elif filter_type == FilterType.CONTAINS:
-            return self.db.query(self.model).filter(column.ilike(f"%{value}%")).all()
-        else:
+        if filter_type not in (
+            FilterType.EQUALS,
+            FilterType.STARTS_WITH,
+            FilterType.CONTAINS,
+        ):
             raise ValueError(
                 "Invalid search_type. Use 'exact', 'starts-with', or 'contains'."
             )
 
+        return list(
+            self.db.scalars(
+                self._select().where(self._value_clause(column, filter_type, value))
+            )
+        )
+
     def delete(self, entity: T) -> T:
         self.db.delete(entity)
-        self.db.commit()
+        self.db.flush([entity])
         return entity
 
     def delete_by_id(self, row_id: int) -> int:
-        deleted_rows = (
-            self.db.query(self.model).filter(self.model.id == row_id).delete()
-        )
-        self.db.commit()
-        return deleted_rows
+        return self.db.query(self.model).filter(self.model.id == row_id).delete()
 
     def find_by_unique_field(self, field: str, value: str) -> T:
         if not self._is_unique_field(field):
@@ -91,53 +164,39 @@ class BaseRepository(Generic[T]):
         except NoResultFound:
             return None
 
-    def _is_unique_field(self, field: str) -> bool:
-        """Check if a field has a unique constraint."""
-        mapper = inspect(self.model)
-        for column in mapper.columns:
-            if column.name == field and column.unique:
-                return True
-        return False
-
     def advanced_search(
         self, search_req: AdvancedSearchRequest
     ) -> AdvancedSearchResponse[T]:
-        query = self.db.query(self.model)
-
-        # todo: add going over all the values, and adding them with or condition
-        filter_clauses = []
-        for f in search_req.filters:
-            column = getattr(self.model, f.field)
-            value_clauses = []
-            for value in f.values:
-                if f.filter_type == FilterType.EQUALS:
-                    value_clauses.append(column == value.lower())
-                elif f.filter_type == FilterType.STARTS_WITH:
-                    value_clauses.append(column.ilike(f"{value.lower()}%"))
-                elif f.filter_type == FilterType.CONTAINS:
-                    value_clauses.append(column.ilike(f"%{value.lower()}%"))
-
-            if value_clauses:
-                filter_clauses.append(or_(*value_clauses))
-
-        if search_req.filters_operator == LogicOperator.AND:
-            query = query.filter(and_(true(), *filter_clauses))
-        else:
-            query = query.filter(or_(*filter_clauses))
-
-        for sort in search_req.sorts:
-            column = getattr(self.model, sort.field)
-            if sort.sort_type == SortType.ASC:
-                query = query.order_by(asc(column))
-            else:
-                query = query.order_by(desc(column))
-
-        total_count = query.count()
-        results = query.offset(search_req.offset).limit(search_req.limit).all()
-
-        return AdvancedSearchResponse[T](
-            results=results,
-            count=len(results),
-            offset=search_req.offset,
-            count_total=total_count,
+        statement = self.search_statement(search_req)
+        order_keys = self._order_keys(search_req)
+
+        with search_request_context(search_req):
+            total_count = self._count(statement, search_req)
+            results = list(
+                self.db.scalars(self._page_statement(statement, search_req, order_keys))
+            )
+        return self._page_response(results, search_req, order_keys, total_count)
+
+    def explain_search(
+        self, search_req: AdvancedSearchRequest
+    ) -> AdvancedSearchExplainResponse:
+        """The plan of the page the search would return, without running it"""
+        statement = self._page_statement(
+            self.search_statement(search_req), search_req, self._order_keys(search_req)
         )
+        return explain_search_statement(self.db, statement)
+
+    def _count(
+        self, statement: Select, search_req: AdvancedSearchRequest
+    ) -> Optional[int]:
+        if search_req.count_mode == CountMode.NONE:
+            return None
+
+        if search_req.count_mode == CountMode.ESTIMATED:
+            if not search_req.filters:
+                estimate = estimate_table_row_count(self.db, self.model.__tablename__)
+                if estimate >= 0:
+                    return estimate
+            return estimate_row_count(self.db, statement.order_by(None))
+
+        return self.db.scalar(self._count_statement(statement))
@@ -0,0 +1,192 @@
+"""
+SQL statements of the advanced search, shared by the sync and the asyncio repositories
+"""
+
+from typing import Generic, List, Optional, Type, TypeVar
+
+from sqlalchemy import (
+    Select,
+    String,
+    and_,
+    any_,
+    asc,
+    bindparam,
+    desc,
+    func,
+    inspect,
+    or_,
+    select,
+    true,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.common.base_entity.model import (
+    AdvancedSearchRequest,
+    AdvancedSearchResponse,
+    Filter,
+    FilterType,
+    LogicOperator,
+    SortType,
+)
+from app.common.base_entity.pagination import (
+    OrderKeys,
+    decode_cursor,
+    encode_cursor,
+    keyset_clause,
+)
+
+T = TypeVar("T")
+
+
+def _coerce(column, value: str):
+    """Converts a filter value (always a string) to the python type of the column"""
+    python_type = column.type.python_type
+    if python_type is str or value is None:
+        return value
+    return python_type(value)
+
+
+class BaseStatements(Generic[T]):
+    """Builds the statements of a model, without executing them"""
+
+    model: Type[T]
+
+    @staticmethod
+    def _value_clause(column, filter_type: FilterType, value: str):
+        """
+        Builds the predicate of a single filter value, in the form that matches
+        the search indexes of the searched columns.
+        """
+        if filter_type == FilterType.EQUALS:
+            return column == _coerce(column, value)
+        if filter_type == FilterType.STARTS_WITH:
+            # lower(column) text_pattern_ops btree index
+            return func.lower(column).like(f"{value.lower()}%")
+        if filter_type == FilterType.CONTAINS:
+            # column gin_trgm_ops index (pg_trgm handles ILIKE)
+            return column.ilike(f"%{value}%")
+        return None
+
+    @staticmethod
+    def _values_clause(column, filter_type: FilterType, values: List[str]):
+        """
+        Builds the predicate of a filter with many values as a single comparison
+        with an array bound parameter (column = ANY(:values)), so the SQL text is
+        the same whatever the number of values is.
+        """
+        if filter_type == FilterType.EQUALS:
+            values = [_coerce(column, value) for value in values]
+            return column == any_(bindparam(None, values, type_=ARRAY(column.type)))
+
+        if filter_type == FilterType.STARTS_WITH:
+            patterns = [f"{value}%" for value in values]
+        elif filter_type == FilterType.CONTAINS:
+            patterns = [f"%{value}%" for value in values]
+        else:
+            return None
+        # ILIKE ANY can use the column gin_trgm_ops index (a bitmap scan per pattern)
+        return column.ilike(any_(bindparam(None, patterns, type_=ARRAY(String))))
+
+    def _is_unique_field(self, field: str) -> bool:
+        """Check if a field has a unique constraint."""
+        mapper = inspect(self.model)
+        for column in mapper.columns:
+            if column.name == field and column.unique:
+                return True
+        return False
+
+    def _select(self) -> Select:
+        """The select the searches start from"""
+        return select(self.model)
+
+    def _column(self, field: str):
+        """The column that the filters and the sorts of a field apply to"""
+        return getattr(self.model, field)
+
+    def _filter_clause(self, f: Filter):
+        """The predicate of a filter, None when it filters nothing"""
+        column = self._column(f.field)
+        values = [value.lower() for value in f.values]
+        if len(values) == 1:
+            return self._value_clause(column, f.filter_type, values[0])
+        if values:
+            return self._values_clause(column, f.filter_type, values)
+        return None
+
+    def search_statement(self, search_req: AdvancedSearchRequest) -> Select:
+        """The filtered and sorted select of an advanced search, before paging"""
+        statement = self._select()
+
+        filter_clauses = []
+        for f in search_req.filters:
+            clause = self._filter_clause(f)
+            if clause is not None:
+                filter_clauses.append(clause)
+
+        if search_req.filters_operator == LogicOperator.AND:
+            statement = statement.where(and_(true(), *filter_clauses))
+        else:
+            statement = statement.where(or_(*filter_clauses))
+
+        # the primary key breaks ties, so the order (and the cursor) is deterministic
+        for column, sort_type in self._order_keys(search_req):
+            if sort_type == SortType.ASC:
+                statement = statement.order_by(asc(column))
+            else:
+                statement = statement.order_by(desc(column))
+
+        return statement
+
+    @staticmethod
+    def _count_statement(statement: Select) -> Select:
+        # pylint: disable=not-callable
+        return select(func.count()).select_from(statement.order_by(None).subquery())
+
+    @staticmethod
+    def _page_statement(
+        statement: Select, search_req: AdvancedSearchRequest, order_keys: OrderKeys
+    ) -> Select:
+        if search_req.cursor:
+            # the cursor replaces the offset
+            statement = statement.where(
+                keyset_clause(order_keys, decode_cursor(order_keys, search_req.cursor))
+            )
+        else:
+            statement = statement.offset(search_req.offset)
+
+        # one extra row tells whether there is a next page, without counting
+        if search_req.limit is not None:
+            statement = statement.limit(search_req.limit + 1)
+        return statement
+
+    @staticmethod
+    def _page_response(
+        results: List[T],
+        search_req: AdvancedSearchRequest,
+        order_keys: OrderKeys,
+        total_count: Optional[int],
+    ) -> AdvancedSearchResponse[T]:
+        has_more = search_req.limit is not None and len(results) > search_req.limit
+        next_cursor = None
+        if has_more:
+            results = results[: search_req.limit]
+            next_cursor = encode_cursor(order_keys, results[-1])
+
+        return AdvancedSearchResponse[T](
+            results=results,
+            count=len(results),
+            offset=search_req.offset,
+            count_total=total_count,
+            has_more=has_more,
+            next_cursor=next_cursor,
+        )
+
+    def _order_keys(self, search_req: AdvancedSearchRequest) -> OrderKeys:
+        order_keys = [
+            (self._column(sort.field), sort.sort_type) for sort in search_req.sorts
+        ]
+        sorted_fields = {sort.field for sort in search_req.sorts}
+        for column in inspect(self.model).primary_key:
+            if column.key not in sorted_fields:
+                order_keys.append((getattr(self.model, column.key), SortType.ASC))
+        return order_keys
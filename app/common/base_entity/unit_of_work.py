@@ -0,0 +1,94 @@
+"""
+UnitOfWork: the transaction of a request or of a batch.
+
+The repositories only flush their changes (INSERT ... RETURNING, UPDATE, DELETE),
+they never commit. A unit of work commits once, when the outermost unit of work
+of the session exits, and rolls back when it exits with an error.
+Units of work nest: an inner unit of work joins the outer one, so a service
+method can be called on its own (and commit) or as a part of a larger batch.
+Savepoints isolate the errors of single items of a batch.
+"""
+
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Session.info key
+_DEPTH_KEY = "unit_of_work_depth"
+
+
+def _enter(info: dict) -> bool:
+    """Returns whether the unit of work is the outermost one of the session"""
+    info[_DEPTH_KEY] = info.get(_DEPTH_KEY, 0) + 1
+    return info[_DEPTH_KEY] == 1
+
+
+def _exit(info: dict) -> None:
+    info[_DEPTH_KEY] -= 1
+    if not info[_DEPTH_KEY]:
+        del info[_DEPTH_KEY]
+
+
+class UnitOfWork:
+    """Unit of work of a Session"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.outermost = False
+
+    def __enter__(self) -> "UnitOfWork":
+        self.outermost = _enter(self.db.info)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _exit(self.db.info)
+        if exc_type is not None:
+            # the outer unit of work (or a savepoint) decides what to roll back
+            if self.outermost:
+                self.db.rollback()
+        elif self.outermost:
+            self.db.commit()
+        else:
+            self.db.flush()
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """
+        Runs the block in a SAVEPOINT: when it raises, only the changes of the block
+        are rolled back, and the error is raised again for the caller to report.
+        """
+        with self.db.begin_nested():
+            yield
+
+
+class AsyncUnitOfWork:
+    """
+    Unit of work of an AsyncSession. Shares its depth with the UnitOfWork of the
+    sync session, so the sync services called through run_sync join it.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.outermost = False
+
+    async def __aenter__(self) -> "AsyncUnitOfWork":
+        self.outermost = _enter(self.db.info)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        _exit(self.db.info)
+        if exc_type is not None:
+            if self.outermost:
+                await self.db.rollback()
+        elif self.outermost:
+            await self.db.commit()
+        else:
+            await self.db.flush()
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncIterator[None]:
+        """See UnitOfWork.savepoint"""
+        async with self.db.begin_nested():
+            yield
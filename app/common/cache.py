@@ -0,0 +1,270 @@
+"""
+Process wide cache for small, read mostly tables (tags, tag groups).
+
+Entries are detached copies of the rows, keyed by id and by name.
+Every cached table has a version counter in the cache_versions table, bumped by
+a database trigger whenever rows are updated or deleted (inserts cannot make an
+entry stale, since misses are never cached). Each DB session compares the version
+once with the version of the cache, and clears the cache when it is newer, so
+all replicas stay coherent with a single primary-key lookup per request.
+The version of the cache only moves forward: a session reading an older version
+(e.g. from a lagging read replica) is served uncached, and leaves the cache as is.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Iterable, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import BigInteger, Column, String, event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.common.database import Base
+
+T = TypeVar("T")
+
+# Session.info keys
+_VERSIONS_KEY = "cache_versions"
+_WRITES_KEY = "cache_has_writes"
+_PENDING_KEY = "cache_pending_puts"
+
+
+class CacheVersion(Base):
+    """Version counter of a cached table, bumped by triggers on every change"""
+
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+class CacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class EntityCache(Generic[T]):
+    """
+    Bounded LRU cache of rows of a single table, keyed by id and by name.
+    Returned entities are shared, detached copies and must be treated as read only.
+    """
+
+    def __init__(
+        self,
+        model: Type[T],
+        max_size: int,
+        version_check_interval: float = 0,
+    ):
+        self.model = model
+        self.table_name = model.__tablename__
+        self.max_size = max_size
+        # 0 means the version is checked once per DB session
+        self.version_check_interval = version_check_interval
+
+        self._lock = threading.Lock()
+        self._by_id: OrderedDict[int, T] = OrderedDict()
+        self._id_by_name: dict[str, int] = {}
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, db: Session, entity_id: int) -> Optional[T]:
+        return self.get_many(db, [entity_id]).get(entity_id)
+
+    def get_many(self, db: Session, entity_ids: Iterable[int]) -> dict[int, T]:
+        """Returns the cached entities of the ids, the missing ids are not in the result"""
+        if not self.enabled:
+            return {}
+        version = self._sync(db)
+
+        found = {}
+        with self._lock:
+            if version != self._version:
+                return found
+            for entity_id in entity_ids:
+                entity = self._by_id.get(entity_id)
+                if entity is None:
+                    self._misses += 1
+                    continue
+                self._hits += 1
+                self._by_id.move_to_end(entity_id)
+                found[entity_id] = entity
+        return found
+
+    def get_by_name(self, db: Session, name: str) -> Optional[T]:
+        return self.get_many_by_name(db, [name]).get(name)
+
+    def get_many_by_name(self, db: Session, names: Iterable[str]) -> dict[str, T]:
+        """Returns the cached entities of the names, the missing names are not in the result"""
+        if not self.enabled:
+            return {}
+        version = self._sync(db)
+
+        found = {}
+        with self._lock:
+            if version != self._version:
+                return found
+            for name in names:
+                entity_id = self._id_by_name.get(name)
+                if entity_id is None:
+                    self._misses += 1
+                    continue
+                self._hits += 1
+                self._by_id.move_to_end(entity_id)
+                found[name] = self._by_id[entity_id]
+        return found
+
+    def put(self, db: Session, entities: Iterable[T]) -> None:
+        """
+        Caches copies of the entities, as they were read by the session.
+        When the session wrote in its current transaction the entities may not be
+        committed yet, so they are cached only once the transaction commits.
+        """
+        if not self.enabled:
+            return
+        version = self._sync(db)
+        copies = [self._copy(entity) for entity in entities if entity is not None]
+
+        if db.info.get(_WRITES_KEY):
+            db.info.setdefault(_PENDING_KEY, []).append((self, version, copies))
+        else:
+            self._put(version, copies)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                size=len(self._by_id),
+                max_size=self.max_size,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                invalidations=self._invalidations,
+            )
+
+    def _sync(self, db: Session) -> int:
+        """
+        Returns the version the session works with, reading it from the database
+        (once per session, or once per version_check_interval), and clears
+        the cache if the version is newer than the version of the cache.
+        """
+        versions = db.info.setdefault(_VERSIONS_KEY, {})
+        if self.table_name in versions:
+            return versions[self.table_name]
+
+        now = time.monotonic()
+        if (
+            self._version is not None
+            and now - self._version_checked_at < self.version_check_interval
+        ):
+            versions[self.table_name] = self._version
+            return self._version
+
+        version = db.execute(
+            select(CacheVersion.version).where(CacheVersion.name == self.table_name)
+        ).scalar_one_or_none()
+        versions[self.table_name] = version
+
+        with self._lock:
+            if (
+                version is not None
+                and self._version is not None
+                and version < self._version
+            ):
+                # read from a lagging replica, the session is served uncached
+                return version
+            if version != self._version:
+                self._clear()
+                self._version = version
+            self._version_checked_at = now
+        return version
+
+    def _put(self, version: int, entities: List[T]) -> None:
+        with self._lock:
+            # the rows were read under an older version, they may be stale
+            if version != self._version:
+                return
+            for entity in entities:
+                previous = self._by_id.pop(entity.id, None)
+                if previous is not None:
+                    self._id_by_name.pop(previous.name, None)
+                self._by_id[entity.id] = entity
+                self._id_by_name[entity.name] = entity.id
+
+            while len(self._by_id) > self.max_size:
+                _, evicted = self._by_id.popitem(last=False)
+                self._id_by_name.pop(evicted.name, None)
+                self._evictions += 1
+
+    def _clear(self) -> None:
+        if self._by_id:
+            self._invalidations += 1
+        self._by_id.clear()
+        self._id_by_name.clear()
+
+    def _copy(self, entity: T) -> T:
+        return self.model(
+            **{
+                attr.key: getattr(entity, attr.key)
+                for attr in inspect(self.model).column_attrs
+            }
+        )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement_writes(orm_execute_state):
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info[_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush_writes(session, *_):
+    session.info[_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_puts(session):
+    # releasing a savepoint does not commit the outer transaction
+    if session.in_nested_transaction():
+        return
+    for cache, version, entities in session.info.pop(_PENDING_KEY, []):
+        # pylint: disable=protected-access
+        cache._put(version, entities)
+    _reset_session_state(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_puts(session, previous_transaction):
+    if previous_transaction.nested:
+        # the entities read in the savepoint may be gone, the writes made
+        # before it are still pending in the outer transaction
+        session.info.pop(_PENDING_KEY, None)
+        return
+    _reset_session_state(session)
+
+
+def _reset_session_state(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_WRITES_KEY, None)
+    # the next transaction may see a newer version
+    session.info.pop(_VERSIONS_KEY, None)
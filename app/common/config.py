@@ -14,26 +14,33 @@ import os
 from dynaconf import Dynaconf
 from loguru import logger
 
+# dynaconf inspects the call stack to resolve relative paths, which made up a
+# large part of the import time, so the files are given by absolute path
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 _settings = Dynaconf(
     settings_files=[
-        "app/config/settings.toml",
-        "app/config/settings.dev-localhost.toml",
-        "app/config/settings.dev-compose.toml",
-        "app/config/settings.test.toml",
-        "app/config/settings.kubernetes.toml",
-        "app/config_prod/.secrets.toml",
-        # this file comes from separate dir to make it
-        # easier to mount setting file in kubernetes
-        "app/config/.secrets.toml",
+        os.path.join(_ROOT_DIR, path)
+        for path in [
+            "app/config/settings.toml",
+            "app/config/settings.dev-localhost.toml",
+            "app/config/settings.dev-compose.toml",
+            "app/config/settings.test.toml",
+            "app/config/settings.kubernetes.toml",
+            "app/config_prod/.secrets.toml",
+            # this file comes from separate dir to make it
+            # easier to mount setting file in kubernetes
+            "app/config/.secrets.toml",
+        ]
     ],
     load_dotenv=True,
+    dotenv_path=os.path.join(_ROOT_DIR, ".env"),
     # useful for dev-localhost only, overridden when running in docker
     env_switcher="ENV_FOR_DYNACONF",
     environments=True,
 )
 
-# Debugging: Print environment variables
-logger.debug(f"Environment Variables: {os.environ}")
+logger.debug(f"Settings environment: {os.getenv('ENV_FOR_DYNACONF', 'default')}")
 
 
 class Settings:
@@ -57,6 +64,22 @@ class Settings:
         # Otherwise, return from Dynaconf settings or the default value
         return self._dynaconf_settings.get(name, default)
 
+    def get_bool(self, name, default: bool = False) -> bool:
+        # environment variables and some settings files hold booleans as strings
+        value = self.get(name, default)
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+
+    def get_list(self, name, default=None) -> list:
+        # environment variables hold lists as comma separated strings
+        value = self.get(name, default)
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        return list(value)
+
     def __getattr__(self, name):
         # Convert the attribute name to uppercase (Dynaconf convention)
         name = name.upper()
@@ -65,7 +88,7 @@ class Settings:
         return self.get(name)
 
 
-def get_connection_url():
+def get_connection_url(driver: str = "postgresql"):
     user = _settings.database_user
     password = _settings.database_password
     name = _settings.database_name
@@ -73,10 +96,11 @@ def get_connection_url():
     port = _settings.database_port
 
     # Construct and return the connection URL
-    connection_url = f"postgresql://{user}:{password}@{host}:{port}/{name}"
+    connection_url = f"{driver}://{user}:{password}@{host}:{port}/{name}"
     return connection_url
 
 
 _settings.DATABASE_URL = get_connection_url()
+_settings.ASYNC_DATABASE_URL = get_connection_url("postgresql+asyncpg")
 
 settings = Settings(_settings)
@@ -5,3 +5,34 @@ MAX_SEARCH_RESULTS = 1000
 RETRY_EXP_BACKOFF_MULTIPLIER = 1
 RETRY_EXP_BACKOFF_MIN = 1
 RETRY_EXP_BACKOFF_MAX = 10
+DEFAULT_CACHE_MAX_SIZE = 10000
+DEFAULT_CACHE_VERSION_CHECK_INTERVAL = 0
+DEFAULT_DB_POOL_SIZE = 5
+DEFAULT_DB_MAX_OVERFLOW = 10
+DEFAULT_DB_POOL_TIMEOUT = 30
+DEFAULT_DB_POOL_PRE_PING = True
+DEFAULT_DB_POOL_RECYCLE = 1800
+DEFAULT_DB_SLOW_CHECKOUT_SECONDS = 1
+DEFAULT_DB_REPLICA_EJECT_SECONDS = 30
+DEFAULT_DB_REPLICA_CONNECT_TIMEOUT = 2
+DEFAULT_INDEX_ADVISOR_MIN_ROWS = 10000
+DEFAULT_GHOST_TAGS_GC_BATCH_SIZE = 1000
+DEFAULT_GHOST_TAGS_GC_BATCH_PAUSE_SECONDS = 0.1
+DEFAULT_GHOST_TAGS_GC_INTERVAL_SECONDS = 0
+DEFAULT_GHOST_TAGS_GC_TAG_GROUPS = False
+DEFAULT_GHOST_TAGS_DELETE_MAX_BATCHES = 1
+DEFAULT_RESET_WORKERS = 4
+DEFAULT_RESET_SHARD_SIZE = 500
+DEFAULT_RESET_MAX_ATTEMPTS = 3
+RESET_RETRY_BACKOFF_MULTIPLIER = 0.05
+RESET_RETRY_BACKOFF_MAX = 1
+DEFAULT_BULK_JOB_WORKERS = 1
+DEFAULT_BULK_JOB_CHUNK_SIZE = 500
+DEFAULT_BULK_JOB_POLL_INTERVAL_SECONDS = 5
+DEFAULT_BULK_JOB_MAX_ATTEMPTS = 3
+DEFAULT_BULK_JOB_RETRY_BACKOFF_SECONDS = 5
+DEFAULT_SQL_PROFILE_SAMPLE_RATE = 0
+DEFAULT_SQL_BUDGET = 50
+DEFAULT_SQL_REPEATED_STATEMENTS = 5
+DEFAULT_SLOW_STATEMENT_SECONDS = 1
+DEFAULT_SLOW_STATEMENT_EXPLAIN_SAMPLE_RATE = 0
@@ -1,22 +1,130 @@
 """Database module for the service"""
 
 import logging
+import threading
+from typing import Optional
 
 from tenacity import retry, wait_exponential, before_log
 
 from app.common.config import settings
+from app.common.db_pool import (
+    TelemetryAsyncQueuePool,
+    TelemetryQueuePool,
+    engine_options,
+)
 from app.common.constants import (
+    DEFAULT_DB_REPLICA_CONNECT_TIMEOUT,
+    DEFAULT_DB_REPLICA_EJECT_SECONDS,
     RETRY_EXP_BACKOFF_MULTIPLIER,
     RETRY_EXP_BACKOFF_MIN,
     RETRY_EXP_BACKOFF_MAX,
 )
-from sqlalchemy import create_engine, inspect
+from app.common.replicas import ReplicaRouter
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from loguru import logger
 
 # Convert log level from string to integer
 log_level = logging.getLevelName("DEBUG")
 
+# keeps all metadata about the DB schema, shared for all entities
+Base = declarative_base()
+
+# sessions are bound to the engines on creation, the engines are created lazily
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+# objects stay loaded after commit, since lazy loads are not possible in asyncio
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+class _Engines:
+    """
+    The engines of the service, created on first use (or by the app lifespan)
+    rather than at import time. Creating an engine does not connect.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engine: Optional[Engine] = None
+        self.async_engine: Optional[AsyncEngine] = None
+        self.replica_router: Optional[ReplicaRouter] = None
+
+    def create(self) -> None:
+        with self._lock:
+            if self.engine is not None:
+                return
+            self.engine = create_engine(
+                settings.DATABASE_URL, poolclass=TelemetryQueuePool, **engine_options()
+            )
+            # asyncio engine (asyncpg) used by the API, the sync engine is kept for
+            # scripts, migrations and tests
+            self.async_engine = create_async_engine(
+                settings.ASYNC_DATABASE_URL,
+                poolclass=TelemetryAsyncQueuePool,
+                **engine_options(),
+            )
+            # read only requests are served by the replicas, when there are any
+            self.replica_router = ReplicaRouter(
+                settings.get_list("DATABASE_REPLICA_URLS"),
+                primary=self.async_engine,
+                session_factory=AsyncSessionLocal,
+                eject_seconds=float(
+                    settings.get(
+                        "DB_REPLICA_EJECT_SECONDS", DEFAULT_DB_REPLICA_EJECT_SECONDS
+                    )
+                ),
+                connect_timeout=float(
+                    settings.get(
+                        "DB_REPLICA_CONNECT_TIMEOUT", DEFAULT_DB_REPLICA_CONNECT_TIMEOUT
+                    )
+                ),
+            )
+            logger.info("Database engines created")
+
+    async def dispose(self) -> None:
+        with self._lock:
+            engine, async_engine, replica_router = (
+                self.engine,
+                self.async_engine,
+                self.replica_router,
+            )
+            self.engine = self.async_engine = self.replica_router = None
+        if engine is not None:
+            engine.dispose()
+            await async_engine.dispose()
+            await replica_router.dispose()
+
+
+_engines = _Engines()
+
+
+def get_engine() -> Engine:
+    if _engines.engine is None:
+        _engines.create()
+    return _engines.engine
+
+
+def get_async_engine() -> AsyncEngine:
+    if _engines.async_engine is None:
+        _engines.create()
+    return _engines.async_engine
+
+
+def get_replica_router() -> ReplicaRouter:
+    if _engines.replica_router is None:
+        _engines.create()
+    return _engines.replica_router
+
+
+def create_engines() -> None:
+    """Creates the engines up front, called on application startup"""
+    _engines.create()
+
+
+async def dispose_engines() -> None:
+    """Closes the pooled connections of all the engines, called on shutdown"""
+    await _engines.dispose()
+
 
 @retry(
     wait=wait_exponential(
@@ -26,35 +134,42 @@ log_level = logging.getLevelName("DEBUG")
     ),  # Exponential backoff
     before=before_log(logger, log_level),  # Log before each attempt
 )
-def create_db_engine():
+def wait_for_database():
+    """Blocks until the database accepts connections, for scripts and migrations"""
     try:
-        eng = create_engine(settings.DATABASE_URL, echo=True)
-        eng.connect()
+        with get_engine().connect():
+            pass
         logger.info("Database connection established")
-        return eng
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         raise e
 
 
-engine = create_db_engine()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# keeps all metadata about the DB schema, shared for all entities
-Base = declarative_base()
-
-# Create an inspector instance
-inspector = inspect(engine)
-
-
 def get_db():
     """
     generator function that provides a new database session for each request
     and  ensures that the session is properly closed after use
     """
     # create a new db session
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """asyncio variant of get_db, provides a new AsyncSession for each request"""
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+
+async def get_async_read_db():
+    """
+    get_async_db for read only requests: the session runs a READ ONLY transaction
+    on a read replica (or on the primary when there are no healthy replicas).
+    Must not be used by requests that write, or that read their own writes.
+    """
+    db = await get_replica_router().open_session()
+    async with db:
+        yield db
@@ -0,0 +1,121 @@
+"""
+Connection pool of the database engines, configured through the settings,
+with telemetry: checked out connections, time spent waiting for a connection,
+overflow connections and pool timeouts.
+"""
+
+import threading
+import time
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.common.config import settings
+from app.common.constants import (
+    DEFAULT_DB_MAX_OVERFLOW,
+    DEFAULT_DB_POOL_PRE_PING,
+    DEFAULT_DB_POOL_RECYCLE,
+    DEFAULT_DB_POOL_SIZE,
+    DEFAULT_DB_POOL_TIMEOUT,
+    DEFAULT_DB_SLOW_CHECKOUT_SECONDS,
+)
+from app.common.utils.logging_utils import get_logger
+
+logger = get_logger()
+
+
+class PoolStats(BaseModel):
+    size: int
+    checked_out: int
+    # connections opened beyond size (negative while the pool is not full)
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    overflow_checkouts: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+def engine_options() -> dict[str, Any]:
+    """create_engine / create_async_engine keyword arguments, from the settings"""
+    return {
+        "echo": settings.get_bool("DB_ECHO", False),
+        "pool_size": int(settings.get("DB_POOL_SIZE", DEFAULT_DB_POOL_SIZE)),
+        "max_overflow": int(settings.get("DB_MAX_OVERFLOW", DEFAULT_DB_MAX_OVERFLOW)),
+        "pool_timeout": float(settings.get("DB_POOL_TIMEOUT", DEFAULT_DB_POOL_TIMEOUT)),
+        "pool_pre_ping": settings.get_bool(
+            "DB_POOL_PRE_PING", DEFAULT_DB_POOL_PRE_PING
+        ),
+        # -1 keeps connections forever
+        "pool_recycle": int(settings.get("DB_POOL_RECYCLE", DEFAULT_DB_POOL_RECYCLE)),
+    }
+
+
+class _TelemetryMixin:
+    """Measures every checkout of a QueuePool"""
+
+    _telemetry_lock: threading.Lock
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._telemetry_lock = threading.Lock()
+        self._checkouts = 0
+        self._overflow_checkouts = 0
+        self._timeouts = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self.slow_checkout_seconds = float(
+            settings.get("DB_SLOW_CHECKOUT_SECONDS", DEFAULT_DB_SLOW_CHECKOUT_SECONDS)
+        )
+
+    def connect(self):
+        overflow = self.overflow()
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            with self._telemetry_lock:
+                self._timeouts += 1
+            logger.warning(f"Database pool exhausted: {self.status()}")
+            raise
+        waited = time.perf_counter() - start
+
+        overflowed = self.overflow() > max(overflow, 0)
+        with self._telemetry_lock:
+            self._checkouts += 1
+            self._overflow_checkouts += overflowed
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+        if overflowed:
+            logger.debug(f"Database pool overflow connection opened: {self.status()}")
+        if waited >= self.slow_checkout_seconds:
+            logger.warning(
+                f"Waited {waited:.3f}s for a database connection: {self.status()}"
+            )
+        return connection
+
+    def stats(self) -> PoolStats:
+        with self._telemetry_lock:
+            return PoolStats(
+                size=self.size(),
+                checked_out=self.checkedout(),
+                overflow=self.overflow(),
+                max_overflow=self._max_overflow,
+                checkouts=self._checkouts,
+                overflow_checkouts=self._overflow_checkouts,
+                timeouts=self._timeouts,
+                wait_seconds_total=self._wait_seconds_total,
+                wait_seconds_max=self._wait_seconds_max,
+            )
+
+
+class TelemetryQueuePool(_TelemetryMixin, QueuePool):
+    """QueuePool of the sync engine, with telemetry"""
+
+
+class TelemetryAsyncQueuePool(_TelemetryMixin, AsyncAdaptedQueuePool):
+    """QueuePool of the asyncio engine, with telemetry"""
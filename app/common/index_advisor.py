@@ -0,0 +1,117 @@
+"""
+Index advisor: reads the usage statistics Postgres keeps for the tables of the
+service schema (pg_stat_user_tables, pg_stat_user_indexes), and flags the tables
+mostly read with sequential scans and the indexes that are never used.
+The statistics are cumulative since the last stats reset.
+
+    python -m app.common.index_advisor [min_rows]
+"""
+
+import sys
+from typing import List
+
+from pydantic import BaseModel
+from sqlalchemy import Connection, text
+
+from app.common.constants import DEFAULT_INDEX_ADVISOR_MIN_ROWS
+from app.common.database import get_engine
+
+_TABLES_QUERY = text(
+    """
+    SELECT relname, n_live_tup, seq_scan, seq_tup_read, coalesce(idx_scan, 0)
+    FROM pg_stat_user_tables
+    WHERE schemaname = current_schema() AND relname != 'alembic_version'
+    ORDER BY seq_tup_read DESC, relname
+    """
+)
+
+_INDEXES_QUERY = text(
+    """
+    SELECT s.relname, s.indexrelname, s.idx_scan,
+           pg_relation_size(s.indexrelid), i.indisunique OR i.indisprimary
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.schemaname = current_schema()
+    ORDER BY s.idx_scan, s.relname, s.indexrelname
+    """
+)
+
+
+class TableScanStats(BaseModel):
+    table: str
+    live_rows: int
+    seq_scans: int
+    seq_rows_read: int
+    index_scans: int
+    # large enough for an index to matter, and mostly read by sequential scans
+    seq_scan_heavy: bool
+
+
+class IndexUsageStats(BaseModel):
+    table: str
+    index: str
+    scans: int
+    size_bytes: int
+    # unique indexes enforce constraints, they are never reported as unused
+    unique: bool
+    unused: bool
+
+
+class IndexReport(BaseModel):
+    tables: List[TableScanStats]
+    indexes: List[IndexUsageStats]
+
+
+def index_report(
+    connection: Connection, min_rows: int = DEFAULT_INDEX_ADVISOR_MIN_ROWS
+) -> IndexReport:
+    """Reads the statistics and flags the tables and indexes to look at"""
+    tables = [
+        TableScanStats(
+            table=table,
+            live_rows=live_rows,
+            seq_scans=seq_scans,
+            seq_rows_read=seq_rows_read,
+            index_scans=index_scans,
+            seq_scan_heavy=live_rows >= min_rows and seq_scans > index_scans,
+        )
+        for table, live_rows, seq_scans, seq_rows_read, index_scans in (
+            connection.execute(_TABLES_QUERY)
+        )
+    ]
+    indexes = [
+        IndexUsageStats(
+            table=table,
+            index=index,
+            scans=scans,
+            size_bytes=size_bytes,
+            unique=unique,
+            unused=scans == 0 and not unique,
+        )
+        for table, index, scans, size_bytes, unique in connection.execute(
+            _INDEXES_QUERY
+        )
+    ]
+    return IndexReport(tables=tables, indexes=indexes)
+
+
+def main(min_rows: int = DEFAULT_INDEX_ADVISOR_MIN_ROWS) -> None:
+    with get_engine().connect() as connection:
+        report = index_report(connection, min_rows)
+
+    print("sequential scan heavy tables:")
+    for table in report.tables:
+        if table.seq_scan_heavy:
+            print(
+                f"  {table.table}: {table.seq_scans} seq scans "
+                f"({table.seq_rows_read} rows read), {table.index_scans} index scans, "
+                f"{table.live_rows} rows"
+            )
+    print("unused indexes:")
+    for index in report.indexes:
+        if index.unused:
+            print(f"  {index.table}.{index.index}: {index.size_bytes} bytes")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
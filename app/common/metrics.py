@@ -0,0 +1,243 @@
+"""
+Prometheus metrics of the service, exposed by the /metrics endpoint.
+
+- the latency and the in-flight requests of every route
+- the number of database statements, and the time spent in them, per request:
+  the SQLAlchemy cursor events of every engine add up to the statistics of the
+  request they run in (a context variable set by MetricsMiddleware), along with
+  the statements themselves when the request is profiled (see
+  app.common.sql_profile). The statements are timed once, for the statement
+  observers too (see add_statement_observer)
+- the items of the bulk endpoints and of the bulk jobs, by outcome
+- the connection pools and the entity caches, read at scrape time
+"""
+
+import collections
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import Engine, event
+
+from app.common.cache import CacheStats
+from app.common.db_pool import PoolStats
+from app.common.sql_profile import SqlProfiler, sql_profiler
+
+# the requests that match no route share a label, to bound the label values
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latency of the HTTP requests",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being served",
+    ["method"],
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "Database statements run by an HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_duration_seconds",
+    "Time an HTTP request spent running database statements",
+    ["method", "route"],
+)
+DB_STATEMENTS = Counter(
+    "db_statements",
+    "Database statements run, by the requests and by the background tasks",
+)
+DB_STATEMENT_SECONDS = Counter(
+    "db_statement_duration_seconds",
+    "Time spent running database statements",
+)
+BULK_REQUEST_ITEMS = Histogram(
+    "bulk_request_items",
+    "Items of a bulk request",
+    ["endpoint"],
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000),
+)
+BULK_ITEMS = Counter(
+    "bulk_items",
+    "Processed items of the bulk requests and of the bulk jobs",
+    ["endpoint", "outcome"],
+)
+
+
+@dataclass
+class DbStats:
+    statements: int = 0
+    seconds: float = 0.0
+    # the statements by their text, counted for the profiled requests only
+    statement_counts: Optional[collections.Counter] = None
+
+
+_request_db_stats: ContextVar[Optional[DbStats]] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+def request_db_stats() -> Optional[DbStats]:
+    """The database statistics of the current request, None outside of a request"""
+    return _request_db_stats.get()
+
+
+def current_route() -> Optional[str]:
+    """The route of the current request, None outside of a request"""
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    # set by the router once the request matched a route
+    return getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+
+
+# called with the connection, the statement, its parameters, its execution context
+# and its duration, after every statement of every engine
+StatementObserver = Callable[[Any, str, Any, Any, float], None]
+
+_statement_observers: List[StatementObserver] = []
+
+
+def add_statement_observer(observer: StatementObserver) -> None:
+    _statement_observers.append(observer)
+
+
+def remove_statement_observer(observer: StatementObserver) -> None:
+    _statement_observers.remove(observer)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, *_):
+    # a connection runs one statement at a time
+    conn.info["statement_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):  # pylint: disable=unused-argument,too-many-arguments,too-many-positional-arguments
+    seconds = time.perf_counter() - conn.info.pop("statement_start")
+    DB_STATEMENTS.inc()
+    DB_STATEMENT_SECONDS.inc(seconds)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += seconds
+        if stats.statement_counts is not None:
+            stats.statement_counts[statement] += 1
+    for observer in _statement_observers:
+        observer(conn, statement, parameters, context, seconds)
+
+
+def observe_bulk_request(endpoint: str, items: int) -> None:
+    BULK_REQUEST_ITEMS.labels(endpoint).observe(items)
+
+
+def count_bulk_items(endpoint: str, succeeded: int, failed: int) -> None:
+    """Counts the outcome of the items of a bulk request (or of a bulk job chunk)"""
+    BULK_ITEMS.labels(endpoint, "succeeded").inc(succeeded)
+    BULK_ITEMS.labels(endpoint, "failed").inc(failed)
+
+
+class MetricsMiddleware:
+    """ASGI middleware measuring every HTTP request, and profiling a sample of them"""
+
+    def __init__(self, app, profiler: SqlProfiler = sql_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        stats = DbStats(
+            statement_counts=collections.Counter() if self.profiler.sampled() else None
+        )
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if stats.statement_counts is not None:
+                    self.profiler.profile_response(
+                        message, method, current_route(), stats.statement_counts
+                    )
+            await send(message)
+
+        token = _request_db_stats.set(stats)
+        scope_token = _request_scope.set(scope)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = current_route()
+            _request_scope.reset(scope_token)
+            _request_db_stats.reset(token)
+            REQUEST_LATENCY.labels(method, route, str(status)).observe(elapsed)
+            REQUEST_DB_STATEMENTS.labels(method, route).observe(stats.statements)
+            REQUEST_DB_SECONDS.labels(method, route).observe(stats.seconds)
+
+
+class StatsCollector(Collector):
+    """Exposes the statistics of the connection pools and of the caches"""
+
+    def __init__(
+        self,
+        pools: Callable[[], Dict[str, PoolStats]],
+        caches: Callable[[], Dict[str, CacheStats]],
+    ):
+        self.pools = pools
+        self.caches = caches
+
+    def collect(self) -> Iterable:
+        checked_out = GaugeMetricFamily(
+            "db_pool_checked_out", "Checked out connections", labels=["pool"]
+        )
+        size = GaugeMetricFamily("db_pool_size", "Pool size", labels=["pool"])
+        checkouts = CounterMetricFamily(
+            "db_pool_checkouts", "Connection checkouts", labels=["pool"]
+        )
+        timeouts = CounterMetricFamily(
+            "db_pool_timeouts", "Connection checkouts timed out", labels=["pool"]
+        )
+        wait_seconds = CounterMetricFamily(
+            "db_pool_wait_seconds",
+            "Time spent waiting for a connection",
+            labels=["pool"],
+        )
+        for name, pool in self.pools().items():
+            checked_out.add_metric([name], pool.checked_out)
+            size.add_metric([name], pool.size)
+            checkouts.add_metric([name], pool.checkouts)
+            timeouts.add_metric([name], pool.timeouts)
+            wait_seconds.add_metric([name], pool.wait_seconds_total)
+        yield from (checked_out, size, checkouts, timeouts, wait_seconds)
+
+        cache_size = GaugeMetricFamily(
+            "cache_size", "Cached entities", labels=["cache"]
+        )
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        for name, cache in self.caches().items():
+            cache_size.add_metric([name], cache.size)
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+        yield from (cache_size, hits, misses)
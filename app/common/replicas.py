@@ -0,0 +1,121 @@
+"""
+Routing of read only sessions to the read replicas of the database.
+
+Replicas are used round-robin. A replica that cannot be connected to is ejected
+for DB_REPLICA_EJECT_SECONDS, then tried again. When no replica is available the
+primary serves the reads. Read sessions run READ ONLY transactions, wherever they go.
+"""
+
+import asyncio
+import threading
+import time
+from typing import List
+
+from pydantic import BaseModel
+from sqlalchemy import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.common.constants import (
+    DEFAULT_DB_REPLICA_CONNECT_TIMEOUT,
+    DEFAULT_DB_REPLICA_EJECT_SECONDS,
+)
+from app.common.db_pool import PoolStats, TelemetryAsyncQueuePool, engine_options
+from app.common.utils.logging_utils import get_logger
+
+logger = get_logger()
+
+
+class ReplicaStats(BaseModel):
+    url: str
+    ejected: bool
+    failures: int
+    pool: PoolStats
+
+
+class Replica:
+    """A replica engine and its health"""
+
+    def __init__(self, url: str, connect_timeout: float):
+        url = make_url(url).set(drivername="postgresql+asyncpg")
+        self.url = url.render_as_string(hide_password=True)
+        self.engine: AsyncEngine = create_async_engine(
+            url,
+            poolclass=TelemetryAsyncQueuePool,
+            connect_args={"timeout": connect_timeout},
+            **engine_options(),
+        )
+        self.read_engine = self.engine.execution_options(postgresql_readonly=True)
+        self.ejected_until = 0.0
+        self.failures = 0
+
+    @property
+    def ejected(self) -> bool:
+        return time.monotonic() < self.ejected_until
+
+    def stats(self) -> ReplicaStats:
+        return ReplicaStats(
+            url=self.url,
+            ejected=self.ejected,
+            failures=self.failures,
+            pool=self.engine.pool.stats(),
+        )
+
+
+class ReplicaRouter:
+    """Opens the sessions of read only requests on a healthy replica"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        primary: AsyncEngine,
+        session_factory: async_sessionmaker,
+        eject_seconds: float = DEFAULT_DB_REPLICA_EJECT_SECONDS,
+        connect_timeout: float = DEFAULT_DB_REPLICA_CONNECT_TIMEOUT,
+    ):
+        self.replicas = [Replica(url, connect_timeout) for url in urls]
+        self.primary = primary.execution_options(postgresql_readonly=True)
+        self.session_factory = session_factory
+        self.eject_seconds = eject_seconds
+
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def _candidates(self) -> List[Replica]:
+        """The replicas that are not ejected, in round-robin order"""
+        with self._lock:
+            start = self._next
+            self._next += 1
+        count = len(self.replicas)
+        ordered = [self.replicas[(start + i) % count] for i in range(count)]
+        return [replica for replica in ordered if not replica.ejected]
+
+    def eject(self, replica: Replica, error: Exception) -> None:
+        replica.failures += 1
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+        logger.warning(
+            f"Ejecting replica {replica.url} for {self.eject_seconds}s - {error}"
+        )
+
+    async def open_session(self) -> AsyncSession:
+        """
+        A session on the next healthy replica, connected up front so a failing
+        replica is ejected before the request uses it. Falls back to the primary.
+        """
+        for replica in self._candidates():
+            db = self.session_factory(bind=replica.read_engine)
+            try:
+                await db.connection()
+                return db
+            except (DBAPIError, OSError, asyncio.TimeoutError) as e:
+                await db.close()
+                self.eject(replica, e)
+        return self.session_factory(bind=self.primary)
+
+    def stats(self) -> List[ReplicaStats]:
+        return [replica.stats() for replica in self.replicas]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
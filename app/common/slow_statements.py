@@ -0,0 +1,165 @@
+"""
+Slow statements log: the SQL statements that ran for SLOW_STATEMENT_SECONDS or
+more (0 disables the log).
+
+A slow statement is logged to the analytics sink (CONFIG.ANALYTICS_FOLDER) with
+its bound parameters, its duration, the route of the request it ran in and the
+AdvancedSearchRequest of the search it ran for, in the slow_statement extra
+field, and as a short warning (without the parameters) to the console.
+
+A sample of the slow SELECT statements, SLOW_STATEMENT_EXPLAIN_SAMPLE_RATE of
+them, is run again under EXPLAIN (ANALYZE, BUFFERS) for the record to hold the
+actual plan. Only the ORM and Core selects are, the text statements never: a
+text statement may modify data whatever its first keyword.
+
+The statements are timed by app.common.metrics, this log observes them.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.common.base_entity.explain import explain_analyze_sql
+from app.common.base_entity.model import AdvancedSearchRequest
+from app.common.config import settings
+from app.common.constants import (
+    DEFAULT_SLOW_STATEMENT_EXPLAIN_SAMPLE_RATE,
+    DEFAULT_SLOW_STATEMENT_SECONDS,
+)
+from app.common.metrics import add_statement_observer, current_route
+from app.common.sql_profile import statement_shape
+from app.common.utils.logging_utils import get_logger
+
+logger = get_logger()
+
+# in the console warnings
+_MAX_SHAPE_LENGTH = 200
+
+
+class SlowStatement(BaseModel):
+    """A statement that ran for the threshold or more"""
+
+    statement: str
+    parameters: Any
+    seconds: float
+    route: Optional[str] = None
+    search_request: Optional[dict] = None
+    plan: Optional[Any] = None
+
+
+_search_request: ContextVar[Optional[AdvancedSearchRequest]] = ContextVar(
+    "search_request", default=None
+)
+
+
+@contextmanager
+def search_request_context(search_req: AdvancedSearchRequest) -> Iterator[None]:
+    """The statements run in the context are logged with the search request"""
+    token = _search_request.set(search_req)
+    try:
+        yield
+    finally:
+        _search_request.reset(token)
+
+
+def _json_safe(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {str(key): _json_safe(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_json_safe(value) for value in parameters]
+    if parameters is None or isinstance(parameters, (str, int, float, bool)):
+        return parameters
+    return str(parameters)
+
+
+class SlowStatementLog:
+    """Logs the slow statements of every engine, see the module docstring"""
+
+    def __init__(self, threshold_seconds: float, explain_sample_rate: float):
+        self.threshold_seconds = threshold_seconds
+        self.explain_sample_rate = explain_sample_rate
+
+    def is_slow(self, seconds: float) -> bool:
+        return 0 < self.threshold_seconds <= seconds
+
+    def explain_sampled(self) -> bool:
+        return (
+            self.explain_sample_rate > 0 and random.random() < self.explain_sample_rate
+        )
+
+    def record(
+        self, conn, statement: str, parameters: Any, seconds: float, context
+    ) -> SlowStatement:
+        search_req = _search_request.get()
+        slow_statement = SlowStatement(
+            statement=statement,
+            parameters=_json_safe(parameters),
+            seconds=seconds,
+            route=current_route(),
+            search_request=search_req.model_dump(mode="json") if search_req else None,
+        )
+        if self._explainable(conn, context) and self.explain_sampled():
+            try:
+                slow_statement.plan = explain_analyze_sql(
+                    conn.connection, statement, parameters
+                )
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.warning(f"Failed to EXPLAIN ANALYZE a slow statement: {e}")
+        return slow_statement
+
+    @staticmethod
+    def _explainable(conn, context) -> bool:
+        # ANALYZE runs the statement again: only the compiled selects without a
+        # data-modifying CTE, in the transaction (and the savepoint) of the statement
+        compiled = getattr(context, "compiled", None)
+        return (
+            conn.in_transaction()
+            and compiled is not None
+            and not context.executemany
+            and isinstance(compiled.statement, Select)
+            and not any(
+                isinstance(cte.element, UpdateBase)
+                for cte in getattr(compiled, "ctes", None) or ()
+            )
+        )
+
+    @staticmethod
+    def log(slow_statement: SlowStatement) -> None:
+        logger.bind(
+            analytics=True, slow_statement=slow_statement.model_dump(mode="json")
+        ).warning("Slow SQL statement")
+        logger.warning(
+            f"Slow SQL statement ({slow_statement.seconds:.3f}s"
+            f"{f' in {slow_statement.route}' if slow_statement.route else ''}): "
+            f"{statement_shape(slow_statement.statement)[:_MAX_SHAPE_LENGTH]}"
+        )
+
+
+slow_statement_log = SlowStatementLog(
+    threshold_seconds=float(
+        settings.get("SLOW_STATEMENT_SECONDS", DEFAULT_SLOW_STATEMENT_SECONDS)
+    ),
+    explain_sample_rate=float(
+        settings.get(
+            "SLOW_STATEMENT_EXPLAIN_SAMPLE_RATE",
+            DEFAULT_SLOW_STATEMENT_EXPLAIN_SAMPLE_RATE,
+        )
+    ),
+)
+
+
+def _observe_statement(
+    conn, statement: str, parameters: Any, context, seconds: float
+) -> None:
+    if slow_statement_log.is_slow(seconds):
+        slow_statement_log.log(
+            slow_statement_log.record(conn, statement, parameters, seconds, context)
+        )
+
+
+add_statement_observer(_observe_statement)
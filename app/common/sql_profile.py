@@ -0,0 +1,171 @@
+"""
+SQL profile of the HTTP requests: the statements a request runs, the statements
+it runs over and over (N+1 queries), and its SQL budget.
+
+A sample of the requests is profiled, SQL_PROFILE_SAMPLE_RATE of them (0, the
+default, disables the profiling, 1 profiles every request). A profiled request
+gets the X-SQL-Statements and X-SQL-Repeated-Statements response headers, and
+a log record with the profile in its sql_profile extra field. The record is a
+warning when the request ran more statements than the budget of its route:
+SQL_BUDGETS holds "route=budget" pairs, SQL_BUDGET the budget of the others.
+
+Two statements have the same shape when they only differ by their parameters
+(and by the length of their IN lists). A shape run SQL_REPEATED_STATEMENTS
+times or more in a request is reported as repeated.
+
+The statements of a profiled request are counted, by their text, in its
+database statistics (see app.common.metrics), and the profile is made by
+MetricsMiddleware once the response starts.
+"""
+
+import random
+import re
+from collections import Counter
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from app.common.config import settings
+from app.common.constants import (
+    DEFAULT_SQL_BUDGET,
+    DEFAULT_SQL_PROFILE_SAMPLE_RATE,
+    DEFAULT_SQL_REPEATED_STATEMENTS,
+)
+from app.common.utils.logging_utils import get_logger
+
+logger = get_logger()
+
+STATEMENTS_HEADER = "X-SQL-Statements"
+REPEATED_STATEMENTS_HEADER = "X-SQL-Repeated-Statements"
+
+# asyncpg ($1, with its cast), psycopg2 (%(name)s and %s) placeholders, and lists
+# of them
+_PLACEHOLDER = r"(?:\$\d+(?:::[\w\[\]]+)?|%\(\w+\)s|%s)"
+_PLACEHOLDERS = re.compile(rf"{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*")
+# multi-row VALUES
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+# in the log records
+_MAX_SHAPE_LENGTH = 500
+
+
+def statement_shape(statement: str) -> str:
+    """The statement, without its parameters"""
+    shape = _PLACEHOLDERS.sub("?", statement)
+    shape = _ROWS.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RepeatedStatement(BaseModel):
+    statement: str
+    count: int
+
+
+class SqlProfile(BaseModel):
+    """The SQL statements of a request"""
+
+    method: str
+    route: str
+    statements: int
+    budget: int
+    repeated: List[RepeatedStatement]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.statements > self.budget
+
+    @property
+    def repeated_statements(self) -> int:
+        return sum(repeated.count for repeated in self.repeated)
+
+
+def parse_budgets(pairs: List[str]) -> Dict[str, int]:
+    """{route: budget} of the "route=budget" pairs"""
+    budgets = {}
+    for pair in pairs:
+        route, _, budget = pair.rpartition("=")
+        budgets[route.strip()] = int(budget)
+    return budgets
+
+
+class SqlProfiler:
+    """Profiles a sample of the requests, see the module docstring"""
+
+    def __init__(
+        self,
+        sample_rate: float,
+        budget: int,
+        budgets: Dict[str, int],
+        repeated_statements: int,
+    ):
+        self.sample_rate = sample_rate
+        self.budget = budget
+        self.budgets = budgets
+        self.repeated_statements = repeated_statements
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def profile(self, method: str, route: str, statements: Counter) -> SqlProfile:
+        """The profile of the statements of a request, counted by their text"""
+        shapes: Counter = Counter()
+        for statement, count in statements.items():
+            shapes[statement_shape(statement)] += count
+        return SqlProfile(
+            method=method,
+            route=route,
+            statements=sum(shapes.values()),
+            budget=self.budgets.get(route, self.budget),
+            repeated=[
+                RepeatedStatement(statement=shape[:_MAX_SHAPE_LENGTH], count=count)
+                for shape, count in shapes.most_common()
+                if count >= self.repeated_statements
+            ],
+        )
+
+    def profile_response(
+        self, message: dict, method: str, route: str, statements: Counter
+    ) -> None:
+        """
+        Logs the profile of a request, and adds its headers to the start of the
+        response: the request ran its statements by then
+        """
+        profile = self.profile(method, route, statements)
+        self.log(profile)
+        message["headers"] = list(message.get("headers", [])) + [
+            (STATEMENTS_HEADER.lower().encode(), str(profile.statements).encode()),
+            (
+                REPEATED_STATEMENTS_HEADER.lower().encode(),
+                str(profile.repeated_statements).encode(),
+            ),
+        ]
+
+    @staticmethod
+    def log(profile: SqlProfile) -> None:
+        message = (
+            f"{profile.method} {profile.route} ran {profile.statements} SQL statements"
+        )
+        if profile.repeated:
+            message += (
+                f", {profile.repeated_statements} of them in "
+                f"{len(profile.repeated)} repeated statements"
+            )
+        record = logger.bind(sql_profile=profile.model_dump())
+        if profile.over_budget:
+            record.warning(f"{message}, over the budget of {profile.budget}")
+        elif profile.repeated:
+            record.info(message)
+        else:
+            record.debug(message)
+
+
+sql_profiler = SqlProfiler(
+    sample_rate=float(
+        settings.get("SQL_PROFILE_SAMPLE_RATE", DEFAULT_SQL_PROFILE_SAMPLE_RATE)
+    ),
+    budget=int(settings.get("SQL_BUDGET", DEFAULT_SQL_BUDGET)),
+    budgets=parse_budgets(settings.get_list("SQL_BUDGETS")),
+    repeated_statements=int(
+        settings.get("SQL_REPEATED_STATEMENTS", DEFAULT_SQL_REPEATED_STATEMENTS)
+    ),
+)
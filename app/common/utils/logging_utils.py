@@ -2,6 +2,7 @@
 Logging utilities
 """
 
+import functools
 import logging
 import os
 import sys
@@ -65,5 +66,12 @@ def setup_logger(level: str = "INFO", fmt: LoggingFormat = LoggingFormat.CONSOLE
     return logger
 
 
+@functools.cache
+def _setup_logger_from_settings():
+    setup_logger(level=settings.get("LOG_LEVEL", "INFO"), fmt=LoggingFormat.CONSOLE)
+
+
 def get_logger():
-    return setup_logger(level=settings.LOG_LEVEL, fmt=LoggingFormat.CONSOLE)
+    """The application logger, configured from the settings on the first call only"""
+    _setup_logger_from_settings()
+    return logger
@@ -1,5 +1,7 @@
 """Service Entry Point"""
 
+from contextlib import asynccontextmanager
+
 from readyapi import ReadyAPI
 from readyapi.exceptions import HTTPException
 from starlette.responses import JSONResponse
@@ -7,27 +9,53 @@ from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
 from app.api.v1.tag_groups import controller as tag_group_controller
 from app.api.v1.general import controller as general_controller
 from app.api.v1.tags import controller as tags_controller
+from app.api.v1.tags.ghost_tags import (
+    ghost_tags_collector,
+    ghost_tags_gc_interval_seconds,
+)
 from app.api.v1.entity_tags import controller as entity_tags_controller
+from app.api.v1.bulk_jobs import controller as bulk_jobs_controller
+from app.api.v1.bulk_jobs.worker import bulk_job_worker
 from app.common.config import settings
 from app.common.constants import DEFAULT_APP_PORT
+from app.common.database import create_engines, dispose_engines, wait_for_database
 from app.common.exceptions import ExceptionResponse, ErrorDetail
-from app.common.utils.logging_utils import setup_logger, LoggingFormat
+from app.common.metrics import MetricsMiddleware
+from app.common.utils.logging_utils import get_logger
 from app.schema_migration import run_alembic_upgrade
 
-logger = setup_logger(level="DEBUG", fmt=LoggingFormat.CONSOLE)
+logger = get_logger()
+
+
+@asynccontextmanager
+async def lifespan(app_: ReadyAPI):  # pylint: disable=unused-argument
+    # creating the engines does not connect, the app can answer right away
+    create_engines()
+    if ghost_tags_gc_interval_seconds() > 0:
+        ghost_tags_collector.start_periodic(ghost_tags_gc_interval_seconds())
+    if bulk_job_worker.workers > 0:
+        bulk_job_worker.start()
+    yield
+    await bulk_job_worker.stop()
+    await ghost_tags_collector.stop()
+    await dispose_engines()
+
 
-app = ReadyAPI()
+app = ReadyAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(tag_group_controller.router, prefix="/api/v1")
 app.include_router(general_controller.router, prefix="/api/v1")
 app.include_router(tags_controller.router, prefix="/api/v1")
 app.include_router(entity_tags_controller.router, prefix="/api/v1")
+app.include_router(bulk_jobs_controller.router, prefix="/api/v1")
 
 
 if __name__ == "__main__":
     import uvicorn
 
     # Base.metadata.create_all(engine)
+    wait_for_database()
     run_alembic_upgrade()
 
     uvicorn.run(
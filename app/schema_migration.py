@@ -5,9 +5,9 @@ Enable to run Alembic migration to update the DB to the latest schema version
 from alembic import command
 from alembic.config import Config
 from app.common.config import settings
-from app.common.utils.logging_utils import setup_logger, LoggingFormat
+from app.common.utils.logging_utils import get_logger
 
-logger = setup_logger(level="DEBUG", fmt=LoggingFormat.CONSOLE)
+logger = get_logger()
 
 
 def run_alembic_upgrade():
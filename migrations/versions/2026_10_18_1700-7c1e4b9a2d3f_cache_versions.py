@@ -0,0 +1,83 @@
+"""cache versions
+
+Revision ID: 7c1e4b9a2d3f
+Revises: 261fa6af3627
+Create Date: 2026-10-18 17:00:12.418310
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.common.utils.logging_utils import logger
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c1e4b9a2d3f"
+down_revision: Union[str, None] = "261fa6af3627"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CACHED_TABLES = ("tags", "tag_groups")
+
+
+def upgrade() -> None:
+    logger.info("Creating cache_versions table and triggers")
+    op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String, primary_key=True),
+        sa.Column("version", sa.BigInteger, nullable=False, server_default="0"),
+    )
+    op.bulk_insert(
+        sa.table("cache_versions", sa.column("name", sa.String)),
+        [{"name": table} for table in CACHED_TABLES],
+    )
+
+    # bumps the version of the table once per statement that changed rows
+    op.execute(
+        """
+        CREATE FUNCTION bump_cache_version() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            -- truncate triggers have no transition table
+            IF TG_OP = 'TRUNCATE' THEN
+                UPDATE cache_versions SET version = version + 1
+                WHERE name = TG_TABLE_NAME;
+            ELSIF EXISTS (SELECT 1 FROM changed_rows) THEN
+                UPDATE cache_versions SET version = version + 1
+                WHERE name = TG_TABLE_NAME;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    for table in CACHED_TABLES:
+        # a trigger with transition tables can only have a single event
+        for trigger_event in ("UPDATE", "DELETE"):
+            op.execute(
+                f"""
+                CREATE TRIGGER {table}_{trigger_event.lower()}_bump_cache_version
+                AFTER {trigger_event} ON {table}
+                REFERENCING OLD TABLE AS changed_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_version()
+                """
+            )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_truncate_bump_cache_version
+            AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_version()
+            """
+        )
+
+
+def downgrade() -> None:
+    for table in CACHED_TABLES:
+        for trigger_event in ("update", "delete", "truncate"):
+            op.execute(
+                f"DROP TRIGGER IF EXISTS {table}_{trigger_event}_bump_cache_version "
+                f"ON {table}"
+            )
+    op.execute("DROP FUNCTION IF EXISTS bump_cache_version()")
+    op.drop_table("cache_versions")
@@ -0,0 +1,72 @@
+"""search indexes
+
+Revision ID: a4d81f0c6e52
+Revises: 7c1e4b9a2d3f
+Create Date: 2026-10-18 17:15:40.902117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.common.utils.logging_utils import logger
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4d81f0c6e52"
+down_revision: Union[str, None] = "7c1e4b9a2d3f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) pairs that are searched with starts_with / contains filters
+SEARCHED_COLUMNS = (
+    ("tags", "name"),
+    ("tag_groups", "name"),
+    ("entity_tags", "entity_id"),
+)
+
+
+def is_pg_trgm_available() -> bool:
+    return (
+        op.get_bind()
+        .execute(
+            sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        )
+        .scalar()
+        is not None
+    )
+
+
+def upgrade() -> None:
+    with_trgm = is_pg_trgm_available()
+    if with_trgm:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    else:
+        logger.warning("pg_trgm is not available, skipping the trigram indexes")
+
+    # built concurrently so that large tables are not locked for writes
+    with op.get_context().autocommit_block():
+        for table, column in SEARCHED_COLUMNS:
+            logger.info(f"Creating search indexes on {table}.{column}")
+            # starts_with: lower(column) LIKE 'value%'
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+                f"ix_{table}_{column}_lower_pattern "
+                f"ON {table} (lower({column}) text_pattern_ops)"
+            )
+            # contains: column ILIKE '%value%'
+            if with_trgm:
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{column}_trgm "
+                    f"ON {table} USING gin ({column} gin_trgm_ops)"
+                )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, column in SEARCHED_COLUMNS:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_{column}_trgm")
+            op.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_{column}_lower_pattern"
+            )
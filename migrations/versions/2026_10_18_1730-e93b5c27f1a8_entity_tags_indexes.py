@@ -0,0 +1,44 @@
+"""entity_tags indexes
+
+Revision ID: e93b5c27f1a8
+Revises: a4d81f0c6e52
+Create Date: 2026-10-18 17:30:05.214871
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from app.common.utils.logging_utils import logger
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e93b5c27f1a8"
+down_revision: Union[str, None] = "a4d81f0c6e52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name -> columns. The primary key (entity_id, tag_id) only serves entity_id lookups
+ENTITY_TAGS_INDEXES = {
+    # foreign key checks of the tags deletes, ghost tags lookup
+    "ix_entity_tags_tag_id": "tag_id",
+    # entity_type filters
+    "ix_entity_tags_entity_type_entity_id": "entity_type, entity_id",
+}
+
+
+def upgrade() -> None:
+    # built concurrently so that the table is not locked for writes
+    with op.get_context().autocommit_block():
+        for name, columns in ENTITY_TAGS_INDEXES.items():
+            logger.info(f"Creating index {name}")
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON entity_tags ({columns})"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in ENTITY_TAGS_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,247 @@
+"""entity dictionary
+
+Stores the entity ids once in an entities table, and the entity types once in an
+entity_types table. entity_tags references them with integer keys.
+
+The migration runs online, the table stays writable while it runs:
+1. the new columns are added, and a trigger encodes the rows written meanwhile
+   (by the previous version of the service)
+2. the existing rows are encoded in batches of BATCH_SIZE rows, each batch in
+   its own transaction
+3. the constraints are validated and the indexes built without blocking writes
+4. the primary key is switched to (entity_key, tag_id) and the text columns are
+   dropped, in a short transaction
+
+Revision ID: f1c27d9e4b60
+Revises: e93b5c27f1a8
+Create Date: 2026-10-18 17:45:21.530914
+
+"""
+
+from typing import Iterator, Optional, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.common.utils.logging_utils import logger
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c27d9e4b60"
+down_revision: Union[str, None] = "e93b5c27f1a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+
+def is_pg_trgm_installed() -> bool:
+    return (
+        op.get_bind()
+        .execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        .scalar()
+        is not None
+    )
+
+
+def batches(key_columns: str) -> Iterator[Tuple[str, dict]]:
+    """
+    Splits entity_tags in ranges of BATCH_SIZE rows along an index (key_columns),
+    yields the range predicate of each batch and its parameters
+    """
+    bind = op.get_bind()
+    lower: Optional[tuple] = None
+    while True:
+        conditions, params = [], {}
+        if lower is not None:
+            conditions.append(f"({key_columns}) > (:lower_0, :lower_1)")
+            params = {"lower_0": lower[0], "lower_1": lower[1]}
+        where = f"WHERE {conditions[0]}" if conditions else ""
+        upper = bind.execute(
+            sa.text(
+                f"SELECT {key_columns} FROM entity_tags {where} "
+                f"ORDER BY {key_columns} OFFSET :offset LIMIT 1"
+            ),
+            {**params, "offset": BATCH_SIZE - 1},
+        ).first()
+
+        if upper:
+            conditions.append(f"({key_columns}) <= (:upper_0, :upper_1)")
+            params.update({"upper_0": upper[0], "upper_1": upper[1]})
+        yield " AND ".join(conditions) or "TRUE", params
+
+        if not upper:
+            return
+        lower = tuple(upper)
+
+
+def upgrade() -> None:
+    logger.info("Creating the entities and entity_types tables")
+    op.create_table(
+        "entity_types",
+        sa.Column("id", sa.SmallInteger, primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.UniqueConstraint("name", name="uq_entity_types_name"),
+    )
+    op.create_table(
+        "entities",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("entity_id", sa.String, nullable=False),
+        sa.UniqueConstraint("entity_id", name="uq_entities_entity_id"),
+    )
+    op.add_column("entity_tags", sa.Column("entity_key", sa.BigInteger))
+    op.add_column("entity_tags", sa.Column("entity_type_id", sa.SmallInteger))
+
+    # encodes the rows written while the existing rows are encoded
+    op.execute(
+        """
+        CREATE FUNCTION encode_entity_tag() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO entities (entity_id) VALUES (NEW.entity_id)
+            ON CONFLICT (entity_id) DO NOTHING;
+            INSERT INTO entity_types (name) VALUES (NEW.entity_type)
+            ON CONFLICT (name) DO NOTHING;
+            NEW.entity_key := (SELECT id FROM entities WHERE entity_id = NEW.entity_id);
+            NEW.entity_type_id :=
+                (SELECT id FROM entity_types WHERE name = NEW.entity_type);
+            RETURN NEW;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER entity_tags_encode
+        BEFORE INSERT OR UPDATE OF entity_id, entity_type ON entity_tags
+        FOR EACH ROW EXECUTE FUNCTION encode_entity_tag()
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        logger.info("Encoding the entity tags")
+        op.execute(
+            "INSERT INTO entity_types (name) SELECT DISTINCT entity_type "
+            "FROM entity_tags ON CONFLICT (name) DO NOTHING"
+        )
+        bind = op.get_bind()
+        encoded = 0
+        for where, params in batches("entity_tags.entity_id, entity_tags.tag_id"):
+            bind.execute(
+                sa.text(
+                    f"INSERT INTO entities (entity_id) SELECT DISTINCT entity_id "
+                    f"FROM entity_tags WHERE {where} "
+                    f"ORDER BY entity_id ON CONFLICT (entity_id) DO NOTHING"
+                ),
+                params,
+            )
+            encoded += bind.execute(
+                sa.text(
+                    f"UPDATE entity_tags SET entity_key = e.id, entity_type_id = t.id "
+                    f"FROM entities e, entity_types t "
+                    f"WHERE {where} AND e.entity_id = entity_tags.entity_id "
+                    f"AND t.name = entity_tags.entity_type"
+                ),
+                params,
+            ).rowcount
+            logger.info(f"Encoded {encoded} entity tags")
+
+        logger.info("Validating the entity tags keys")
+        op.execute(
+            "ALTER TABLE entity_tags ADD CONSTRAINT ck_entity_tags_keys_not_null "
+            "CHECK (entity_key IS NOT NULL AND entity_type_id IS NOT NULL) NOT VALID"
+        )
+        op.execute(
+            "ALTER TABLE entity_tags ADD CONSTRAINT fk_entity_tags_entity_key "
+            "FOREIGN KEY (entity_key) REFERENCES entities (id) ON DELETE RESTRICT "
+            "NOT VALID"
+        )
+        op.execute(
+            "ALTER TABLE entity_tags ADD CONSTRAINT fk_entity_tags_entity_type_id "
+            "FOREIGN KEY (entity_type_id) REFERENCES entity_types (id) "
+            "ON DELETE RESTRICT NOT VALID"
+        )
+        for constraint in (
+            "ck_entity_tags_keys_not_null",
+            "fk_entity_tags_entity_key",
+            "fk_entity_tags_entity_type_id",
+        ):
+            op.execute(f"ALTER TABLE entity_tags VALIDATE CONSTRAINT {constraint}")
+
+        logger.info("Creating the entity tags indexes")
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS pk_entity_tags_keys "
+            "ON entity_tags (entity_key, tag_id)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "ix_entity_tags_entity_type_id_entity_key "
+            "ON entity_tags (entity_type_id, entity_key)"
+        )
+        # the search indexes of entity_tags.entity_id move to entities.entity_id
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "ix_entities_entity_id_lower_pattern "
+            "ON entities (lower(entity_id) text_pattern_ops)"
+        )
+        if is_pg_trgm_installed():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_entities_entity_id_trgm "
+                "ON entities USING gin (entity_id gin_trgm_ops)"
+            )
+
+    logger.info("Switching entity_tags to the keys")
+    op.execute("DROP TRIGGER entity_tags_encode ON entity_tags")
+    op.execute("DROP FUNCTION encode_entity_tag()")
+    # the valid check constraint spares SET NOT NULL a table scan
+    op.alter_column("entity_tags", "entity_key", nullable=False)
+    op.alter_column("entity_tags", "entity_type_id", nullable=False)
+    op.drop_constraint("ck_entity_tags_keys_not_null", "entity_tags")
+    op.drop_constraint("pk_entity_tags", "entity_tags")
+    op.execute(
+        "ALTER TABLE entity_tags ADD CONSTRAINT pk_entity_tags "
+        "PRIMARY KEY USING INDEX pk_entity_tags_keys"
+    )
+    # drops their indexes too
+    op.drop_column("entity_tags", "entity_id")
+    op.drop_column("entity_tags", "entity_type")
+
+
+def downgrade() -> None:
+    op.add_column("entity_tags", sa.Column("entity_id", sa.String))
+    op.add_column("entity_tags", sa.Column("entity_type", sa.String))
+
+    with op.get_context().autocommit_block():
+        logger.info("Decoding the entity tags")
+        bind = op.get_bind()
+        for where, params in batches("entity_tags.entity_key, entity_tags.tag_id"):
+            bind.execute(
+                sa.text(
+                    f"UPDATE entity_tags SET entity_id = e.entity_id, "
+                    f"entity_type = t.name FROM entities e, entity_types t "
+                    f"WHERE {where} AND e.id = entity_tags.entity_key "
+                    f"AND t.id = entity_tags.entity_type_id"
+                ),
+                params,
+            )
+
+    op.alter_column("entity_tags", "entity_id", nullable=False)
+    op.alter_column("entity_tags", "entity_type", nullable=False)
+    op.drop_constraint("pk_entity_tags", "entity_tags")
+    op.create_primary_key("pk_entity_tags", "entity_tags", ["entity_id", "tag_id"])
+    op.drop_column("entity_tags", "entity_key")
+    op.drop_column("entity_tags", "entity_type_id")
+    op.create_index(
+        "ix_entity_tags_entity_type_entity_id",
+        "entity_tags",
+        ["entity_type", "entity_id"],
+    )
+    op.execute(
+        "CREATE INDEX ix_entity_tags_entity_id_lower_pattern "
+        "ON entity_tags (lower(entity_id) text_pattern_ops)"
+    )
+    if is_pg_trgm_installed():
+        op.execute(
+            "CREATE INDEX ix_entity_tags_entity_id_trgm "
+            "ON entity_tags USING gin (entity_id gin_trgm_ops)"
+        )
+    op.drop_table("entities")
+    op.drop_table("entity_types")
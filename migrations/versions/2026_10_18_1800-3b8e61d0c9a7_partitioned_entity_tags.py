@@ -0,0 +1,111 @@
+"""partitioned entity_tags
+
+entity_tags becomes a table partitioned by list on entity_type_id. The existing
+table is attached as its DEFAULT partition (entity_tags_default), so the rows are
+not copied: the conversion only takes a short exclusive lock. The entity types
+get their own partition afterwards, one at a time, with
+app.api.v1.entity_tags.partitions.
+
+The primary key of a partitioned table must include the partition key, it
+becomes (entity_key, tag_id, entity_type_id). Its index is built beforehand,
+without blocking writes.
+
+Revision ID: 3b8e61d0c9a7
+Revises: f1c27d9e4b60
+Create Date: 2026-10-18 18:00:12.904417
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from app.common.utils.logging_utils import logger
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b8e61d0c9a7"
+down_revision: Union[str, None] = "f1c27d9e4b60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "entity_key, tag_id, entity_type_id"
+
+# the indexes of entity_tags, and the names they take in the default partition
+INDEX_NAMES = {
+    "ix_entity_tags_tag_id": "entity_tags_default_tag_id_idx",
+    "ix_entity_tags_entity_type_id_entity_key": (
+        "entity_tags_default_entity_type_id_entity_key_idx"
+    ),
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        logger.info("Creating the entity_tags primary key index")
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS entity_tags_default_pkey "
+            "ON entity_tags (entity_key, tag_id, entity_type_id)"
+        )
+
+    logger.info("Attaching entity_tags as the default partition")
+    op.execute("ALTER TABLE entity_tags DROP CONSTRAINT pk_entity_tags")
+    op.execute(
+        "ALTER TABLE entity_tags ADD CONSTRAINT entity_tags_default_pkey "
+        "PRIMARY KEY USING INDEX entity_tags_default_pkey"
+    )
+    op.execute("ALTER TABLE entity_tags RENAME TO entity_tags_default")
+    for index, partition_index in INDEX_NAMES.items():
+        op.execute(f"ALTER INDEX {index} RENAME TO {partition_index}")
+
+    # same columns and constraints as the default partition, so attaching it
+    # merges them instead of validating them again
+    op.execute(
+        """
+        CREATE TABLE entity_tags (
+            entity_key BIGINT NOT NULL,
+            entity_type_id SMALLINT NOT NULL,
+            tag_id INTEGER NOT NULL,
+            CONSTRAINT pk_entity_tags PRIMARY KEY (entity_key, tag_id, entity_type_id),
+            CONSTRAINT fk_entity_tags_entity_key FOREIGN KEY (entity_key)
+                REFERENCES entities (id) ON DELETE RESTRICT,
+            CONSTRAINT fk_entity_tags_entity_type_id FOREIGN KEY (entity_type_id)
+                REFERENCES entity_types (id) ON DELETE RESTRICT,
+            CONSTRAINT fk_entity_tags_tag_id FOREIGN KEY (tag_id)
+                REFERENCES tags (id) ON DELETE RESTRICT
+        ) PARTITION BY LIST (entity_type_id)
+        """
+    )
+    op.execute("CREATE INDEX ix_entity_tags_tag_id ON entity_tags (tag_id)")
+    op.execute(
+        "CREATE INDEX ix_entity_tags_entity_type_id_entity_key "
+        "ON entity_tags (entity_type_id, entity_key)"
+    )
+    op.execute("ALTER TABLE entity_tags ATTACH PARTITION entity_tags_default DEFAULT")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    partitions = bind.exec_driver_sql(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'entity_tags'::regclass "
+        "AND c.relname != 'entity_tags_default'"
+    ).scalars()
+    for partition in list(partitions):
+        logger.info(f"Moving the rows of {partition} to the default partition")
+        op.execute(f"ALTER TABLE entity_tags DETACH PARTITION {partition}")
+        op.execute(
+            f"INSERT INTO entity_tags_default ({COLUMNS}) "
+            f"SELECT {COLUMNS} FROM {partition}"
+        )
+        op.execute(f"DROP TABLE {partition}")
+
+    op.execute("ALTER TABLE entity_tags DETACH PARTITION entity_tags_default")
+    op.execute("DROP TABLE entity_tags")
+    op.execute("ALTER TABLE entity_tags_default RENAME TO entity_tags")
+    for index, partition_index in INDEX_NAMES.items():
+        op.execute(f"ALTER INDEX {partition_index} RENAME TO {index}")
+    op.execute("ALTER TABLE entity_tags DROP CONSTRAINT entity_tags_default_pkey")
+    op.execute(
+        "ALTER TABLE entity_tags ADD CONSTRAINT pk_entity_tags "
+        "PRIMARY KEY (entity_key, tag_id)"
+    )
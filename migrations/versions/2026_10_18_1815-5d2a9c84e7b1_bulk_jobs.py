@@ -0,0 +1,79 @@
+"""bulk jobs
+
+Revision ID: 5d2a9c84e7b1
+Revises: 3b8e61d0c9a7
+Create Date: 2026-10-18 18:15:40.271935
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+from app.common.utils.logging_utils import logger
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2a9c84e7b1"
+down_revision: Union[str, None] = "3b8e61d0c9a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    logger.info("Creating bulk_jobs and bulk_job_items tables")
+    op.create_table(
+        "bulk_jobs",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.String, nullable=False),
+        sa.Column("mode", sa.String),
+        sa.Column("status", sa.String, nullable=False),
+        sa.Column("total", sa.Integer, nullable=False),
+        sa.Column("processed", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer, nullable=False, server_default="0"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index(
+        "ix_bulk_jobs_unfinished",
+        "bulk_jobs",
+        ["id"],
+        postgresql_where=sa.text("status != 'completed'"),
+    )
+    op.create_table(
+        "bulk_job_items",
+        sa.Column(
+            "job_id",
+            sa.BigInteger,
+            sa.ForeignKey("bulk_jobs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("position", sa.Integer, primary_key=True),
+        sa.Column("request", JSONB, nullable=False),
+        sa.Column("status", sa.String, nullable=False),
+        sa.Column("response", JSONB),
+        sa.Column("errors", JSONB),
+    )
+    op.create_index(
+        "ix_bulk_job_items_pending",
+        "bulk_job_items",
+        ["job_id", "position"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bulk_job_items")
+    op.drop_table("bulk_jobs")
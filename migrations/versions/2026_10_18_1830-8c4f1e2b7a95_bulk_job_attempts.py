@@ -0,0 +1,51 @@
+"""bulk job attempts
+
+Revision ID: 8c4f1e2b7a95
+Revises: 5d2a9c84e7b1
+Create Date: 2026-10-18 18:30:12.508321
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.common.utils.logging_utils import logger
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4f1e2b7a95"
+down_revision: Union[str, None] = "5d2a9c84e7b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    logger.info("Adding the failed attempts of the bulk jobs")
+    op.add_column(
+        "bulk_jobs",
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+    )
+    op.add_column("bulk_jobs", sa.Column("last_error", sa.String))
+    op.add_column("bulk_jobs", sa.Column("retry_at", sa.DateTime(timezone=True)))
+    # the failed jobs are finished too
+    op.drop_index("ix_bulk_jobs_unfinished", table_name="bulk_jobs")
+    op.create_index(
+        "ix_bulk_jobs_unfinished",
+        "bulk_jobs",
+        ["id"],
+        postgresql_where=sa.text("status NOT IN ('completed', 'failed')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bulk_jobs_unfinished", table_name="bulk_jobs")
+    op.create_index(
+        "ix_bulk_jobs_unfinished",
+        "bulk_jobs",
+        ["id"],
+        postgresql_where=sa.text("status != 'completed'"),
+    )
+    op.drop_column("bulk_jobs", "retry_at")
+    op.drop_column("bulk_jobs", "last_error")
+    op.drop_column("bulk_jobs", "attempts")
@@ -0,0 +1,5 @@
+"""pytest configuration"""
+
+# the shared test client, not a test module: collected, it would be imported a
+# second time (under another module name) and serve a second event loop
+collect_ignore = ["v1/integration/test_client.py"]
@@ -0,0 +1,169 @@
+"""
+This file contains the integration tests for the bulk jobs: bulk resets and
+bulk deletes of entity tags, processed in the background.
+"""
+
+import time
+from typing import List
+
+import pytest
+import sqlalchemy
+
+from app.api.v1.bulk_jobs.service import BulkJobService
+from app.api.v1.bulk_jobs.types import BulkJobResponse, BulkJobStatus
+from app.api.v1.bulk_jobs.worker import bulk_job_worker
+from app.api.v1.entity_tags.types import (
+    EntityTagDeleteRequest,
+    ResetEntityTagsByNameRequest,
+    TagGroupTagsByNameRequest,
+)
+from app.common.database import get_db
+
+# pylint: disable=unused-import
+from tests.v1.integration.tag_assignments.fixtures import (
+    reset_cleanup,
+    RESET_ENTITY_IDS,
+)
+from tests.v1.integration.test_client import test_client
+from tests.v1.integration.utils.utils import execute_and_validate_endpoint
+
+TAG_NAMES = ["reset-test-java", "reset-test-python"]
+UNKNOWN_ENTITY_ID = "/khulnasoft/bulk-jobs-test-unknown"
+
+
+def reset_request(entity_id: str) -> ResetEntityTagsByNameRequest:
+    return ResetEntityTagsByNameRequest(
+        entity_id=entity_id,
+        entity_type="repo",
+        tag_groups=[
+            TagGroupTagsByNameRequest(
+                tag_group_name="reset_test_language", tag_names=TAG_NAMES
+            )
+        ],
+    )
+
+
+def submit(url: str, requests: list) -> BulkJobResponse:
+    job = execute_and_validate_endpoint(
+        url, requests, BulkJobResponse, expected_status_code=202
+    )
+    submitted_jobs.append(job.id)
+    return job
+
+
+def wait_for_job(job_id: int) -> BulkJobResponse:
+    deadline = time.monotonic() + 10
+    while True:
+        job = execute_and_validate_endpoint(
+            f"/api/v1/bulk_jobs/{job_id}", {}, BulkJobResponse, method="GET"
+        )
+        if (
+            job.status in (BulkJobStatus.COMPLETED, BulkJobStatus.FAILED)
+            or time.monotonic() > deadline
+        ):
+            return job
+        time.sleep(0.05)
+
+
+submitted_jobs: List[int] = []
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+@pytest.fixture
+def bulk_jobs_cleanup(reset_cleanup):
+    yield
+    with next(get_db()) as db:
+        db.execute(
+            sqlalchemy.text("DELETE FROM bulk_jobs WHERE id IN :ids").bindparams(
+                ids=tuple(submitted_jobs) or (0,)
+            )
+        )
+        db.commit()
+    submitted_jobs.clear()
+
+
+def test_reset_job_is_processed_in_chunks(bulk_jobs_cleanup, monkeypatch):
+    monkeypatch.setattr(bulk_job_worker, "chunk_size", 1)
+    job = submit(
+        "/api/v1/bulk_jobs/entity_tags/reset?mode=diff",
+        [reset_request(entity_id) for entity_id in RESET_ENTITY_IDS],
+    )
+    assert job.status == BulkJobStatus.QUEUED
+    assert job.total == len(RESET_ENTITY_IDS)
+
+    job = wait_for_job(job.id)
+
+    assert job.status == BulkJobStatus.COMPLETED
+    assert job.mode == "diff"
+    assert (job.processed, job.failed) == (len(RESET_ENTITY_IDS), 0)
+    assert job.finished_at is not None
+    assert [item.req.entity_id for item in job.result.success] == list(RESET_ENTITY_IDS)
+    assert [
+        sorted(tag.name for tag in item.res.tags) for item in job.result.success
+    ] == [TAG_NAMES] * len(RESET_ENTITY_IDS)
+    assert not job.result.errors
+
+    # the processed items are paged
+    job = execute_and_validate_endpoint(
+        f"/api/v1/bulk_jobs/{job.id}", {"offset": 1}, BulkJobResponse, method="GET"
+    )
+    assert [item.req.entity_id for item in job.result.success] == [RESET_ENTITY_IDS[1]]
+
+
+def test_delete_job_reports_the_failed_items(bulk_jobs_cleanup):
+    reset_job = submit(
+        "/api/v1/bulk_jobs/entity_tags/reset",
+        [reset_request(RESET_ENTITY_IDS[0])],
+    )
+    wait_for_job(reset_job.id)
+
+    job = submit(
+        "/api/v1/bulk_jobs/entity_tags/delete",
+        [
+            EntityTagDeleteRequest(entity_id=RESET_ENTITY_IDS[0]),
+            EntityTagDeleteRequest(entity_id=UNKNOWN_ENTITY_ID),
+        ],
+    )
+    job = wait_for_job(job.id)
+
+    assert job.status == BulkJobStatus.COMPLETED
+    assert (job.processed, job.failed) == (2, 1)
+    [success] = job.result.success
+    assert success.req.entity_id == RESET_ENTITY_IDS[0]
+    assert success.res.count == len(TAG_NAMES)
+    [error] = job.result.errors
+    # ErrorItem does not type its request
+    assert error.req["entity_id"] == UNKNOWN_ENTITY_ID
+    assert error.errors == ["No Tags found for entity"]
+
+
+def test_failing_job_does_not_block_the_next_ones(bulk_jobs_cleanup, monkeypatch):
+    def fail(*_):
+        raise RuntimeError("chunk failed")
+
+    monkeypatch.setattr(BulkJobService, "_delete", fail)
+    monkeypatch.setattr(bulk_job_worker, "max_attempts", 2)
+    monkeypatch.setattr(bulk_job_worker, "retry_backoff_seconds", 0.1)
+    failing_job = submit(
+        "/api/v1/bulk_jobs/entity_tags/delete",
+        [EntityTagDeleteRequest(entity_id=RESET_ENTITY_IDS[0])],
+    )
+    job = submit(
+        "/api/v1/bulk_jobs/entity_tags/reset",
+        [reset_request(RESET_ENTITY_IDS[0])],
+    )
+
+    job = wait_for_job(job.id)
+    failing_job = wait_for_job(failing_job.id)
+
+    assert job.status == BulkJobStatus.COMPLETED
+    assert (job.processed, job.failed, job.attempts) == (1, 0, 0)
+    assert failing_job.status == BulkJobStatus.FAILED
+    assert (failing_job.processed, failing_job.attempts) == (0, 2)
+    assert failing_job.last_error == "chunk failed"
+    assert failing_job.finished_at is not None
+    assert not failing_job.result.success and not failing_job.result.errors
+
+
+def test_unknown_job_is_not_found():
+    assert test_client.get("/api/v1/bulk_jobs/0").status_code == 404
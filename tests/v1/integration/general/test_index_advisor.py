@@ -0,0 +1,39 @@
+"""
+This file contains the integration tests for the index advisor report
+"""
+
+from app.common.index_advisor import IndexReport
+from tests.v1.integration.utils.utils import execute_and_validate_endpoint
+
+
+def get_index_report(min_rows: int) -> IndexReport:
+    return execute_and_validate_endpoint(
+        f"/api/v1/index_report?min_rows={min_rows}", {}, IndexReport, method="GET"
+    )
+
+
+def test_index_report_covers_the_service_tables() -> None:
+    report = get_index_report(min_rows=0)
+
+    tables = {table.table: table for table in report.tables}
+    assert {"tags", "tag_groups", "entity_tags"} <= tables.keys()
+    assert "alembic_version" not in tables
+    for table in report.tables:
+        assert table.seq_scan_heavy == (table.seq_scans > table.index_scans)
+
+    indexes = {index.index: index for index in report.indexes}
+    # the statistics of the partitioned entity_tags are the ones of its partitions
+    assert {
+        "entity_tags_default_tag_id_idx",
+        "entity_tags_default_entity_type_id_entity_key_idx",
+    } <= indexes.keys()
+    # constraints are never reported as unused
+    assert indexes["entity_tags_default_pkey"].unique
+    assert not indexes["entity_tags_default_pkey"].unused
+    for index in report.indexes:
+        assert index.unused == (index.scans == 0 and not index.unique)
+
+
+def test_index_report_ignores_small_tables() -> None:
+    report = get_index_report(min_rows=10**9)
+    assert not any(table.seq_scan_heavy for table in report.tables)
@@ -0,0 +1,65 @@
+"""
+This file contains the integration tests for the Prometheus metrics endpoint
+"""
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.api.v1.entity_tags.types import EntityTagDeleteRequest
+from tests.v1.integration.test_client import test_client
+
+UNKNOWN_ENTITY_ID = "/khulnasoft/metrics-test-unknown"
+
+
+def scrape() -> dict[tuple, float]:
+    """The samples of the metrics, by (name, sorted labels)"""
+    response = test_client.get("/api/v1/metrics")
+    assert response.status_code == 200
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+def test_request_latency_and_db_statements_per_route() -> None:
+    route = (("method", "GET"), ("route", "/api/v1/tags/{tag_id}"))
+    before = scrape()
+    assert test_client.get("/api/v1/tags/0").status_code == 404
+    after = scrape()
+
+    latency_count = (
+        "http_request_duration_seconds_count",
+        route + (("status", "404"),),
+    )
+    assert after[latency_count] == before.get(latency_count, 0) + 1
+    statements = ("http_request_db_statements_sum", route)
+    assert after[statements] > before.get(statements, 0)
+    assert after[("http_request_db_duration_seconds_count", route)] >= 1
+    assert after[("db_statements_total", ())] > before[("db_statements_total", ())]
+    # the scrape itself is in flight
+    assert after[("http_requests_in_progress", (("method", "GET"),))] == 1
+
+
+def test_bulk_items_by_outcome() -> None:
+    failed = (
+        "bulk_items_total",
+        (("endpoint", "entity_tags_delete_bulk"), ("outcome", "failed")),
+    )
+    before = scrape()
+    response = test_client.post(
+        "/api/v1/entity_tags/delete/bulk",
+        json=[EntityTagDeleteRequest(entity_id=UNKNOWN_ENTITY_ID).model_dump()],
+    )
+    assert response.status_code == 400
+    after = scrape()
+
+    assert after[failed] == before.get(failed, 0) + 1
+    items = ("bulk_request_items_count", (("endpoint", "entity_tags_delete_bulk"),))
+    assert after[items] == before.get(items, 0) + 1
+
+
+def test_pool_and_cache_stats() -> None:
+    samples = scrape()
+
+    assert samples[("db_pool_checkouts_total", (("pool", "async_engine"),))] > 0
+    assert ("cache_hits_total", (("cache", "tags"),)) in samples
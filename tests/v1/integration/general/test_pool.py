@@ -0,0 +1,56 @@
+"""
+This file contains the integration tests for the database pool telemetry
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.api.v1.general.types import PoolStatsResponse
+from app.api.v1.tag_groups.model import TagGroupResponse
+from app.common.base_entity.model import AdvancedSearchRequest, AdvancedSearchResponse
+from app.common.config import settings
+from app.common.db_pool import TelemetryQueuePool
+from tests.v1.integration.utils.utils import execute_and_validate_endpoint
+
+
+def test_pool_stats_endpoint() -> None:
+    # served by the async engine
+    execute_and_validate_endpoint(
+        "/api/v1/tag_groups/advanced_search",
+        AdvancedSearchRequest(limit=1),
+        AdvancedSearchResponse[TagGroupResponse],
+    )
+    response = execute_and_validate_endpoint(
+        "/api/v1/pool_stats", {}, PoolStatsResponse, method="GET"
+    )
+    assert response.async_engine.checkouts > 0
+    assert response.async_engine.checked_out == 0
+    assert response.engine.checked_out == 0
+
+
+def test_pool_counts_overflows_and_timeouts() -> None:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=TelemetryQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.1,
+    )
+    try:
+        with engine.connect(), engine.connect():
+            stats = engine.pool.stats()
+            assert stats.checked_out == 2
+            assert stats.overflow == 1
+            assert stats.overflow_checkouts == 1
+
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+
+        stats = engine.pool.stats()
+        assert stats.checkouts == 2
+        assert stats.timeouts == 1
+        assert stats.checked_out == 0
+        assert stats.wait_seconds_max < 0.1
+    finally:
+        engine.dispose()
@@ -0,0 +1,78 @@
+"""
+This file contains the integration tests for the SQL profile of the requests:
+statement counts, repeated statements and SQL budgets.
+"""
+
+from typing import Iterator, List
+
+import pytest
+
+from app.common.sql_profile import (
+    REPEATED_STATEMENTS_HEADER,
+    STATEMENTS_HEADER,
+    sql_profiler,
+    statement_shape,
+)
+from app.common.utils.logging_utils import get_logger
+from tests.v1.integration.test_client import test_client
+
+ROUTE = "/api/v1/tags/{tag_id}"
+
+logger = get_logger()
+
+
+@pytest.fixture
+def sql_profile_records() -> Iterator[List[dict]]:
+    """The log records of the SQL profiles"""
+    records: List[dict] = []
+    handler_id = logger.add(
+        lambda message: records.append(message.record),
+        level="DEBUG",
+        filter=lambda record: "sql_profile" in record["extra"],
+    )
+    yield records
+    logger.remove(handler_id)
+
+
+def test_statement_shape_ignores_the_parameters() -> None:
+    assert statement_shape(
+        "SELECT tags.id FROM tags\n  WHERE tags.id IN ($1, $2, $3) AND name = $4"
+    ) == statement_shape("SELECT tags.id FROM tags WHERE tags.id IN ($1) AND name = $2")
+    assert statement_shape(
+        "SELECT tags.id FROM tags WHERE tags.name IN ($1::VARCHAR, $2::VARCHAR)"
+    ) == ("SELECT tags.id FROM tags WHERE tags.name IN (?)")
+    assert statement_shape(
+        "INSERT INTO tags (name) VALUES (%(name_m0)s), (%(name_m1)s)"
+    ) == ("INSERT INTO tags (name) VALUES (?)")
+
+
+# pylint: disable=redefined-outer-name
+def test_profiled_request_reports_its_statements(sql_profile_records) -> None:
+    response = test_client.get("/api/v1/tags/0")
+
+    statements = int(response.headers[STATEMENTS_HEADER])
+    assert statements >= 1
+    assert response.headers[REPEATED_STATEMENTS_HEADER] == "0"
+    [record] = sql_profile_records
+    assert record["level"].name == "DEBUG"
+    assert record["extra"]["sql_profile"]["route"] == ROUTE
+    assert record["extra"]["sql_profile"]["statements"] == statements
+
+
+def test_repeated_statements_and_budget(sql_profile_records, monkeypatch) -> None:
+    monkeypatch.setattr(sql_profiler, "budgets", {ROUTE: 0})
+    monkeypatch.setattr(sql_profiler, "repeated_statements", 1)
+
+    response = test_client.get("/api/v1/tags/0")
+
+    assert int(response.headers[REPEATED_STATEMENTS_HEADER]) >= 1
+    [record] = sql_profile_records
+    assert record["level"].name == "WARNING"
+    assert "over the budget of 0" in record["message"]
+    assert record["extra"]["sql_profile"]["repeated"]
+
+
+def test_unsampled_request_is_not_profiled(monkeypatch) -> None:
+    monkeypatch.setattr(sql_profiler, "sample_rate", 0)
+
+    assert STATEMENTS_HEADER not in test_client.get("/api/v1/tags/0").headers
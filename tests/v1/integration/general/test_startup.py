@@ -0,0 +1,19 @@
+"""
+This file contains the tests for the import time and startup time of the service
+(see tests/benchmarks/startup.py).
+"""
+
+from tests.benchmarks.startup import measure
+
+# generous budgets, that only a regression (e.g. connecting at import) breaks
+IMPORT_BUDGET_SECONDS = 10
+STARTUP_BUDGET_SECONDS = 2
+
+
+def test_starts_without_connecting_to_the_database() -> None:
+    # the database of the measure is unreachable
+    result = measure()
+
+    assert result["status_code"] == 200
+    assert result["import_seconds"] < IMPORT_BUDGET_SECONDS
+    assert result["startup_seconds"] < STARTUP_BUDGET_SECONDS
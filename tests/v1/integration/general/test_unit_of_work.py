@@ -0,0 +1,124 @@
+"""
+This file contains the integration tests for the unit of work: the repositories
+flush, the outermost unit of work commits once, savepoints isolate failing items.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app.api.v1.tag_groups.model import TagGroup, TagGroupCreateRequest
+from app.api.v1.tag_groups.repository import TagGroupRepository
+from app.api.v1.tag_groups.service import TagGroupService
+from app.common.database import get_db, get_engine
+
+NAME_PREFIX = "unit_of_work_test_"
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    yield
+    with next(get_db()) as db:
+        db.execute(
+            sqlalchemy.text("DELETE FROM tag_groups WHERE name LIKE :prefix"),
+            {"prefix": f"{NAME_PREFIX}%"},
+        )
+        db.commit()
+
+
+@contextmanager
+def recorded_statements() -> Iterator[List[str]]:
+    """Records the statements and the COMMITs sent to the database"""
+    engine = get_engine()
+    statements: List[str] = []
+
+    def before_cursor_execute(
+        conn, cursor, statement, *_
+    ):  # pylint: disable=unused-argument
+        statements.append(statement)
+
+    def commit(conn):  # pylint: disable=unused-argument
+        statements.append("COMMIT")
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "commit", commit)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        event.remove(engine, "commit", commit)
+
+
+def stored_names() -> List[str]:
+    with next(get_db()) as db:
+        return sorted(
+            db.scalars(
+                sqlalchemy.select(TagGroup.name).where(
+                    TagGroup.name.like(f"{NAME_PREFIX}%")
+                )
+            )
+        )
+
+
+def create_request(name: str) -> TagGroupCreateRequest:
+    return TagGroupCreateRequest(name=f"{NAME_PREFIX}{name}", description=name)
+
+
+def test_create_uses_returning_and_commits_once():
+    with next(get_db()) as db:
+        service = TagGroupService(TagGroupRepository(db))
+        with recorded_statements() as statements:
+            tag_group = service.create(create_request("a"))
+
+        assert tag_group.id is not None
+        assert statements[0].startswith("INSERT")
+        assert "RETURNING" in statements[0]
+        assert statements[1:] == ["COMMIT"]
+
+
+def test_nested_units_of_work_commit_once():
+    with next(get_db()) as db:
+        repository = TagGroupRepository(db)
+        service = TagGroupService(repository)
+        with recorded_statements() as statements:
+            with repository.unit_of_work():
+                for name in ("a", "b", "c"):
+                    service.create(create_request(name))
+
+        assert statements.count("COMMIT") == 1
+        assert statements[-1] == "COMMIT"
+    assert stored_names() == [f"{NAME_PREFIX}{name}" for name in ("a", "b", "c")]
+
+
+def test_unit_of_work_rolls_back_on_error():
+    with next(get_db()) as db:
+        repository = TagGroupRepository(db)
+        service = TagGroupService(repository)
+        with pytest.raises(ValueError):
+            with repository.unit_of_work():
+                service.create(create_request("a"))
+                raise ValueError("failing batch")
+
+    assert not stored_names()
+
+
+def test_savepoint_isolates_failing_items():
+    with next(get_db()) as db:
+        repository = TagGroupRepository(db)
+        service = TagGroupService(repository)
+        errors = []
+        with repository.unit_of_work() as unit_of_work:
+            # the second "a" violates the unique name
+            for name in ("a", "b", "a", "c"):
+                try:
+                    with unit_of_work.savepoint():
+                        service.create(create_request(name))
+                except IntegrityError as e:
+                    errors.append(e)
+
+    assert len(errors) == 1
+    assert stored_names() == [f"{NAME_PREFIX}{name}" for name in ("a", "b", "c")]
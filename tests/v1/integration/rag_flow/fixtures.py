@@ -73,7 +73,9 @@ def rag_flow_reset_requests(
     with next(get_db()) as db:
         db.execute(
             sqlalchemy.text(
-                "DELETE FROM entity_tags WHERE entity_id IN ('/khulnasoft/repo1', '/khulnasoft/repo2')"
+                "DELETE FROM entity_tags USING entities "
+                "WHERE entity_tags.entity_key = entities.id "
+                "AND entities.entity_id IN ('/khulnasoft/repo1', '/khulnasoft/repo2')"
             )
         )
 
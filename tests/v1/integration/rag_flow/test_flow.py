@@ -23,15 +23,34 @@ from app.common.base_entity.model import (
 
 # need to import all fixtures for the to be discovered by pytest
 # pylint: disable=unused-import
+from tests.v1.integration.rag_flow.fixtures import (
+    rag_flow_reset_requests,
+    language_tag_group,
+    bu_tag_group,
+    capability_tag_group,
+    repo_name_tag_group,
+)
 from tests.v1.integration.rag_flow.utils import get_reset_requests_tag_names
 from tests.v1.integration.utils.utils import execute_and_validate_endpoint
 
+# SQL budgets: the reset is set based, its statements do not grow with the number
+# of entities, and a search runs its query, its count and the tag hydration
+RESET_MAX_STATEMENTS = 15
+TAGS_SEARCH_MAX_STATEMENTS = 4
+ENTITY_TAGS_SEARCH_MAX_STATEMENTS = 5
+# generous, to catch a missing index rather than a slow CI runner
+MAX_DB_SECONDS = 1
+
 
 def assert_reset_entity_tags(
     reset_requests: List[ResetEntityTagsByNameRequest],
 ) -> List[ResetEntityTagsByNameResponse]:
     entities = execute_and_validate_endpoint(
-        "/api/v1/entity_tags/reset", reset_requests, List[ResetEntityTagsByNameResponse]
+        "/api/v1/entity_tags/reset",
+        reset_requests,
+        List[ResetEntityTagsByNameResponse],
+        max_statements=RESET_MAX_STATEMENTS,
+        max_db_seconds=MAX_DB_SECONDS,
     )
     assert len(entities) == len(reset_requests), "Mismatch in number of entities"
     # Check that the response matches the request
@@ -66,6 +85,8 @@ def assert_tags_search_results(
         "/api/v1/tags/advanced_search",
         advanced_search_request,
         AdvancedSearchResponse[TagResponse],
+        max_statements=TAGS_SEARCH_MAX_STATEMENTS,
+        max_db_seconds=MAX_DB_SECONDS,
     )
     found_tags = tags_search_response.results
 
@@ -134,6 +155,8 @@ def search_entities_by_tags(
             ]
         ),
         AdvancedSearchResponse[EntityTagResponse],
+        max_statements=ENTITY_TAGS_SEARCH_MAX_STATEMENTS,
+        max_db_seconds=MAX_DB_SECONDS,
     )
 
 
@@ -0,0 +1,174 @@
+"""
+This file contains the integration tests for the routing of read only requests
+to the read replicas. The test database stands in for a healthy replica (under
+another host name), and a closed port for a replica that is down.
+"""
+
+import asyncio
+
+import pytest
+import sqlalchemy
+from sqlalchemy import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.v1.entity_tags.types import (
+    EntityTagResponse,
+    ResetEntityTagsByNameRequest,
+    ResetEntityTagsByNameResponse,
+    TagGroupTagsByNameRequest,
+)
+from app.common import database
+from app.common.base_entity.model import AdvancedSearchRequest, AdvancedSearchResponse
+from app.common.config import settings
+from app.common.replicas import ReplicaRouter
+
+# pylint: disable=unused-import
+from tests.v1.integration.tag_assignments.fixtures import (
+    reset_cleanup,
+    RESET_ENTITY_IDS,
+    RESET_TAG_GROUP_NAMES,
+    RESET_TAG_NAMES,
+)
+from tests.v1.integration.test_client import test_client
+from tests.v1.integration.utils.utils import execute_and_validate_endpoint
+
+REPLICA_URL = (
+    make_url(settings.DATABASE_URL)
+    .set(host="localhost")
+    .render_as_string(hide_password=False)
+)
+DOWN_REPLICA_URL = (
+    make_url(settings.DATABASE_URL)
+    .set(host="127.0.0.1", port=1)
+    .render_as_string(hide_password=False)
+)
+
+
+def make_router(urls, eject_seconds: float = 30) -> ReplicaRouter:
+    primary = create_async_engine(settings.ASYNC_DATABASE_URL)
+    return ReplicaRouter(
+        urls,
+        primary=primary,
+        session_factory=database.AsyncSessionLocal,
+        eject_seconds=eject_seconds,
+    )
+
+
+async def session_engine(router: ReplicaRouter):
+    db = await router.open_session()
+    async with db:
+        return db.get_bind()
+
+
+def test_round_robin():
+    async def scenario():
+        router = make_router([REPLICA_URL, REPLICA_URL])
+        try:
+            return [await session_engine(router) for _ in range(4)], router
+        finally:
+            await router.dispose()
+
+    engines, router = asyncio.run(scenario())
+    first, second = [replica.read_engine.sync_engine for replica in router.replicas]
+    assert engines == [first, second, first, second]
+
+
+def test_down_replica_is_ejected():
+    async def scenario():
+        router = make_router([DOWN_REPLICA_URL, REPLICA_URL], eject_seconds=0.5)
+        try:
+            engines = [await session_engine(router) for _ in range(3)]
+            failures_while_ejected = router.stats()[0].failures
+            await asyncio.sleep(0.5)
+            # the replica is tried again once the ejection is over, in its turn
+            await session_engine(router)
+            await session_engine(router)
+            return engines, failures_while_ejected, router
+        finally:
+            await router.dispose()
+
+    engines, failures_while_ejected, router = asyncio.run(scenario())
+    down, up = router.replicas
+    assert engines == [up.read_engine.sync_engine] * 3
+    assert failures_while_ejected == 1
+    assert down.failures == 2
+
+
+def test_reads_fall_back_to_the_primary():
+    async def scenario():
+        router = make_router([DOWN_REPLICA_URL])
+        try:
+            return await session_engine(router), router
+        finally:
+            await router.dispose()
+            await router.primary.dispose()
+
+    engine, router = asyncio.run(scenario())
+    assert engine is router.primary.sync_engine
+
+
+def test_read_sessions_are_read_only():
+    async def scenario():
+        router = make_router([REPLICA_URL])
+        try:
+            db = await router.open_session()
+            async with db:
+                await db.execute(
+                    sqlalchemy.text("UPDATE cache_versions SET version = version")
+                )
+        finally:
+            await router.dispose()
+
+    with pytest.raises(DBAPIError, match="read-only transaction"):
+        asyncio.run(scenario())
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_read_endpoints_use_the_replica(monkeypatch, reset_cleanup):
+    router = make_router([REPLICA_URL])
+    monkeypatch.setattr(database, "get_replica_router", lambda: router)
+    [replica] = router.replicas
+
+    statements = []
+
+    def count_statement(*_):
+        statements.append(1)
+
+    sqlalchemy.event.listen(
+        replica.engine.sync_engine, "before_cursor_execute", count_statement
+    )
+    try:
+        # writes stay on the primary
+        execute_and_validate_endpoint(
+            "/api/v1/entity_tags/reset",
+            [
+                ResetEntityTagsByNameRequest(
+                    entity_id=RESET_ENTITY_IDS[0],
+                    entity_type="repo",
+                    tag_groups=[
+                        TagGroupTagsByNameRequest(
+                            tag_group_name=RESET_TAG_GROUP_NAMES[0],
+                            tag_names=[RESET_TAG_NAMES[0]],
+                        )
+                    ],
+                )
+            ],
+            list[ResetEntityTagsByNameResponse],
+        )
+        assert not statements
+
+        response = execute_and_validate_endpoint(
+            "/api/v1/entity_tags/advanced_search",
+            AdvancedSearchRequest(),
+            AdvancedSearchResponse[EntityTagResponse],
+        )
+        assert response.count > 0
+        assert statements
+    finally:
+        sqlalchemy.event.remove(
+            replica.engine.sync_engine, "before_cursor_execute", count_statement
+        )
+        # the connections belong to the event loop of the test client
+        test_client.portal.call(router.dispose)
+        test_client.portal.call(router.primary.dispose)
@@ -0,0 +1,68 @@
+"""
+This file contains the integration tests for the explain endpoints of the
+advanced searches, which return the plan of a search without running it.
+"""
+
+import pytest
+
+from app.common.base_entity.model import (
+    AdvancedSearchExplainResponse,
+    AdvancedSearchRequest,
+    Filter,
+    FilterType,
+    Sort,
+    SortType,
+)
+from tests.v1.integration.test_client import test_client
+from tests.v1.integration.utils.utils import execute_and_validate_endpoint
+
+# the EXPLAIN only
+EXPLAIN_MAX_STATEMENTS = 1
+
+
+@pytest.mark.parametrize(
+    "entity, field, table",
+    [
+        ("tags", "name", "tags"),
+        ("tag_groups", "name", "tag_groups"),
+        ("entity_tags", "entity_id", "entity_tags"),
+    ],
+)
+def test_explain_advanced_search(entity: str, field: str, table: str) -> None:
+    response = execute_and_validate_endpoint(
+        f"/api/v1/{entity}/advanced_search/explain",
+        AdvancedSearchRequest(
+            filters=[
+                Filter(
+                    field=field,
+                    field_type="string",
+                    filter_type=FilterType.STARTS_WITH,
+                    values=["explain-test"],
+                )
+            ],
+            sorts=[Sort(field=field, sort_type=SortType.DESC)],
+            limit=10,
+        ),
+        AdvancedSearchExplainResponse,
+        max_statements=EXPLAIN_MAX_STATEMENTS,
+    )
+
+    assert f"FROM {table}" in response.sql
+    assert "LIMIT" in response.sql
+    assert "explain-test%" in response.parameters.values()
+    assert response.plan["Plan Rows"] == response.estimated_rows
+    assert 0 <= response.startup_cost <= response.total_cost
+    assert response.uses_indexes == bool(response.indexes)
+    # the plan reads the rows through the indexes or sequentially
+    assert response.indexes or response.sequential_scans
+
+
+def test_explain_unknown_field() -> None:
+    response = test_client.post(
+        "/api/v1/tags/advanced_search/explain",
+        json=AdvancedSearchRequest(
+            sorts=[Sort(field="no_such_field", sort_type=SortType.ASC)]
+        ).model_dump(mode="json"),
+    )
+
+    assert response.status_code == 400
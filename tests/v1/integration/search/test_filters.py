@@ -0,0 +1,69 @@
+"""
+This file contains tests of the SQL that the advanced search filters compile to.
+"""
+
+from typing import List
+
+import pytest
+
+from app.api.v1.entity_tags.repository import EntityTagRepository
+from app.api.v1.entity_tags.types import EntityTagResponse
+from app.common.base_entity.model import (
+    AdvancedSearchRequest,
+    AdvancedSearchResponse,
+    Filter,
+    FilterType,
+)
+from app.common.database import get_db
+from tests.v1.integration.utils.utils import execute_and_validate_endpoint
+
+
+def search_sql(field: str, filter_type: FilterType, values: List[str]) -> str:
+    with next(get_db()) as db:
+        statement = EntityTagRepository(db).search_statement(
+            AdvancedSearchRequest(
+                filters=[
+                    Filter(
+                        field=field,
+                        field_type="string",
+                        filter_type=filter_type,
+                        values=values,
+                    )
+                ]
+            )
+        )
+        return str(statement.compile(dialect=db.get_bind().dialect))
+
+
+@pytest.mark.parametrize(
+    "field, filter_type",
+    [
+        ("entity_id", FilterType.EQUALS),
+        ("tag_id", FilterType.EQUALS),
+        ("entity_id", FilterType.STARTS_WITH),
+        ("entity_id", FilterType.CONTAINS),
+    ],
+)
+def test_sql_size_does_not_depend_on_the_number_of_values(field, filter_type):
+    few = search_sql(field, filter_type, ["1", "2"])
+    many = search_sql(field, filter_type, [str(i) for i in range(5000)])
+    assert few == many
+    assert "ANY" in many
+
+
+def test_search_by_many_values():
+    response = execute_and_validate_endpoint(
+        "/api/v1/entity_tags/advanced_search",
+        AdvancedSearchRequest(
+            filters=[
+                Filter(
+                    field="tag_id",
+                    field_type="string",
+                    filter_type=FilterType.EQUALS,
+                    values=[str(i) for i in range(-5000, 0)],
+                )
+            ]
+        ),
+        AdvancedSearchResponse[EntityTagResponse],
+    )
+    assert response.count == 0
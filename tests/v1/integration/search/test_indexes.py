@@ -0,0 +1,66 @@
+"""
+This file contains tests that check that the search filters are index backed,
+based on the plans Postgres chooses for them.
+"""
+
+import json
+
+import pytest
+import sqlalchemy
+
+from app.api.v1.entity_tags.repository import EntityTagRepository
+from app.api.v1.tag_groups.repository import TagGroupRepository
+from app.api.v1.tags.repository import TagRepository
+from app.common.base_entity.explain import explain_statement
+from app.common.base_entity.model import AdvancedSearchRequest, Filter, FilterType
+from app.common.database import get_db
+
+
+def search_plan(repository_class, field: str, filter_type: FilterType) -> str:
+    with next(get_db()) as db:
+        # the test tables are tiny, so a sequential scan would always be cheaper
+        db.execute(sqlalchemy.text("SET LOCAL enable_seqscan = off"))
+        statement = repository_class(db).search_statement(
+            AdvancedSearchRequest(
+                filters=[
+                    Filter(
+                        field=field,
+                        field_type="string",
+                        filter_type=filter_type,
+                        values=["abc"],
+                    )
+                ]
+            )
+        )
+        plan = explain_statement(db, statement.order_by(None))
+        db.rollback()
+        return json.dumps(plan)
+
+
+def is_pg_trgm_installed() -> bool:
+    with next(get_db()) as db:
+        return (
+            db.execute(
+                sqlalchemy.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            ).scalar()
+            is not None
+        )
+
+
+@pytest.mark.parametrize(
+    "repository_class, table, field",
+    [
+        (TagRepository, "tags", "name"),
+        (TagGroupRepository, "tag_groups", "name"),
+        # the entity ids are stored, and indexed, in the entities table
+        (EntityTagRepository, "entities", "entity_id"),
+    ],
+)
+def test_search_filters_use_indexes(repository_class, table, field):
+    plan = search_plan(repository_class, field, FilterType.STARTS_WITH)
+    assert f"ix_{table}_{field}_lower_pattern" in plan
+
+    if not is_pg_trgm_installed():
+        pytest.skip("pg_trgm is not installed")
+    plan = search_plan(repository_class, field, FilterType.CONTAINS)
+    assert f"ix_{table}_{field}_trgm" in plan
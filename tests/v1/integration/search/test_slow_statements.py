@@ -0,0 +1,92 @@
+"""
+This file contains the integration tests for the slow statements log of the
+advanced searches.
+"""
+
+from typing import Iterator, List
+
+import pytest
+import sqlalchemy
+
+from app.api.v1.tags.model import Tag
+from app.common.base_entity.model import AdvancedSearchRequest, Filter, FilterType
+from app.common.database import get_db
+from app.common.slow_statements import slow_statement_log
+from app.common.utils.logging_utils import get_logger
+from tests.v1.integration.test_client import test_client
+
+ROUTE = "/api/v1/tags/advanced_search"
+
+logger = get_logger()
+
+
+@pytest.fixture
+def slow_statements(monkeypatch) -> Iterator[List[dict]]:
+    """The analytics records of the slow statements, every statement being slow"""
+    monkeypatch.setattr(slow_statement_log, "threshold_seconds", 1e-9)
+    monkeypatch.setattr(slow_statement_log, "explain_sample_rate", 1)
+    records: List[dict] = []
+    handler_id = logger.add(
+        lambda message: records.append(message.record["extra"]),
+        level="DEBUG",
+        filter=lambda record: record["extra"].get("analytics")
+        and "slow_statement" in record["extra"],
+    )
+    yield records
+    logger.remove(handler_id)
+
+
+# pylint: disable=redefined-outer-name
+def test_slow_search_statement_is_logged_with_its_plan(slow_statements) -> None:
+    search_req = AdvancedSearchRequest(
+        filters=[
+            Filter(
+                field="name",
+                field_type="string",
+                filter_type=FilterType.EQUALS,
+                values=["slow-statements-test"],
+            )
+        ]
+    )
+
+    response = test_client.post(ROUTE, json=search_req.model_dump(mode="json"))
+
+    assert response.status_code == 200
+    searches = [
+        extra["slow_statement"]
+        for extra in slow_statements
+        if extra["slow_statement"]["search_request"] is not None
+    ]
+    assert searches
+    for search in searches:
+        assert search["route"] == ROUTE
+        assert search["search_request"]["filters"][0]["values"] == [
+            "slow-statements-test"
+        ]
+        assert search["seconds"] > 0
+    # the statements of the search bind the filter values
+    assert any("slow-statements-test" in str(s["parameters"]) for s in searches)
+    assert all("Execution Time" in search["plan"] for search in searches)
+
+
+def test_fast_statements_are_not_logged(slow_statements, monkeypatch) -> None:
+    monkeypatch.setattr(slow_statement_log, "threshold_seconds", 0)
+
+    assert test_client.get("/api/v1/tags/0").status_code == 404
+
+    assert not slow_statements
+
+
+def test_only_the_compiled_selects_are_explained(slow_statements) -> None:
+    deleted = sqlalchemy.delete(Tag).where(Tag.id == 0).returning(Tag.id).cte("deleted")
+    with next(get_db()) as db:
+        db.execute(sqlalchemy.select(Tag.id).where(Tag.id == 0))
+        # text statements may modify data, whatever their first keyword
+        db.execute(sqlalchemy.text("WITH zero AS (SELECT 0) SELECT * FROM zero"))
+        db.execute(sqlalchemy.select(deleted.c.id))
+        db.rollback()
+
+    explained = [
+        extra["slow_statement"]["plan"] is not None for extra in slow_statements
+    ]
+    assert explained == [True, False, False]
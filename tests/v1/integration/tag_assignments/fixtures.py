@@ -0,0 +1,36 @@
+"""
+Fixtures for tag_assignments (entity tags) tests.
+"""
+
+import pytest
+import sqlalchemy
+
+from app.common.database import get_db
+
+RESET_ENTITY_IDS = ("/khulnasoft/reset-test-1", "/khulnasoft/reset-test-2")
+RESET_TAG_GROUP_NAMES = ("reset_test_language", "reset_test_bu")
+RESET_TAG_NAMES = ("reset-test-java", "reset-test-python", "reset-test-bu-1")
+
+
+@pytest.fixture()
+def reset_cleanup():
+    yield
+    with next(get_db()) as db:
+        db.execute(
+            sqlalchemy.text(
+                "DELETE FROM entity_tags USING entities "
+                "WHERE entity_tags.entity_key = entities.id "
+                "AND entities.entity_id IN :entity_ids"
+            ).bindparams(entity_ids=RESET_ENTITY_IDS)
+        )
+        db.execute(
+            sqlalchemy.text("DELETE FROM tags WHERE name IN :tag_names").bindparams(
+                tag_names=RESET_TAG_NAMES
+            )
+        )
+        db.execute(
+            sqlalchemy.text(
+                "DELETE FROM tag_groups WHERE name IN :tag_group_names"
+            ).bindparams(tag_group_names=RESET_TAG_GROUP_NAMES)
+        )
+        db.commit()
@@ -0,0 +1,343 @@
+"""
+This file contains the integration tests for the entity_tags endpoints.
+"""
+
+from typing import List
+
+from app.api.v1.entity_tags.types import (
+    EntityTagCreateRequest,
+    EntityTagResponse,
+    ResetEntityTagsByNameRequest,
+    ResetEntityTagsByNameResponse,
+    TagGroupTagsByNameRequest,
+)
+from app.api.v1.tag_groups.service import tag_group_cache
+from app.api.v1.tags.service import tag_cache
+from app.common.base_entity.model import (
+    AdvancedSearchRequest,
+    AdvancedSearchResponse,
+    CountMode,
+    Filter,
+    FilterType,
+    Sort,
+    SortType,
+)
+
+# pylint: disable=unused-import
+from tests.v1.integration.tag_assignments.fixtures import (
+    reset_cleanup,
+    RESET_ENTITY_IDS,
+)
+from tests.v1.integration.test_client import test_client
+from tests.v1.integration.utils.utils import (
+    SqlCapture,
+    capture_sql,
+    execute_and_validate_endpoint,
+)
+
+
+def search_entity_tags(entity_id: str) -> AdvancedSearchResponse[EntityTagResponse]:
+    return execute_and_validate_endpoint(
+        "/api/v1/entity_tags/advanced_search",
+        AdvancedSearchRequest(
+            filters=[
+                Filter(
+                    field="entity_id",
+                    field_type="string",
+                    filter_type=FilterType.EQUALS,
+                    values=[entity_id],
+                )
+            ]
+        ),
+        AdvancedSearchResponse[EntityTagResponse],
+    )
+
+
+def reset_test_entities() -> None:
+    """Tags both test entities with the same 3 tags"""
+    execute_and_validate_endpoint(
+        "/api/v1/entity_tags/reset",
+        [
+            ResetEntityTagsByNameRequest(
+                entity_id=entity_id,
+                entity_type="repo",
+                tag_groups=[
+                    TagGroupTagsByNameRequest(
+                        tag_group_name="reset_test_language",
+                        tag_names=["reset-test-java", "reset-test-python"],
+                    ),
+                    TagGroupTagsByNameRequest(
+                        tag_group_name="reset_test_bu", tag_names=["reset-test-bu-1"]
+                    ),
+                ],
+            )
+            for entity_id in RESET_ENTITY_IDS
+        ],
+        List[ResetEntityTagsByNameResponse],
+    )
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_reset_batch(reset_cleanup):
+    entity_1, entity_2 = RESET_ENTITY_IDS
+    reset_requests = [
+        ResetEntityTagsByNameRequest(
+            entity_id=entity_1,
+            entity_type="repo",
+            tag_groups=[
+                TagGroupTagsByNameRequest(
+                    tag_group_name="reset_test_language",
+                    tag_names=["reset-test-java", "reset-test-python"],
+                )
+            ],
+        ),
+        ResetEntityTagsByNameRequest(
+            entity_id=entity_2,
+            entity_type="repo",
+            tag_groups=[
+                TagGroupTagsByNameRequest(
+                    tag_group_name="reset_test_bu",
+                    # reset-test-java belongs to reset_test_language
+                    tag_names=["reset-test-bu-1", "reset-test-java"],
+                )
+            ],
+        ),
+    ]
+
+    responses = execute_and_validate_endpoint(
+        "/api/v1/entity_tags/reset",
+        reset_requests,
+        List[ResetEntityTagsByNameResponse],
+    )
+
+    assert [response.entity_id for response in responses] == [entity_1, entity_2]
+    assert {tag.name for tag in responses[0].tags} == {
+        "reset-test-java",
+        "reset-test-python",
+    }
+    assert responses[0].errors == []
+    assert [tag.name for tag in responses[1].tags] == ["reset-test-bu-1"]
+    assert len(responses[1].errors) == 1
+    assert "already exists in another group" in responses[1].errors[0]
+
+    assert search_entity_tags(entity_1).count == 2
+    assert search_entity_tags(entity_2).count == 1
+
+    # resetting again replaces the tags, and the last reset of an entity wins
+    reset_requests = [
+        ResetEntityTagsByNameRequest(
+            entity_id=entity_1,
+            entity_type="repo",
+            tag_groups=[
+                TagGroupTagsByNameRequest(
+                    tag_group_name="reset_test_language", tag_names=["reset-test-java"]
+                )
+            ],
+        ),
+        ResetEntityTagsByNameRequest(
+            entity_id=entity_1,
+            entity_type="repo",
+            tag_groups=[
+                TagGroupTagsByNameRequest(
+                    tag_group_name="reset_test_language",
+                    tag_names=["reset-test-python"],
+                )
+            ],
+        ),
+    ]
+    responses = execute_and_validate_endpoint(
+        "/api/v1/entity_tags/reset",
+        reset_requests,
+        List[ResetEntityTagsByNameResponse],
+    )
+    assert len(responses) == 2
+
+    entity_tags = search_entity_tags(entity_1)
+    assert [entity_tag.tag.name for entity_tag in entity_tags.results] == [
+        "reset-test-python"
+    ]
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_reset_diff_mode(reset_cleanup):
+    entity_1, _ = RESET_ENTITY_IDS
+
+    def reset_diff(tag_names: List[str]) -> ResetEntityTagsByNameResponse:
+        [response] = execute_and_validate_endpoint(
+            "/api/v1/entity_tags/reset?mode=diff",
+            [
+                ResetEntityTagsByNameRequest(
+                    entity_id=entity_1,
+                    entity_type="repo",
+                    tag_groups=[
+                        TagGroupTagsByNameRequest(
+                            tag_group_name="reset_test_language", tag_names=tag_names
+                        )
+                    ],
+                )
+            ],
+            List[ResetEntityTagsByNameResponse],
+        )
+        return response
+
+    response = reset_diff(["reset-test-java", "reset-test-python"])
+    assert (response.added, response.removed, response.unchanged) == (2, 0, 0)
+
+    # nothing changed
+    response = reset_diff(["reset-test-python", "reset-test-java"])
+    assert (response.added, response.removed, response.unchanged) == (0, 0, 2)
+    assert {tag.name for tag in response.tags} == {
+        "reset-test-java",
+        "reset-test-python",
+    }
+
+    response = reset_diff(["reset-test-python"])
+    assert (response.added, response.removed, response.unchanged) == (0, 1, 1)
+
+    entity_tags = search_entity_tags(entity_1)
+    assert [entity_tag.tag.name for entity_tag in entity_tags.results] == [
+        "reset-test-python"
+    ]
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_advanced_search_query_count_is_constant(reset_cleanup):
+    entity_1, entity_2 = RESET_ENTITY_IDS
+    reset_test_entities()
+
+    search_request = AdvancedSearchRequest(
+        filters=[
+            Filter(
+                field="entity_id",
+                field_type="string",
+                filter_type=FilterType.EQUALS,
+                values=[entity_1, entity_2],
+            )
+        ]
+    )
+
+    def search() -> SqlCapture:
+        with capture_sql() as sql:
+            response = execute_and_validate_endpoint(
+                "/api/v1/entity_tags/advanced_search",
+                search_request,
+                AdvancedSearchResponse[EntityTagResponse],
+            )
+        assert response.count == 6
+        return sql
+
+    tag_cache.invalidate()
+    tag_group_cache.invalidate()
+    cold = search()
+    # count + page + a version check per cached table + tags + tag groups
+    assert len(cold.statements) == 6, cold.summary()
+
+    warm = search()
+    # the tags and the tag groups come from the cache
+    assert len(warm.statements) == 4, warm.summary()
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_advanced_search_cursor_pagination(reset_cleanup):
+    entity_1, entity_2 = RESET_ENTITY_IDS
+    reset_test_entities()
+
+    for sorts in ([], [Sort(field="entity_id", sort_type=SortType.DESC)]):
+        search_request = AdvancedSearchRequest(
+            filters=[
+                Filter(
+                    field="entity_id",
+                    field_type="string",
+                    filter_type=FilterType.EQUALS,
+                    values=[entity_1, entity_2],
+                )
+            ],
+            sorts=sorts,
+            limit=4,
+        )
+        # the default order is the primary key, whose entity_key depends on which
+        # test created the entities first: the pages follow a single search
+        unpaginated = execute_and_validate_endpoint(
+            "/api/v1/entity_tags/advanced_search",
+            search_request.model_copy(update={"limit": 10}),
+            AdvancedSearchResponse[EntityTagResponse],
+        )
+        pages = []
+        while True:
+            page = execute_and_validate_endpoint(
+                "/api/v1/entity_tags/advanced_search",
+                search_request,
+                AdvancedSearchResponse[EntityTagResponse],
+            )
+            pages.append(page)
+            if not page.next_cursor:
+                break
+            search_request.cursor = page.next_cursor
+
+        assert [page.count for page in pages] == [4, 2]
+        rows = [
+            (entity_tag.entity_id, entity_tag.tag_id)
+            for page in pages
+            for entity_tag in page.results
+        ]
+        assert len(set(rows)) == 6
+        assert rows == [
+            (entity_tag.entity_id, entity_tag.tag_id)
+            for entity_tag in unpaginated.results
+        ]
+        if sorts:
+            # entity_id descending, then the primary key tie breaker (tag_id) ascending
+            assert rows == sorted(sorted(rows), key=lambda row: row[0], reverse=True)
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_advanced_search_count_modes(reset_cleanup):
+    reset_test_entities()
+
+    def search(count_mode: CountMode) -> AdvancedSearchResponse[EntityTagResponse]:
+        return execute_and_validate_endpoint(
+            "/api/v1/entity_tags/advanced_search",
+            AdvancedSearchRequest(
+                filters=[
+                    Filter(
+                        field="entity_id",
+                        field_type="string",
+                        filter_type=FilterType.EQUALS,
+                        values=list(RESET_ENTITY_IDS),
+                    )
+                ],
+                limit=5,
+                count_mode=count_mode,
+            ),
+            AdvancedSearchResponse[EntityTagResponse],
+        )
+
+    exact = search(CountMode.EXACT)
+    assert exact.count_total == 6
+    assert exact.has_more
+
+    estimated = search(CountMode.ESTIMATED)
+    assert estimated.count_total is not None and estimated.count_total >= 0
+
+    no_count = search(CountMode.NONE)
+    assert no_count.count_total is None
+    assert no_count.count == 5
+    assert no_count.has_more
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_create_assigned_tag_with_another_entity_type(reset_cleanup):
+    entity_1, _ = RESET_ENTITY_IDS
+    reset_test_entities()
+    tag_id = search_entity_tags(entity_1).results[0].tag.id
+
+    for entity_type in ("file", "repo"):
+        response = test_client.post(
+            "/api/v1/entity_tags",
+            json=EntityTagCreateRequest(
+                entity_id=entity_1, entity_type=entity_type, tag_id=tag_id
+            ).model_dump(),
+        )
+        assert response.status_code == 409, response.text
+
+    assert len(search_entity_tags(entity_1).results) == 3
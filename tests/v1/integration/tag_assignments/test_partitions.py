@@ -0,0 +1,184 @@
+"""
+This file contains the integration tests for the partitions of entity_tags.
+"""
+
+import pytest
+import sqlalchemy
+
+from app.api.v1.entity_tags.partitions import (
+    DEFAULT_PARTITION,
+    create_entity_type_partition,
+    entity_tags_partitions,
+)
+from app.api.v1.entity_tags.repository import EntityTagRepository
+from app.api.v1.entity_tags.service import EntityTagService
+from app.api.v1.entity_tags.types import (
+    ResetEntityTagsByNameRequest,
+    ResetMode,
+    TagGroupTagsByNameRequest,
+)
+from app.api.v1.tag_groups.repository import TagGroupRepository
+from app.api.v1.tag_groups.service import TagGroupService
+from app.api.v1.tags.repository import TagRepository
+from app.api.v1.tags.service import TagService
+from app.common.base_entity.model import AdvancedSearchRequest, Filter, FilterType
+from app.common.database import get_db, get_engine
+
+NAME_PREFIX = "partitions_test_"
+PARTITIONED_TYPE = f"{NAME_PREFIX}repo"
+OTHER_TYPE = f"{NAME_PREFIX}file"
+ENTITY_IDS = [f"/{NAME_PREFIX}/entity_{i}" for i in range(3)]
+TAG_GROUP_NAME = f"{NAME_PREFIX}group"
+TAG_NAME = f"{NAME_PREFIX}tag"
+
+
+def reset_entities(entity_type: str, mode: ResetMode = ResetMode.REPLACE) -> None:
+    with next(get_db()) as db:
+        EntityTagService(EntityTagRepository(db)).reset_entity_tags_by_name_bulk(
+            [
+                ResetEntityTagsByNameRequest(
+                    entity_id=entity_id,
+                    entity_type=entity_type,
+                    tag_groups=[
+                        TagGroupTagsByNameRequest(
+                            tag_group_name=TAG_GROUP_NAME, tag_names=[TAG_NAME]
+                        )
+                    ],
+                )
+                for entity_id in ENTITY_IDS
+            ],
+            TagService(TagRepository(db)),
+            TagGroupService(TagGroupRepository(db)),
+            mode=mode,
+        )
+
+
+def stored_partitions() -> dict[str, str]:
+    """The partition each test entity is stored in"""
+    with next(get_db()) as db:
+        return dict(
+            db.execute(
+                sqlalchemy.text(
+                    "SELECT e.entity_id, et.tableoid::regclass::text "
+                    "FROM entity_tags et JOIN entities e ON e.id = et.entity_key "
+                    "WHERE e.entity_id IN :entity_ids"
+                ).bindparams(entity_ids=tuple(ENTITY_IDS))
+            ).all()
+        )
+
+
+def entity_type_search(entity_type: str) -> AdvancedSearchRequest:
+    return AdvancedSearchRequest(
+        filters=[
+            Filter(
+                field="entity_type",
+                field_type="string",
+                filter_type=FilterType.EQUALS,
+                values=[entity_type],
+            )
+        ]
+    )
+
+
+@pytest.fixture
+def partitioned_type():
+    """PARTITIONED_TYPE entities, stored in the default partition"""
+    reset_entities(PARTITIONED_TYPE)
+
+    yield
+
+    with next(get_db()) as db:
+        db.execute(
+            sqlalchemy.text(
+                "DELETE FROM entity_tags USING entities "
+                "WHERE entity_tags.entity_key = entities.id "
+                "AND entities.entity_id IN :entity_ids"
+            ).bindparams(entity_ids=tuple(ENTITY_IDS))
+        )
+        for partition in entity_tags_partitions(db.connection()):
+            if partition.entity_type in (PARTITIONED_TYPE, OTHER_TYPE):
+                db.execute(
+                    sqlalchemy.text(
+                        f"ALTER TABLE entity_tags DETACH PARTITION {partition.partition}"
+                    )
+                )
+                db.execute(sqlalchemy.text(f"DROP TABLE {partition.partition}"))
+        db.execute(
+            sqlalchemy.text("DELETE FROM entity_types WHERE name LIKE :prefix"),
+            {"prefix": f"{NAME_PREFIX}%"},
+        )
+        db.execute(
+            sqlalchemy.text("DELETE FROM tags WHERE name = :name"), {"name": TAG_NAME}
+        )
+        db.execute(
+            sqlalchemy.text("DELETE FROM tag_groups WHERE name = :name"),
+            {"name": TAG_GROUP_NAME},
+        )
+        db.commit()
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_create_partition_moves_the_rows_of_the_type(partitioned_type):
+    assert set(stored_partitions().values()) == {DEFAULT_PARTITION}
+
+    with get_engine().connect() as connection:
+        assert create_entity_type_partition(connection, PARTITIONED_TYPE) == len(
+            ENTITY_IDS
+        )
+        # the partition exists already
+        assert create_entity_type_partition(connection, PARTITIONED_TYPE) == 0
+        partitions = {
+            partition.entity_type: partition.partition
+            for partition in entity_tags_partitions(connection)
+        }
+
+    partition = partitions[PARTITIONED_TYPE]
+    assert stored_partitions() == {entity_id: partition for entity_id in ENTITY_IDS}
+    with next(get_db()) as db:
+        response = EntityTagRepository(db).advanced_search(
+            entity_type_search(PARTITIONED_TYPE)
+        )
+    assert sorted(entity_tag.entity_id for entity_tag in response.results) == (
+        ENTITY_IDS
+    )
+
+
+def test_entity_type_search_skips_the_other_partitions(partitioned_type):
+    with get_engine().connect() as connection:
+        create_entity_type_partition(connection, PARTITIONED_TYPE)
+
+    with next(get_db()) as db:
+        statement = EntityTagRepository(db).search_statement(
+            entity_type_search(PARTITIONED_TYPE)
+        )
+        compiled = statement.compile(
+            dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}
+        )
+        plan = "\n".join(
+            db.execute(
+                sqlalchemy.text(
+                    f"EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF, SUMMARY OFF) {compiled}"
+                )
+            ).scalars()
+        )
+
+    default_scan = next(
+        line for line in plan.splitlines() if f"on {DEFAULT_PARTITION}" in line
+    )
+    assert "never executed" in default_scan
+
+
+def test_diff_reset_moves_the_retyped_entities(partitioned_type):
+    with get_engine().connect() as connection:
+        create_entity_type_partition(connection, PARTITIONED_TYPE)
+        create_entity_type_partition(connection, OTHER_TYPE)
+        partitions = {
+            partition.entity_type: partition.partition
+            for partition in entity_tags_partitions(connection)
+        }
+
+    reset_entities(OTHER_TYPE, mode=ResetMode.DIFF)
+
+    assert stored_partitions() == {
+        entity_id: partitions[OTHER_TYPE] for entity_id in ENTITY_IDS
+    }
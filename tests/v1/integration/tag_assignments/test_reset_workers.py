@@ -0,0 +1,144 @@
+"""
+This file contains the integration tests for the parallel resets, and the
+advisory locks that serialize the concurrent resets of an entity.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import sqlalchemy
+from sqlalchemy.exc import DBAPIError
+
+from app.api.v1.entity_tags.repository import EntityTagRepository
+from app.api.v1.entity_tags.reset_workers import reset_workers, shard_requests
+from app.api.v1.entity_tags.service import AsyncEntityTagService, EntityTagService
+from app.api.v1.entity_tags.types import (
+    ResetEntityTagsByNameRequest,
+    ResetEntityTagsByNameResponse,
+    TagGroupTagsByNameRequest,
+)
+from app.api.v1.tag_groups.repository import TagGroupRepository
+from app.api.v1.tag_groups.service import TagGroupService
+from app.api.v1.tags.repository import TagRepository
+from app.api.v1.tags.service import TagService
+from app.common.database import get_db
+
+# pylint: disable=unused-import
+from tests.v1.integration.tag_assignments.fixtures import (
+    reset_cleanup,
+    RESET_ENTITY_IDS,
+)
+from tests.v1.integration.utils.utils import execute_and_validate_endpoint
+
+TAG_NAMES = ["reset-test-java", "reset-test-python"]
+
+
+def reset_request(entity_id: str, tag_name: str) -> ResetEntityTagsByNameRequest:
+    return ResetEntityTagsByNameRequest(
+        entity_id=entity_id,
+        entity_type="repo",
+        tag_groups=[
+            TagGroupTagsByNameRequest(
+                tag_group_name="reset_test_language", tag_names=[tag_name]
+            )
+        ],
+    )
+
+
+def stored_tag_names() -> dict[str, List[str]]:
+    with next(get_db()) as db:
+        rows = db.execute(
+            sqlalchemy.text(
+                "SELECT e.entity_id, t.name FROM entity_tags et "
+                "JOIN entities e ON e.id = et.entity_key "
+                "JOIN tags t ON t.id = et.tag_id "
+                "WHERE e.entity_id IN :entity_ids ORDER BY t.name"
+            ).bindparams(entity_ids=RESET_ENTITY_IDS)
+        ).all()
+    tag_names: dict[str, List[str]] = {}
+    for entity_id, tag_name in rows:
+        tag_names.setdefault(entity_id, []).append(tag_name)
+    return tag_names
+
+
+def test_shard_requests_keeps_the_requests_of_an_entity_together():
+    requests = [
+        reset_request(entity_id, TAG_NAMES[0])
+        for entity_id in ["/a", "/b", "/c", "/a", "/d", "/e", "/b"]
+    ]
+    assert shard_requests(requests, 2) == [[0, 1, 3, 6], [2, 4], [5]]
+    assert shard_requests(requests, 10) == [list(range(len(requests)))]
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_sharded_reset_keeps_the_request_order(reset_cleanup, monkeypatch):
+    monkeypatch.setattr(reset_workers, "shard_size", 1)
+    entity_1, entity_2 = RESET_ENTITY_IDS
+    responses = execute_and_validate_endpoint(
+        "/api/v1/entity_tags/reset",
+        [
+            reset_request(entity_1, TAG_NAMES[0]),
+            reset_request(entity_2, TAG_NAMES[0]),
+            reset_request(entity_1, TAG_NAMES[1]),
+        ],
+        List[ResetEntityTagsByNameResponse],
+    )
+
+    assert [
+        (response.entity_id, [tag.name for tag in response.tags])
+        for response in responses
+    ] == [
+        (entity_1, [TAG_NAMES[0]]),
+        (entity_2, [TAG_NAMES[0]]),
+        (entity_1, [TAG_NAMES[1]]),
+    ]
+    # the last reset of an entity wins
+    assert stored_tag_names() == {entity_1: [TAG_NAMES[1]], entity_2: [TAG_NAMES[0]]}
+
+
+def test_concurrent_resets_of_an_entity_are_serialized(reset_cleanup):
+    def reset(tag_name: str) -> None:
+        with next(get_db()) as db:
+            EntityTagService(EntityTagRepository(db)).reset_entity_tags_by_name_bulk(
+                [reset_request(entity_id, tag_name) for entity_id in RESET_ENTITY_IDS],
+                TagService(TagRepository(db)),
+                TagGroupService(TagGroupRepository(db)),
+            )
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(reset, TAG_NAMES * 10))
+
+    # every reset replaced the tags of both entities, one reset after the other
+    tag_names = stored_tag_names()
+    assert len(tag_names[RESET_ENTITY_IDS[0]]) == 1
+    assert tag_names[RESET_ENTITY_IDS[0]] == tag_names[RESET_ENTITY_IDS[1]]
+
+
+class DeadlockDetected(Exception):
+    pgcode = "40P01"
+
+
+def test_shard_is_retried_on_deadlock(reset_cleanup, monkeypatch):
+    reset_bulk = AsyncEntityTagService.reset_entity_tags_by_name_bulk
+    calls = []
+
+    async def deadlock_once(self, requests, mode):
+        calls.append(len(requests))
+        if len(calls) == 1:
+            raise DBAPIError("SELECT", {}, DeadlockDetected())
+        return await reset_bulk(self, requests, mode)
+
+    monkeypatch.setattr(
+        AsyncEntityTagService, "reset_entity_tags_by_name_bulk", deadlock_once
+    )
+    responses = execute_and_validate_endpoint(
+        "/api/v1/entity_tags/reset",
+        [reset_request(entity_id, TAG_NAMES[0]) for entity_id in RESET_ENTITY_IDS],
+        List[ResetEntityTagsByNameResponse],
+    )
+
+    assert calls == [2, 2]
+    assert [response.entity_id for response in responses] == list(RESET_ENTITY_IDS)
+    assert stored_tag_names() == {
+        entity_id: [TAG_NAMES[0]] for entity_id in RESET_ENTITY_IDS
+    }
@@ -0,0 +1,78 @@
+"""
+This file contains the integration tests for the entity_tags service, on the
+sync sessions (which expire their objects on commit).
+"""
+
+from app.api.v1.entity_tags.repository import EntityTagRepository
+from app.api.v1.entity_tags.service import EntityTagService
+from app.api.v1.entity_tags.types import (
+    EntityTagCreateRequest,
+    ResetEntityTagsByNameRequest,
+    TagGroupTagsByNameRequest,
+)
+from app.api.v1.tag_groups.repository import TagGroupRepository
+from app.api.v1.tag_groups.service import TagGroupService
+from app.api.v1.tags.repository import TagRepository
+from app.api.v1.tags.service import TagService
+from app.common.database import get_db
+
+# pylint: disable=unused-import
+from tests.v1.integration.tag_assignments.fixtures import (
+    reset_cleanup,
+    RESET_ENTITY_IDS,
+    RESET_TAG_GROUP_NAMES,
+    RESET_TAG_NAMES,
+)
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_create_returns_the_decoded_fields(reset_cleanup):
+    entity_id = RESET_ENTITY_IDS[0]
+    with next(get_db()) as db:
+        tag_group = TagGroupService(TagGroupRepository(db)).find_by_name_or_create(
+            RESET_TAG_GROUP_NAMES[0]
+        )
+        tag = TagService(TagRepository(db)).find_by_name_or_create(
+            RESET_TAG_NAMES[0], tag_group
+        )
+
+        created = EntityTagService(EntityTagRepository(db)).create(
+            EntityTagCreateRequest(
+                entity_id=entity_id, entity_type="repo", tag_id=tag.id
+            )
+        )
+
+        # expired by the commit of the unit of work
+        assert (created.entity_id, created.entity_type, created.tag_id) == (
+            entity_id,
+            "repo",
+            tag.id,
+        )
+        db.expire(created)
+        assert (created.entity_id, created.entity_type) == (entity_id, "repo")
+
+
+def test_reset_reports_a_tag_listed_twice(reset_cleanup):
+    java, python = RESET_TAG_NAMES[:2]
+    with next(get_db()) as db:
+        tag_service = TagService(TagRepository(db))
+        tag_group_service = TagGroupService(TagGroupRepository(db))
+        response = EntityTagService(EntityTagRepository(db)).reset_entity_tags_by_name(
+            ResetEntityTagsByNameRequest(
+                entity_id=RESET_ENTITY_IDS[0],
+                entity_type="repo",
+                tag_groups=[
+                    TagGroupTagsByNameRequest(
+                        tag_group_name=RESET_TAG_GROUP_NAMES[0],
+                        tag_names=[java, java, python],
+                    )
+                ],
+            ),
+            tag_service,
+            tag_group_service,
+        )
+
+    # the second assignment fails in its savepoint, the others are kept
+    assert [tag.name for tag in response.tags] == [java, python]
+    assert len(response.errors) == 1
+    assert response.errors[0].startswith(f"Error creating tag: {java}")
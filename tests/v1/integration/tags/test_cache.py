@@ -0,0 +1,90 @@
+"""
+This file contains the integration tests for the tags and tag groups cache.
+"""
+
+import sqlalchemy
+
+from app.api.v1.general.types import CacheStatsResponse
+from app.api.v1.tag_groups.model import (
+    TagGroup,
+    TagGroupCreateRequest,
+    TagGroupResponse,
+)
+from app.api.v1.tags.model import TagCreateRequest, TagResponse
+from app.common.cache import EntityCache
+from app.common.database import get_db
+from tests.v1.integration.utils.utils import execute_and_validate_endpoint
+
+
+def get_cache_stats() -> CacheStatsResponse:
+    return execute_and_validate_endpoint(
+        "/api/v1/cache_stats", {}, CacheStatsResponse, method="GET"
+    )
+
+
+def test_cache_is_invalidated_by_changes_outside_the_service():
+    tag_group = execute_and_validate_endpoint(
+        "/api/v1/tag_groups",
+        TagGroupCreateRequest(name="cache_test_group"),
+        TagGroupResponse,
+    )
+    tag = execute_and_validate_endpoint(
+        "/api/v1/tags",
+        TagCreateRequest(name="cache-test-tag", tag_group_id=tag_group.id),
+        TagResponse,
+    )
+    try:
+        execute_and_validate_endpoint(
+            f"/api/v1/tags/{tag.id}", {}, TagResponse, method="GET"
+        )
+        hits = get_cache_stats().tags.hits
+        execute_and_validate_endpoint(
+            f"/api/v1/tags/{tag.id}", {}, TagResponse, method="GET"
+        )
+        assert get_cache_stats().tags.hits == hits + 1
+
+        # e.g. another replica renames the tag
+        with next(get_db()) as db:
+            db.execute(
+                sqlalchemy.text("UPDATE tags SET name = :name WHERE id = :id"),
+                {"name": "cache-test-tag-renamed", "id": tag.id},
+            )
+            db.commit()
+
+        renamed = execute_and_validate_endpoint(
+            f"/api/v1/tags/{tag.id}", {}, TagResponse, method="GET"
+        )
+        assert renamed.name == "cache-test-tag-renamed"
+    finally:
+        with next(get_db()) as db:
+            db.execute(
+                sqlalchemy.text("DELETE FROM tags WHERE id = :id"), {"id": tag.id}
+            )
+            db.execute(
+                sqlalchemy.text("DELETE FROM tag_groups WHERE id = :id"),
+                {"id": tag_group.id},
+            )
+            db.commit()
+
+
+def test_lagging_session_does_not_clear_the_cache():
+    cache = EntityCache(TagGroup, max_size=10)
+    tag_group = TagGroup(id=0, name="cache_test_lagging_group")
+    with next(get_db()) as primary, next(get_db()) as lagging:
+        # uncommitted, the lagging session still reads the older version
+        primary.execute(
+            sqlalchemy.text(
+                "UPDATE cache_versions SET version = version + 1 "
+                "WHERE name = 'tag_groups'"
+            )
+        )
+        cache.put(primary, [tag_group])
+        assert cache.get(primary, 0).name == tag_group.name
+
+        assert cache.get(lagging, 0) is None
+        assert cache.get_by_name(lagging, tag_group.name) is None
+        # not cleared, and still on the newer version
+        assert cache.stats().size == 1
+        assert cache.stats().invalidations == 0
+        assert cache.get(primary, 0).name == tag_group.name
+        primary.rollback()
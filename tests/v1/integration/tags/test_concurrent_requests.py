@@ -0,0 +1,48 @@
+"""
+This file contains the integration tests for serving many concurrent requests
+on the event loop (async endpoints and database sessions).
+"""
+
+import asyncio
+
+import anyio.to_thread
+import httpx
+
+from app.main import app
+from tests.v1.integration.test_client import test_client
+
+CONCURRENT_REQUESTS = 200
+
+
+async def search_tags_concurrently() -> list[int]:
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/api/v1/tags/advanced_search",
+                    json={"filters": [], "limit": 10},
+                )
+                for _ in range(CONCURRENT_REQUESTS)
+            )
+        )
+    return [response.status_code for response in responses]
+
+
+def test_concurrent_advanced_searches(monkeypatch):
+    thread_calls = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def counting_run_sync(*args, **kwargs):
+        thread_calls.append(args[0])
+        return await run_sync(*args, **kwargs)
+
+    monkeypatch.setattr(anyio.to_thread, "run_sync", counting_run_sync)
+
+    # the pooled connections belong to the event loop of the test client
+    status_codes = test_client.portal.call(search_tags_concurrently)
+
+    assert status_codes == [200] * CONCURRENT_REQUESTS
+    # the endpoint and its dependencies never wait on the threadpool
+    assert not thread_calls
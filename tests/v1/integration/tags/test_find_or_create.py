@@ -0,0 +1,60 @@
+"""
+This file contains the integration tests for the concurrency safe get-or-create
+of tags and tag groups.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlalchemy
+
+from app.api.v1.tag_groups.repository import TagGroupRepository
+from app.api.v1.tag_groups.service import TagGroupService
+from app.api.v1.tags.repository import TagRepository
+from app.api.v1.tags.service import TagService
+from app.common.database import get_db
+
+WORKERS = 8
+TAG_GROUP_NAME = "concurrent_test_group"
+TAG_NAMES = [f"concurrent-test-tag-{i}" for i in range(20)]
+
+
+def find_or_create_tags(tag_names: list[str]) -> dict[str, int]:
+    with next(get_db()) as db:
+        tag_group_service = TagGroupService(TagGroupRepository(db))
+        tag_service = TagService(TagRepository(db))
+
+        tag_group = tag_group_service.find_by_names_or_create([TAG_GROUP_NAME])[
+            TAG_GROUP_NAME
+        ]
+        tags = tag_service.find_by_names_or_create(
+            {name: tag_group for name in tag_names}
+        )
+        db.commit()
+        return {name: tag.id for name, tag in tags.items()}
+
+
+def test_find_by_names_or_create_concurrently():
+    try:
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            # every worker asks for the same names, in a different order
+            results = list(
+                executor.map(
+                    find_or_create_tags,
+                    [TAG_NAMES[i:] + TAG_NAMES[:i] for i in range(WORKERS)],
+                )
+            )
+
+        assert all(result == results[0] for result in results)
+        assert set(results[0]) == set(TAG_NAMES)
+    finally:
+        with next(get_db()) as db:
+            db.execute(
+                sqlalchemy.text("DELETE FROM tags WHERE name IN :names").bindparams(
+                    names=tuple(TAG_NAMES)
+                )
+            )
+            db.execute(
+                sqlalchemy.text("DELETE FROM tag_groups WHERE name = :name"),
+                {"name": TAG_GROUP_NAME},
+            )
+            db.commit()
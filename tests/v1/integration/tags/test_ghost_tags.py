@@ -0,0 +1,143 @@
+"""
+This file contains the integration tests for the batched cleanup of the tags
+with no entities (ghost tags), and of the tag groups without tags.
+"""
+
+import time
+
+import pytest
+import sqlalchemy
+
+from app.api.v1.entity_tags.repository import EntityTagRepository
+from app.api.v1.tag_groups.model import TagGroup
+from app.api.v1.tags.ghost_tags import GhostTagsGCStatus
+from app.api.v1.tags.model import Tag
+from app.api.v1.tags.repository import TagRepository
+from app.api.v1.tags.service import TagService
+from app.common.database import get_db
+from tests.v1.integration.utils.utils import execute_and_validate_endpoint
+
+NAME_PREFIX = "ghost_tags_test_"
+GHOST_TAG_COUNT = 5
+USED_ENTITY_ID = f"{NAME_PREFIX}entity"
+
+
+def stored_tag_names() -> list[str]:
+    with next(get_db()) as db:
+        return sorted(
+            db.scalars(
+                sqlalchemy.select(Tag.name).where(Tag.name.like(f"{NAME_PREFIX}%"))
+            )
+        )
+
+
+def stored_tag_group_names() -> list[str]:
+    with next(get_db()) as db:
+        return sorted(
+            db.scalars(
+                sqlalchemy.select(TagGroup.name).where(
+                    TagGroup.name.like(f"{NAME_PREFIX}%")
+                )
+            )
+        )
+
+
+@pytest.fixture
+def ghost_tags() -> list[int]:
+    """
+    An empty tag group, and a tag group with ghost tags and a used tag.
+    The ids of the tag groups scope the cleanups of the tests to their rows.
+    """
+    with next(get_db()) as db:
+        tag_group = TagGroup(name=f"{NAME_PREFIX}group")
+        empty_tag_group = TagGroup(name=f"{NAME_PREFIX}empty_group")
+        db.add_all([tag_group, empty_tag_group])
+        db.flush()
+        used_tag = Tag(name=f"{NAME_PREFIX}used", tag_group_id=tag_group.id)
+        db.add_all(
+            [used_tag]
+            + [
+                Tag(name=f"{NAME_PREFIX}ghost_{i}", tag_group_id=tag_group.id)
+                for i in range(GHOST_TAG_COUNT)
+            ]
+        )
+        db.flush()
+        EntityTagRepository(db).create_entity_tag(
+            entity_id=USED_ENTITY_ID, entity_type="repo", tag_id=used_tag.id
+        )
+        db.commit()
+        tag_group_ids = [tag_group.id, empty_tag_group.id]
+
+    yield tag_group_ids
+
+    with next(get_db()) as db:
+        db.execute(
+            sqlalchemy.text(
+                "DELETE FROM entity_tags USING entities "
+                "WHERE entity_tags.entity_key = entities.id "
+                "AND entities.entity_id = :entity_id"
+            ),
+            {"entity_id": USED_ENTITY_ID},
+        )
+        db.execute(
+            sqlalchemy.text("DELETE FROM tags WHERE name LIKE :prefix"),
+            {"prefix": f"{NAME_PREFIX}%"},
+        )
+        db.execute(
+            sqlalchemy.text("DELETE FROM tag_groups WHERE name LIKE :prefix"),
+            {"prefix": f"{NAME_PREFIX}%"},
+        )
+        db.commit()
+
+
+# pylint: disable=redefined-outer-name,unused-argument
+def test_ghost_tags_are_deleted_in_batches(ghost_tags):
+    with next(get_db()) as db:
+        service = TagService(TagRepository(db))
+        assert service.delete_tags_with_no_entities_batch(2, ghost_tags) == 2
+        assert (
+            service.delete_tags_with_no_entities(
+                batch_size=2, max_batches=1, tag_group_ids=ghost_tags
+            )
+            == 2
+        )
+        # the last ghost tag
+        assert (
+            service.delete_tags_with_no_entities(batch_size=2, tag_group_ids=ghost_tags)
+            == 1
+        )
+
+    assert stored_tag_names() == [f"{NAME_PREFIX}used"]
+    # tag groups are only deleted by the background cleanup, on demand
+    assert stored_tag_group_names() == [
+        f"{NAME_PREFIX}empty_group",
+        f"{NAME_PREFIX}group",
+    ]
+
+
+def test_background_cleanup_reports_progress(ghost_tags):
+    tag_group_ids = "".join(
+        f"&tag_group_ids={tag_group_id}" for tag_group_id in ghost_tags
+    )
+    status = execute_and_validate_endpoint(
+        f"/api/v1/tags/ghost_tags_gc?include_tag_groups=true{tag_group_ids}",
+        {},
+        GhostTagsGCStatus,
+        expected_status_code=202,
+    )
+    deadline = time.monotonic() + 10
+    while status.running and time.monotonic() < deadline:
+        time.sleep(0.05)
+        status = execute_and_validate_endpoint(
+            "/api/v1/tags/ghost_tags_gc/status", {}, GhostTagsGCStatus, method="GET"
+        )
+
+    assert not status.running
+    assert status.error is None
+    assert status.finished_at is not None
+    assert status.tags_deleted == GHOST_TAG_COUNT
+    assert status.tag_groups_deleted == 1
+    # a batch of tags and a batch of tag groups
+    assert status.batches == 2
+    assert stored_tag_names() == [f"{NAME_PREFIX}used"]
+    assert stored_tag_group_names() == [f"{NAME_PREFIX}group"]
@@ -9,3 +9,6 @@ from readyapi.testclient import TestClient
 # Moving to new client causes issues
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 test_client = TestClient(app)
+# a single event loop serves all the requests, as in the server:
+# pooled asyncpg connections can only be used from the loop that opened them
+test_client.__enter__()  # pylint: disable=unnecessary-dunder-call
@@ -3,21 +3,75 @@ Utility functions for the RAG flow integration tests.
 """
 
 import json
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pydantic import ValidationError
 from pydantic_core import to_jsonable_python
-from typing import List, Type, get_origin, get_args, Any, Union, TypeVar
+from typing import (
+    Iterator,
+    List,
+    Optional,
+    Type,
+    get_origin,
+    get_args,
+    Any,
+    Union,
+    TypeVar,
+)
+from app.common.metrics import (
+    add_statement_observer,
+    remove_statement_observer,
+    request_db_stats,
+)
+from app.common.sql_profile import statement_shape
 from tests.v1.integration.test_client import test_client
 
 # Define a generic type variable for the response model
 T = TypeVar("T")
 
 
+@dataclass
+class SqlCapture:
+    statements: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        """The statements, grouped by shape, the most frequent first"""
+        shapes = Counter(statement_shape(statement) for statement in self.statements)
+        return "\n".join(f"{count} x {shape}" for shape, count in shapes.most_common())
+
+
+@contextmanager
+def capture_sql() -> Iterator[SqlCapture]:
+    """
+    Captures the SQL statements run by the requests of the test client, the
+    statements of the background tasks (bulk job workers...) are left out
+    """
+    capture = SqlCapture()
+
+    def observe(
+        conn, statement, parameters, context, seconds
+    ):  # pylint: disable=unused-argument
+        if request_db_stats() is not None:
+            capture.statements.append(statement)
+            capture.seconds += seconds
+
+    add_statement_observer(observe)
+    try:
+        yield capture
+    finally:
+        remove_statement_observer(observe)
+
+
 def execute_and_validate_endpoint(
     url: str,
     request_obj: Any,
     response_model: Union[Type[T], Type[List[T]]],
     method: str = "POST",
     expected_status_code: int = 200,
+    max_statements: Optional[int] = None,
+    max_db_seconds: Optional[float] = None,
 ) -> Union[T, List[T]]:
     """
     Executes an endpoint and validates the response structure against a Pydantic model.
@@ -26,9 +80,43 @@ def execute_and_validate_endpoint(
     :param request_obj: The request payload to send.
     :param response_model: The Pydantic model or list of models to validate the response against.
     :param method: The HTTP method to use for the request. Default is POST.
+    :param max_statements: The SQL budget of the request: the maximum number of SQL statements it may run.
+    :param max_db_seconds: The maximum total time the request may spend running SQL statements.
     :return: An instance or list of instances of the response_model populated with the response data.
-    :raises AssertionError: If the response status code is not 200 or if validation fails.
+    :raises AssertionError: If the response status code is not 200, if validation fails
+        or if the request is over budget.
     """
+    with capture_sql() as sql:
+        response = _execute(url, request_obj, method)
+
+    assert (
+        response.status_code == expected_status_code
+    ), f"Expected status code {expected_status_code} but received: {response.status_code}"
+    assert max_statements is None or len(sql.statements) <= max_statements, (
+        f"{method} {url} ran {len(sql.statements)} SQL statements, "
+        f"over the budget of {max_statements}:\n{sql.summary()}"
+    )
+    assert max_db_seconds is None or sql.seconds <= max_db_seconds, (
+        f"{method} {url} spent {sql.seconds:.3f}s running SQL statements, "
+        f"over the budget of {max_db_seconds}s:\n{sql.summary()}"
+    )
+
+    response_data = response.json()
+
+    try:
+        # Check if the response_model is a list type
+        if get_origin(response_model) is list:
+            model = get_args(response_model)[0]
+            return [model(**item) for item in response_data]
+        elif isinstance(response_data, list):
+            return [response_model(**item) for item in response_data]
+        else:
+            return response_model(**response_data)
+    except ValidationError as e:
+        assert False, f"Response structure validation failed: {e}"
+
+
+def _execute(url: str, request_obj: Any, method: str):
     response = None
     val = json.dumps(request_obj, default=to_jsonable_python)
     if method.upper() == "POST":
@@ -54,21 +142,4 @@ def execute_and_validate_endpoint(
         )
     else:
         raise ValueError(f"Unsupported HTTP method: {method}")
-
-    assert (
-        response.status_code == expected_status_code
-    ), f"Expected status code {expected_status_code} but received: {response.status_code}"
-
-    response_data = response.json()
-
-    try:
-        # Check if the response_model is a list type
-        if get_origin(response_model) is list:
-            model = get_args(response_model)[0]
-            return [model(**item) for item in response_data]
-        elif isinstance(response_data, list):
-            return [response_model(**item) for item in response_data]
-        else:
-            return response_model(**response_data)
-    except ValidationError as e:
-        assert False, f"Response structure validation failed: {e}"
+    return response